@@ -630,6 +630,29 @@ NINJA_PAGINATION_CLASS = "legadilo.utils.pagination.LimitOffsetPagination"
 # ------------------------------------------------------------------------------
 ARTICLE_FETCH_TIMEOUT = env.int("LEGADILO_ARTICLE_FETCH_TIMEOUT", default=50)
 RSS_FETCH_TIMEOUT = env.int("LEGADILO_RSS_FETCH_TIMEOUT", default=300)
+# A host that doesn't answer must not keep its feeds waiting for RSS_FETCH_TIMEOUT.
+RSS_FETCH_CONNECT_TIMEOUT = env.int("LEGADILO_RSS_FETCH_CONNECT_TIMEOUT", default=10)
+RSS_FETCH_TOTAL_TIMEOUT = env.int("LEGADILO_RSS_FETCH_TOTAL_TIMEOUT", default=60)
+FEED_UPDATE_MAX_CONCURRENCY = env.int("LEGADILO_FEED_UPDATE_MAX_CONCURRENCY", default=20)
+FEED_UPDATE_MAX_CONCURRENCY_PER_HOST = env.int(
+    "LEGADILO_FEED_UPDATE_MAX_CONCURRENCY_PER_HOST", default=2
+)
+FEED_UPDATE_MIN_INTERVAL_PER_HOST = env.float(
+    "LEGADILO_FEED_UPDATE_MIN_INTERVAL_PER_HOST", default=1.0
+)
+FEED_UPDATE_MAX_IN_FLIGHT_BYTES = env.int(
+    "LEGADILO_FEED_UPDATE_MAX_IN_FLIGHT_BYTES", default=100 * 1024 * 1024
+)
+FEED_UPDATE_WRITE_BATCH_SIZE = env.int("LEGADILO_FEED_UPDATE_WRITE_BATCH_SIZE", default=20)
+FEED_UPDATE_WRITE_FLUSH_INTERVAL = env.float(
+    "LEGADILO_FEED_UPDATE_WRITE_FLUSH_INTERVAL", default=1.0
+)
+# Only useful with feed_worker: update_feeds refreshes all due feeds on each run anyway.
+FEED_REFRESH_ON_READING_LIST_VIEW = env.bool(
+    "LEGADILO_FEED_REFRESH_ON_READING_LIST_VIEW", default=False
+)
+# Public URL of the site used by WebSub hubs to reach us. WebSub is disabled when it's empty.
+WEBSUB_CALLBACK_BASE_URL = env.str("LEGADILO_WEBSUB_CALLBACK_BASE_URL", default="")
 CONTACT_EMAIL = env.str("LEGADILO_CONTACT_EMAIL", default=None)
 TOKEN_LENGTH = 50
 JWT_ALGORITHM = "HS256"
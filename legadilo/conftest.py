@@ -16,6 +16,7 @@
 from http import HTTPStatus
 
 import pytest
+from django.core.cache import cache
 from django.urls import reverse
 
 from legadilo.core.models import Timezone
@@ -39,6 +40,13 @@ def _setup_settings(settings, tmpdir):
     settings.TEMPLATES[0]["OPTIONS"]["debug"] = True
 
 
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    # The local memory cache is shared by all tests.
+    yield
+    cache.clear()
+
+
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
@@ -21,6 +21,8 @@ from legadilo.feeds.models import (
     FeedArticle,
     FeedCategory,
     FeedDeletedArticle,
+    FeedHost,
+    FeedHubSubscription,
     FeedTag,
     FeedUpdate,
 )
@@ -82,3 +84,16 @@ class FeedArticleAdmin(admin.ModelAdmin):
 @admin.register(FeedDeletedArticle)
 class FeedDeletedArticleAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(FeedHost)
+class FeedHostAdmin(admin.ModelAdmin):
+    search_fields = ["host"]
+    list_display = ["host", "nb_consecutive_failures", "last_failure_at", "blocked_until"]
+
+
+@admin.register(FeedHubSubscription)
+class FeedHubSubscriptionAdmin(admin.ModelAdmin):
+    search_fields = ["feed_url", "hub_url"]
+    list_display = ["feed_url", "hub_url", "subscription_requested_at", "lease_expires_at"]
+    readonly_fields = ["token", "secret"]
@@ -64,7 +64,15 @@ class OutFeedSchema(ModelSchema):
 
     class Meta:
         model = Feed
-        exclude = ("user", "created_at", "updated_at", "articles")
+        exclude = (
+            "user",
+            "created_at",
+            "updated_at",
+            "articles",
+            "entry_fingerprints",
+            "next_refresh_at",
+            "latest_feed_update",
+        )
 
 
 @feeds_api_router.get(
@@ -100,7 +108,9 @@ async def subscribe_to_feed_view(request: AuthenticatedApiRequest, payload: Feed
 
     try:
         async with get_rss_async_client() as client:
-            feed_medata = await get_feed_data(payload.feed_url, client=client)
+            feed_medata = await get_feed_data(
+                payload.feed_url, client=client, use_discovery_cache=True
+            )
         tags = await sync_to_async(Tag.objects.get_or_create_from_list)(request.auth, payload.tags)
         feed, created = await sync_to_async(Feed.objects.create_from_metadata)(
             feed_medata,
@@ -185,7 +195,7 @@ async def update_feed_view(
     feed_id: int,
     payload: FeedUpdate,
 ):
-    qs = Feed.objects.get_queryset().select_related("category")
+    qs = Feed.objects.get_queryset().select_related("category", "user__settings__timezone")
     feed = await aget_object_or_404(qs, id=feed_id, user=request.auth)
 
     if payload.tags is not FIELD_UNSET:
@@ -193,6 +203,10 @@ async def update_feed_view(
 
     # We must refresh to update generated fields & tags.
     await update_model_from_schema(feed, payload, excluded_fields={"tags"})
+    if payload.refresh_delay is not FIELD_UNSET:
+        # Adaptive refresh delays are computed from the feed history in the database.
+        await sync_to_async(feed.schedule_next_refresh)()
+        await feed.asave(update_fields=["next_refresh_at"])
 
     return await Feed.objects.get_queryset().for_api().aget(id=feed_id)
 
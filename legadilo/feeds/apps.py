@@ -20,3 +20,6 @@ from django.apps import AppConfig
 class FeedsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "legadilo.feeds"
+
+    def ready(self):
+        import legadilo.feeds.signals  # noqa: F401,PLC0415
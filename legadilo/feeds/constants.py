@@ -16,6 +16,9 @@
 
 from __future__ import annotations
 
+from datetime import timedelta
+from enum import StrEnum
+
 from django.db.models import TextChoices
 from django.utils.translation import gettext_lazy as _
 
@@ -54,6 +57,7 @@ class FeedRefreshDelays(TextChoices):
     MIDDLE_OF_THE_MONTH = "MIDDLE_OF_THE_MONTH", _("Middle Day of the Month")
     END_OF_THE_MONTH = "END_OF_THE_MONTH", _("End of the Month")
     THRICE_A_MONTH = "THRICE_A_MONTH", _("Thrice a month")
+    ADAPTIVE = "ADAPTIVE", _("Adaptive (based on how often the feed is updated)")
 
 
 class FeedUpdateStatus(TextChoices):
@@ -62,7 +66,52 @@ class FeedUpdateStatus(TextChoices):
     NOT_MODIFIED = "NOT_MODIFIED", _("Not Modified")
 
 
+class FeedUpdateStage(StrEnum):
+    """Stages of a feed update we measure. Associating tags is measured while saving articles."""
+
+    CONNECT = "connect"
+    DOWNLOAD = "download"
+    PARSE = "parse"
+    BUILD_ARTICLES = "build_articles"
+    SAVE_ARTICLES = "save_articles"
+
+
 HTTP_TIMEOUT = 20  # In seconds.
 MAX_FEED_FILE_SIZE = 10 * 1024 * 1024  # 10MiB in bytes.
+# Feeds bigger than this are parsed entry by entry to limit memory usage.
+STREAM_PARSE_MIN_FEED_SIZE = 1024 * 1024  # 1MiB in bytes.
+STREAM_PARSE_CHUNK_SIZE = 64 * 1024  # 64KiB in bytes.
+# We don't know the size of a feed before downloading it: this is what we reserve in the byte
+# budget for each feed we start to fetch.
+FEED_DOWNLOAD_ESTIMATED_SIZE = 256 * 1024  # 256KiB in bytes.
+MAX_FEED_ENTRIES_PER_UPDATE = 1_000
 FEED_TITLE_MAX_LENGTH = 300
 KEEP_FEED_UPDATES_FOR = 60  # In days
+# Feed updates are stored in one partition per month. We create them a few months in advance so
+# long-running workers don't have to.
+FEED_UPDATE_NB_PARTITIONS_AHEAD = 3
+# Bounds and history used to compute the delay of feeds with the adaptive refresh delay.
+ADAPTIVE_REFRESH_MIN_DELAY = timedelta(minutes=45)
+ADAPTIVE_REFRESH_MAX_DELAY = timedelta(days=7)
+ADAPTIVE_REFRESH_DEFAULT_DELAY = timedelta(days=1)
+ADAPTIVE_REFRESH_NB_ARTICLES = 20
+ADAPTIVE_REFRESH_MAX_BACKOFF = 5
+# A host is skipped during a cooldown once we failed to reach it this many times in a row. The
+# cooldown doubles on each new failure.
+FEED_HOST_FAILURE_THRESHOLD = 3
+FEED_HOST_COOLDOWN = timedelta(minutes=30)
+FEED_HOST_MAX_COOLDOWN = timedelta(days=1)
+# Lease we ask WebSub hubs for. Feeds are polled again to renew it when it's about to expire.
+WEBSUB_LEASE_DURATION = timedelta(days=10)
+WEBSUB_LEASE_RENEWAL_DELAY = timedelta(days=1)
+# Delay after which we ask again for a subscription the hub never verified.
+WEBSUB_PENDING_SUBSCRIPTION_DELAY = timedelta(hours=1)
+# The feed URLs found in HTML pages are cached to skip the discovery when subscribing to the same
+# page again or importing many feeds. Pages without feeds are cached for less time since a feed may
+# be added to them.
+FEED_DISCOVERY_CACHE_DURATION = timedelta(days=1)
+FEED_DISCOVERY_NEGATIVE_CACHE_DURATION = timedelta(hours=1)
+# Feeds of users who didn't read them for a while are refreshed at most once per
+# AWAY_USER_MIN_REFRESH_DELAY. They are all refreshed when the user opens a reading list again.
+AWAY_USER_DELAY = timedelta(weeks=3)
+AWAY_USER_MIN_REFRESH_DELAY = timedelta(days=1)
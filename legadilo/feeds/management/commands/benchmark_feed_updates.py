@@ -0,0 +1,393 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import random
+import re
+import resource
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from enum import StrEnum
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from uuid import uuid4
+from xml.sax.saxutils import escape
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.core.management import CommandError
+from django.core.management.base import CommandParser
+from django.db import connection, transaction
+
+from legadilo.core.models import Timezone
+from legadilo.feeds import constants
+from legadilo.feeds.models import Feed, FeedHost, FeedUpdate
+from legadilo.feeds.services.feed_update_pipeline import (
+    build_feed_update_pipeline,
+    group_feeds_by_url,
+)
+from legadilo.users.models import User, UserSettings
+from legadilo.utils.collections_utils import percentile
+from legadilo.utils.command import AsyncCommand
+from legadilo.utils.time_utils import utcnow
+
+
+class EtagMode(StrEnum):
+    NONE = "none"
+    HONOR = "honor"
+    IGNORE = "ignore"
+
+
+class Command(AsyncCommand):
+    help = """Benchmark feed updates against local servers.
+
+    Feeds are served by HTTP servers started on localhost: each server acts as a different host.
+    They serve the files of a corpus of recorded feeds (or generated feeds) with the supplied
+    latency, ETag behavior and error rate. Users and feeds pointing to these servers are created,
+    updated with the same code as update_feeds for each round and deleted at the end.
+
+    Don't run it against the production database: it creates data and loads it.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--corpus",
+            default=None,
+            type=Path,
+            help="Directory containing the feed files to serve. By default, feeds are generated.",
+        )
+        parser.add_argument(
+            "--nb-users", dest="nb_users", default=10, type=int, help="Number of users to create."
+        )
+        parser.add_argument(
+            "--nb-feeds",
+            dest="nb_feeds",
+            default=100,
+            type=int,
+            help="Number of feeds to create. They are spread among users.",
+        )
+        parser.add_argument(
+            "--nb-hosts",
+            dest="nb_hosts",
+            default=10,
+            type=int,
+            help="Number of servers to start. Feeds are spread among them.",
+        )
+        parser.add_argument(
+            "--nb-entries",
+            dest="nb_entries",
+            default=20,
+            type=int,
+            help="Number of entries of generated feeds.",
+        )
+        parser.add_argument(
+            "--latency",
+            default=0.05,
+            type=float,
+            help="Number of seconds servers wait before answering.",
+        )
+        parser.add_argument(
+            "--error-rate",
+            dest="error_rate",
+            default=0.0,
+            type=float,
+            help="Proportion of requests answered with an internal server error.",
+        )
+        parser.add_argument(
+            "--etag",
+            default=EtagMode.HONOR,
+            choices=[mode.value for mode in EtagMode],
+            help=(
+                "How servers handle ETags: don't send them, send them and answer with 304 if the "
+                "feed didn't change or send them but always send the feed."
+            ),
+        )
+        parser.add_argument(
+            "--rounds",
+            default=2,
+            type=int,
+            help="Number of times to update all the feeds.",
+        )
+        parser.add_argument(
+            "--parse-workers",
+            dest="parse_workers",
+            default=0,
+            type=int,
+            help=(
+                "Number of processes used to parse feeds. By default, feeds are parsed in the "
+                "main process."
+            ),
+        )
+        parser.add_argument(
+            "--seed", default=0, type=int, help="Seed used to choose which requests fail."
+        )
+        parser.add_argument(
+            "--keep-data",
+            dest="keep_data",
+            default=False,
+            action="store_true",
+            help="Don't delete the users and feeds created for the benchmark.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        # Database queries made with sync_to_async run in this thread.
+        self._nb_queries = 0
+        with connection.execute_wrapper(self._count_query):
+            return super().handle(*args, **options)
+
+    def _count_query(self, execute, sql, params, many, context):
+        self._nb_queries += 1
+        return execute(sql, params, many, context)
+
+    async def run(self, *args, **options):
+        corpus = self._load_corpus(options)
+        rng = random.Random(options["seed"])  # noqa: S311 not used for security
+        servers = [
+            _FeedCorpusServer(
+                corpus,
+                latency=options["latency"],
+                error_rate=options["error_rate"],
+                etag_mode=EtagMode(options["etag"]),
+                rng=rng,
+            )
+            for _ in range(options["nb_hosts"])
+        ]
+        for server in servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        try:
+            user_ids, feed_ids = await sync_to_async(_create_users_and_feeds)(
+                [server.base_url for server in servers],
+                nb_users=options["nb_users"],
+                nb_feeds=options["nb_feeds"],
+            )
+            try:
+                for round_number in range(1, options["rounds"] + 1):
+                    await self._run_round(round_number, feed_ids, options["parse_workers"])
+            finally:
+                if not options["keep_data"]:
+                    await sync_to_async(_delete_benchmark_data)(
+                        user_ids, [server.host for server in servers]
+                    )
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+
+    def _load_corpus(self, options: dict[str, Any]) -> list[bytes]:
+        if options["corpus"] is None:
+            return [
+                _build_feed(feed_number, options["nb_entries"])
+                for feed_number in range(options["nb_feeds"])
+            ]
+
+        if not options["corpus"].is_dir():
+            raise CommandError(f"{options['corpus']} is not a directory")
+        corpus = [
+            path.read_bytes() for path in sorted(options["corpus"].iterdir()) if path.is_file()
+        ]
+        if not corpus:
+            raise CommandError(f"No feed file found in {options['corpus']}")
+
+        return corpus
+
+    async def _run_round(self, round_number: int, feed_ids: list[int], parse_workers: int):
+        round_started_at = utcnow()
+        feeds = [
+            feed
+            async for feed in Feed.objects.get_queryset()
+            .only_with_ids(feed_ids)
+            .select_related("user", "user__settings", "user__settings__timezone", "category")
+        ]
+        async with build_feed_update_pipeline(parse_workers=parse_workers) as pipeline:
+            self._nb_queries = 0
+            started_at = time.perf_counter()
+            await pipeline.update(group_feeds_by_url(feeds))
+            duration = time.perf_counter() - started_at
+            nb_queries = self._nb_queries
+
+        nb_feed_updates_by_status: dict[str, int] = dict.fromkeys(constants.FeedUpdateStatus, 0)
+        latencies = []
+        async for status, technical_debug_data in FeedUpdate.objects.filter(
+            feed_id__in=feed_ids, created_at__gte=round_started_at
+        ).values_list("status", "technical_debug_data"):
+            nb_feed_updates_by_status[status] += 1
+            if status == constants.FeedUpdateStatus.SUCCESS and technical_debug_data:
+                latencies.append(sum(technical_debug_data["stage_durations"].values()))
+
+        self.stdout.write(
+            f"Round {round_number}: {len(feeds)} feeds in {duration:.2f}s "
+            f"({len(feeds) / duration if duration > 0 else 0:.2f} feeds/s), "
+            f"{nb_feed_updates_by_status[constants.FeedUpdateStatus.SUCCESS]} updated, "
+            f"{nb_feed_updates_by_status[constants.FeedUpdateStatus.NOT_MODIFIED]} not modified, "
+            f"{nb_feed_updates_by_status[constants.FeedUpdateStatus.FAILURE]} failed, "
+            f"{pipeline.nb_postponed_feeds} postponed"
+        )
+        self.stdout.write(
+            f"  Per feed latency: p50={percentile(latencies, 50):.3f}s "
+            f"p95={percentile(latencies, 95):.3f}s"
+        )
+        self.stdout.write(
+            f"  DB queries: {nb_queries} ({nb_queries / len(feeds) if feeds else 0:.1f} per feed)"
+        )
+        self.stdout.write(f"  Peak RSS: {_get_peak_rss(parse_workers)}")
+        self.stdout.write(f"  {pipeline.scheduler.stats}")
+        self.stdout.write(f"  {pipeline.byte_budget}")
+        self.stdout.write(f"  {pipeline.writer.stage_timings_stats}")
+
+
+class _FeedCorpusServer(ThreadingHTTPServer):
+    """Serve the feeds of the corpus: /feeds/<n>.xml is the n-th feed, modulo the corpus size."""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        corpus: list[bytes],
+        *,
+        latency: float,
+        error_rate: float,
+        etag_mode: EtagMode,
+        rng: random.Random,
+    ):
+        super().__init__(("127.0.0.1", 0), _FeedCorpusRequestHandler)
+        self.corpus = corpus
+        self.latency = latency
+        self.etag_mode = etag_mode
+        self._error_rate = error_rate
+        self._rng = rng
+        self._rng_lock = threading.Lock()
+
+    @property
+    def host(self) -> str:
+        host, port = self.server_address[:2]
+        return f"{host!s}:{port}"
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}"
+
+    def must_fail(self) -> bool:
+        # The generator is shared by all servers and their threads.
+        with self._rng_lock:
+            return self._rng.random() < self._error_rate
+
+
+class _FeedCorpusRequestHandler(BaseHTTPRequestHandler):
+    server: _FeedCorpusServer
+
+    def do_GET(self):  # noqa: N802 function name should be lowercase
+        time.sleep(self.server.latency)
+        match = re.fullmatch(r"/feeds/(\d+)\.xml", self.path)
+        if match is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        if self.server.must_fail():
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR)
+            return
+
+        content = self.server.corpus[int(match.group(1)) % len(self.server.corpus)]
+        etag = f'"{hashlib.sha256(content).hexdigest()}"'
+        if self.server.etag_mode == EtagMode.HONOR and self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/xml")
+        self.send_header("Content-Length", str(len(content)))
+        if self.server.etag_mode != EtagMode.NONE:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):  # noqa: A002 argument is shadowing a Python builtin
+        # Logging each request would slow down the benchmark.
+        pass
+
+
+@transaction.atomic()
+def _create_users_and_feeds(
+    base_urls: list[str], *, nb_users: int, nb_feeds: int
+) -> tuple[list[int], list[int]]:
+    benchmark_id = uuid4().hex[:8]
+    timezone, _ = Timezone.objects.get_or_create(name="UTC")
+    users = User.objects.bulk_create([
+        User(
+            email=f"benchmark-{benchmark_id}-{user_number}@example.com",
+            password=make_password(None),
+        )
+        for user_number in range(nb_users)
+    ])
+    UserSettings.objects.bulk_create([UserSettings(user=user, timezone=timezone) for user in users])
+    feeds = Feed.objects.bulk_create([
+        Feed(
+            user=users[feed_number % nb_users],
+            feed_url=f"{base_urls[feed_number % len(base_urls)]}/feeds/{feed_number}.xml",
+            site_url="https://example.com",
+            title=f"Benchmark feed {feed_number}",
+            feed_type=constants.SupportedFeedType.rss20,
+        )
+        for feed_number in range(nb_feeds)
+    ])
+
+    return [user.id for user in users], [feed.id for feed in feeds]
+
+
+@transaction.atomic()
+def _delete_benchmark_data(user_ids: list[int], hosts: list[str]):
+    # Links between feeds and articles prevent articles (and thus users) to be deleted first.
+    Feed.objects.filter(user_id__in=user_ids).delete()
+    User.objects.filter(id__in=user_ids).delete()
+    FeedHost.objects.filter(host__in=hosts).delete()
+
+
+def _build_feed(feed_number: int, nb_entries: int) -> bytes:
+    published_at = datetime(2024, 1, 1, tzinfo=UTC)
+    items = []
+    for entry_number in range(nb_entries):
+        link = f"https://example.com/feeds/{feed_number}/articles/{entry_number}"
+        content = " ".join(
+            f"<p>Paragraph {paragraph_number} of article {entry_number}.</p>"
+            for paragraph_number in range(20)
+        )
+        items.append(
+            f"<item><title>Article {entry_number} of feed {feed_number}</title>"
+            f"<link>{link}</link><guid>{link}</guid>"
+            f"<pubDate>{format_datetime(published_at - timedelta(hours=entry_number))}</pubDate>"
+            f"<description>{escape(content)}</description></item>"
+        )
+
+    return (
+        '<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+        f"<title>Benchmark feed {feed_number}</title><link>https://example.com</link>"
+        f"<description>Generated feed</description>{''.join(items)}</channel></rss>"
+    ).encode()
+
+
+def _get_peak_rss(parse_workers: int) -> str:
+    # On Linux, the maximum resident set size is in KiB.
+    peak_rss = f"{resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f}MiB"
+    if parse_workers > 0:
+        peak_children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+        peak_rss += f" (largest parse worker: {peak_children_rss:.1f}MiB)"
+
+    return peak_rss
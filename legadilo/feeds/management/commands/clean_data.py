@@ -18,7 +18,7 @@ import logging
 
 from django.core.management import BaseCommand
 
-from legadilo.feeds.models import Feed, FeedDeletedArticle
+from legadilo.feeds.models import Feed, FeedDeletedArticle, FeedUpdate
 from legadilo.reading.models import ArticleFetchError
 
 logger = logging.getLogger(__name__)
@@ -31,8 +31,14 @@ class Command(BaseCommand):
     )
 
     def handle(self, *args, **options):
-        nb_deleted = Feed.objects.get_feed_update_for_cleanup().delete()
-        logger.info("Deleted %s feed updates.", nb_deleted)
+        created_partitions = FeedUpdate.objects.create_partitions()
+        logger.info("Created feed update partitions: %s.", created_partitions)
+        dropped_partitions, nb_deleted = Feed.objects.cleanup_feed_updates()
+        logger.info(
+            "Dropped feed update partitions %s and deleted %s feed updates.",
+            dropped_partitions,
+            nb_deleted,
+        )
         nb_deleted = ArticleFetchError.objects.get_queryset().for_cleanup().delete()
         logger.info("Deleted %s article fetch errors.", nb_deleted)
         nb_deleted = FeedDeletedArticle.objects.cleanup_articles()
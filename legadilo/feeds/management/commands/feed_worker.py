@@ -0,0 +1,162 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import timedelta
+from typing import Any
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import CommandParser
+
+from legadilo.feeds.models import Feed, FeedUpdate
+from legadilo.feeds.services.feed_update_pipeline import (
+    build_feed_update_pipeline,
+    group_feeds_by_url,
+)
+from legadilo.utils.command import AsyncCommand
+from legadilo.utils.loggers import unlink_logger_from_sentry
+
+logger = logging.getLogger(__name__)
+
+unlink_logger_from_sentry(logger)
+
+
+class Command(AsyncCommand):
+    help = """Update feeds continuously.
+
+    Due feeds are claimed in small batches, so many workers can run at the same time on one or
+    more hosts without updating the same feed twice. On SIGTERM or SIGINT, the worker completes its
+    current batch and stops.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            dest="batch_size",
+            default=20,
+            type=int,
+            help=(
+                "Number of feeds to claim and update at once. Due feeds sharing their URL with a "
+                "claimed feed are claimed with it."
+            ),
+        )
+        parser.add_argument(
+            "--poll-interval",
+            dest="poll_interval",
+            default=60,
+            type=float,
+            help="Number of seconds to wait before looking for due feeds when none are due.",
+        )
+        parser.add_argument(
+            "--lease",
+            dest="lease",
+            default=15 * 60,
+            type=int,
+            help=(
+                "Number of seconds during which claimed feeds are reserved for this worker. If it "
+                "dies, other workers will update them once this delay is expired."
+            ),
+        )
+        parser.add_argument(
+            "--parse-workers",
+            dest="parse_workers",
+            default=0,
+            type=int,
+            help=(
+                "Number of processes used to parse feeds. By default, feeds are parsed in the "
+                "main process."
+            ),
+        )
+        parser.add_argument(
+            "--exit-when-idle",
+            dest="exit_when_idle",
+            default=False,
+            action="store_true",
+            help="Stop when no feeds are due instead of waiting for more.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> str | None:
+        # Signal handlers can only be installed from the main thread and the event loop runs in
+        # another one.
+        self._stop_requested = threading.Event()
+        previous_handlers = {
+            signum: signal.signal(signum, self._request_stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            return super().handle(*args, **options)
+        finally:
+            for signum, previous_handler in previous_handlers.items():
+                signal.signal(signum, previous_handler)
+
+    def _request_stop(self, signum, frame):
+        logger.info("Received %s, stopping after the current batch", signal.Signals(signum).name)
+        self._stop_requested.set()
+
+    async def run(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        lease = timedelta(seconds=options["lease"])
+        nb_updated_feeds = 0
+        nb_batches = 0
+        start_time = time.monotonic()
+        logger.info("Starting feed worker %s", worker_id)
+        await sync_to_async(FeedUpdate.objects.create_partitions)()
+
+        async with build_feed_update_pipeline(parse_workers=options["parse_workers"]) as pipeline:
+            while not self._stop_requested.is_set():
+                feeds = await sync_to_async(Feed.objects.claim_for_update)(
+                    options["batch_size"], lease
+                )
+                if not feeds:
+                    if options["exit_when_idle"]:
+                        break
+                    # Wait in a thread so we are woken up as soon as a stop is requested.
+                    await asyncio.to_thread(self._stop_requested.wait, options["poll_interval"])
+                    continue
+
+                batch_start_time = time.monotonic()
+                await pipeline.update(group_feeds_by_url(feeds))
+                batch_duration = time.monotonic() - batch_start_time
+                nb_updated_feeds += len(feeds)
+                nb_batches += 1
+                logger.info(
+                    "Worker %s updated %s feeds in %.2fs (%.2f feeds/s)",
+                    worker_id,
+                    len(feeds),
+                    batch_duration,
+                    len(feeds) / batch_duration if batch_duration > 0 else 0,
+                )
+
+        duration = time.monotonic() - start_time
+        logger.info(
+            "Stopped feed worker %s after updating %s feeds in %s batches in %.2fs "
+            "(%.2f feeds/s, %s postponed because their host is unreachable, %s, %s, %s)",
+            worker_id,
+            nb_updated_feeds,
+            nb_batches,
+            duration,
+            nb_updated_feeds / duration if duration > 0 else 0,
+            pipeline.nb_postponed_feeds,
+            pipeline.scheduler.stats,
+            pipeline.writer.stage_timings_stats,
+            pipeline.byte_budget,
+        )
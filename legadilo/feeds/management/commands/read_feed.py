@@ -14,13 +14,14 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import tracemalloc
 from pathlib import Path
 from pprint import pprint
 
 from django.core.management import CommandError
 from django.core.management.base import CommandParser
 
-from legadilo.feeds.services.feed_parsing import build_feed_data_from_parsed_feed, parse_feed
+from legadilo.feeds.services.feed_parsing import aparse_feed_content, build_parse_executor
 from legadilo.utils.command import AsyncCommand
 from legadilo.utils.http_utils import get_rss_async_client
 from legadilo.utils.validators import is_url_valid
@@ -42,11 +43,44 @@ class Command(AsyncCommand):
         parser.add_argument(
             "--print", help="Print the parsed data", default=False, action="store_true"
         )
+        parser.add_argument(
+            "--parse-workers",
+            dest="parse_workers",
+            default=0,
+            type=int,
+            help="Number of processes used to parse the feed. By default, parse in this process.",
+        )
+        parser.add_argument(
+            "--trace-memory",
+            dest="trace_memory",
+            default=False,
+            action="store_true",
+            help=(
+                "Print the peak memory allocated while reading and parsing the feed. Only "
+                "allocations made in this process are traced: don't use it with --parse-workers."
+            ),
+        )
 
     async def run(self, *args, **options):
-        file_content = await self._read_feed(options["feed_file"][0])
-        parsed_feed = parse_feed(file_content, resolve_relative_uris=True, sanitize_html=False)
-        feed_data = build_feed_data_from_parsed_feed(parsed_feed, options["feed_file"][0])
+        if options["trace_memory"]:
+            tracemalloc.start()
+
+        file_content, encoding = await self._read_feed(options["feed_file"][0])
+        with build_parse_executor(options["parse_workers"]) as executor:
+            feed_data = await aparse_feed_content(
+                file_content, options["feed_file"][0], encoding=encoding, executor=executor
+            )
+
+        if options["trace_memory"]:
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(  # noqa: T201 print found
+                f"Peak memory: {peak_memory / 1024 / 1024:.2f}MiB for a feed of "
+                f"{len(file_content) / 1024 / 1024:.2f}MiB"
+            )
+
+        if feed_data is None:
+            raise CommandError(f"{options['feed_file'][0]} is not a valid feed")
 
         print(  # noqa: T201 print found
             f"Feed {feed_data.title} ({feed_data.feed_type}) about {feed_data.description} "
@@ -55,15 +89,15 @@ class Command(AsyncCommand):
         if options["print"]:
             pprint(feed_data)  # noqa: T203 pprint found
 
-    async def _read_feed(self, feed_file):
+    async def _read_feed(self, feed_file) -> tuple[bytes, str | None]:
         file_path = Path(feed_file)
         if file_path.exists() and file_path.is_file():
-            with file_path.open("r", encoding="utf-8") as f:  # noqa: ASYNC230 async functions calling open
-                return f.read()
+            with file_path.open("rb") as f:  # noqa: ASYNC230 async functions calling open
+                return f.read(), None
 
         if is_url_valid(feed_file):
             async with get_rss_async_client() as client:
                 response = await client.get(feed_file)
-                return response.raise_for_status().text
+                return response.raise_for_status().content, response.charset_encoding
 
         raise CommandError(f"Failed to find file {feed_file}")
@@ -15,21 +15,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import logging
-from asyncio import TaskGroup
-from http import HTTPStatus
 from typing import Any
 
 from asgiref.sync import sync_to_async
 from django.core.management.base import CommandParser
-from httpx import HTTPError, HTTPStatusError
 
 from legadilo.feeds.models import Feed, FeedUpdate
 from legadilo.feeds.models.feed import FeedQuerySet
-from legadilo.feeds.services.feed_parsing import get_feed_data
-from legadilo.users.models import User
+from legadilo.feeds.services.feed_update_pipeline import (
+    build_feed_update_pipeline,
+    group_feeds_by_url,
+)
 from legadilo.utils.command import AsyncCommand
-from legadilo.utils.exceptions import extract_debug_information, format_exception
-from legadilo.utils.http_utils import get_rss_async_client
 from legadilo.utils.loggers import unlink_logger_from_sentry
 from legadilo.utils.time_utils import utcnow
 
@@ -70,70 +67,70 @@ class Command(AsyncCommand):
             type=int,
             help="Only update the feeds for the supplied user ids.",
         )
+        parser.add_argument(
+            "--parse-workers",
+            dest="parse_workers",
+            default=0,
+            type=int,
+            help=(
+                "Number of processes used to parse feeds. By default, feeds are parsed in the "
+                "main process."
+            ),
+        )
 
     async def run(self, *args, **options):
         logger.info("Starting feed update")
         start_time = utcnow()
-        async with (
-            get_rss_async_client() as client,
-            TaskGroup() as tg,
-        ):
-            # Some updates (like the every morning ones) must run in the user TZ. So, we look at
-            # users with feed and find the feeds to update based on their TZ from settings.
-            async for user in (
-                User.objects.get_queryset()
-                .with_feeds(options["user_ids"])
-                .select_related("settings", "settings__timezone")
-            ):
-                async for feed in self._build_feed_qs(user, options):
-                    tg.create_task(self._update_feed(client, feed))
+        await sync_to_async(FeedUpdate.objects.create_partitions)()
+        feeds_by_url = group_feeds_by_url([feed async for feed in self._build_feed_qs(options)])
+        # Feeds with an adaptive refresh delay that are not due would have been fetched by a fixed
+        # hourly schedule: each of them is a poll we saved. We must count them before the update
+        # reschedules the feeds we fetch.
+        nb_saved_polls = 0
+        if not options["force"]:
+            nb_saved_polls = (
+                await self._filter_feed_qs(Feed.objects.get_queryset(), options)
+                .waiting_for_adaptive_refresh()
+                .acount()
+            )
+        async with build_feed_update_pipeline(parse_workers=options["parse_workers"]) as pipeline:
+            await pipeline.update(feeds_by_url)
 
         duration = utcnow() - start_time
-        logger.info("Completed feed update in %s", duration)
-
-    def _build_feed_qs(self, user: User, options: dict[str, Any]) -> FeedQuerySet:
-        feeds_qs = (
-            Feed.objects.get_queryset()
-            .select_related("user", "user__settings", "category")
-            .filter(user=user)
+        logger.info(
+            "Completed feed update of %s feeds (%s unique URLs, %s polls saved by adaptive "
+            "refresh, %s postponed because their host is unreachable) in %s (%s, %s, %s)",
+            sum(len(feeds) for feeds in feeds_by_url.values()),
+            len(feeds_by_url),
+            nb_saved_polls,
+            pipeline.nb_postponed_feeds,
+            duration,
+            pipeline.scheduler.stats,
+            pipeline.writer.stage_timings_stats,
+            pipeline.byte_budget,
         )
 
-        if options["feed_ids"]:
-            feeds_qs = feeds_qs.only_with_ids(options["feed_ids"])
+    def _build_feed_qs(self, options: dict[str, Any]) -> FeedQuerySet:
+        # The user TZ is needed to schedule the next refresh of the feed.
+        feeds_qs = self._filter_feed_qs(
+            Feed.objects.get_queryset().select_related(
+                "user", "user__settings", "user__settings__timezone", "category"
+            ),
+            options,
+        )
 
         if options["force"]:  # noqa: SIM108 Use ternary operator
             feeds_qs = feeds_qs.only_enabled()
         else:
-            feeds_qs = feeds_qs.for_update(user)
+            feeds_qs = feeds_qs.for_update()
 
         return feeds_qs
 
-    async def _update_feed(self, client, feed):
-        logger.info("Updating feed %s", feed)
-        feed_update = await FeedUpdate.objects.get_latest_success_for_feed(feed)
-        try:
-            feed_metadata = await get_feed_data(
-                feed.feed_url,
-                client=client,
-                etag=feed_update.feed_etag if feed_update else None,
-                last_modified=feed_update.feed_last_modified if feed_update else None,
-            )
-        except HTTPStatusError as e:
-            if e.response.status_code == HTTPStatus.NOT_MODIFIED:
-                await sync_to_async(Feed.objects.log_not_modified)(feed)
-            else:
-                logger.exception("Failed to fetch feed %s", feed)
-                await sync_to_async(Feed.objects.log_error)(
-                    feed, format_exception(e), extract_debug_information(e)
-                )
-        except HTTPError as e:
-            logger.exception("Failed to update feed %s", feed)
-            await sync_to_async(Feed.objects.log_error)(
-                feed, format_exception(e), extract_debug_information(e)
-            )
-        except Exception as e:
-            logger.exception("Failed to update feed %s", feed)
-            await sync_to_async(Feed.objects.log_error)(feed, format_exception(e))
-        else:
-            await sync_to_async(Feed.objects.update_feed)(feed, feed_metadata)
-            logger.info("Updated feed %s", feed)
+    def _filter_feed_qs(self, feeds_qs: FeedQuerySet, options: dict[str, Any]) -> FeedQuerySet:
+        if options["user_ids"]:
+            feeds_qs = feeds_qs.filter(user_id__in=options["user_ids"])
+
+        if options["feed_ids"]:
+            feeds_qs = feeds_qs.only_with_ids(options["feed_ids"])
+
+        return feeds_qs
@@ -0,0 +1,37 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Generated by Django 5.1.4 on 2026-10-18 06:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0011_feedupdate_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feed",
+            name="entry_fingerprints",
+            field=models.JSONField(
+                blank=True,
+                default=dict,
+                help_text="Hash of the raw data of each entry of the feed indexed by entry id or link. Used to skip entries that didn't change since the last update.",
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Generated by Django 5.1.4 on 2026-10-18 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0012_feed_entry_fingerprints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feed",
+            name="next_refresh_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the feed must be refreshed next. Feeds without a date are refreshed ASAP.",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="feed",
+            index=models.Index(
+                condition=models.Q(("disabled_at__isnull", True)),
+                fields=["next_refresh_at"],
+                name="feeds_feed_next_refresh",
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Generated by Django 5.1.4 on 2026-10-18 07:14
+
+import uuid
+
+from django.db import migrations, models
+
+import legadilo.feeds.models.feed_hub_subscription
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0015_feedhost"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FeedHubSubscription",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("feed_url", models.URLField(max_length=1024, unique=True)),
+                ("topic_url", models.URLField(max_length=1024)),
+                ("hub_url", models.URLField(max_length=1024)),
+                (
+                    "token",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        help_text="Identify the subscription in the callback URL.",
+                        unique=True,
+                    ),
+                ),
+                (
+                    "secret",
+                    models.CharField(
+                        default=legadilo.feeds.models.feed_hub_subscription._generate_secret,
+                        help_text="Shared with the hub to sign the content it sends us.",
+                        max_length=64,
+                    ),
+                ),
+                ("subscription_requested_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "lease_expires_at",
+                    models.DateTimeField(
+                        blank=True,
+                        help_text="Feeds with an active lease are updated by the hub and are not polled.",
+                        null=True,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "db_table_comment": "WebSub subscriptions to the hubs feeds advertise.",
+            },
+        ),
+    ]
@@ -0,0 +1,162 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# Generated by Django 5.1.4 on 2026-10-18 07:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The indexes of the table are not copied by LIKE: we save their definitions before dropping the
+# table and recreate them with the same names once the new table is renamed. On a partitioned
+# table, they are created on all its partitions.
+SAVE_INDEXES = """
+CREATE TEMPORARY TABLE feeds_feedupdate_indexes AS
+    SELECT replace(indexdef, ' ON ONLY ', ' ON ') AS indexdef
+    FROM pg_indexes
+    WHERE schemaname = current_schema()
+        AND tablename = 'feeds_feedupdate'
+        AND indexname <> 'feeds_feedupdate_pkey';
+"""
+
+RESTORE_INDEXES = """
+DO $$
+DECLARE
+    index_definition text;
+BEGIN
+    FOR index_definition IN SELECT indexdef FROM feeds_feedupdate_indexes LOOP
+        EXECUTE index_definition;
+    END LOOP;
+END $$;
+DROP TABLE feeds_feedupdate_indexes;
+"""
+
+# Postgres requires the partition key to be part of the primary key. Django still sees id as the
+# primary key which is fine since it's generated by a sequence.
+CREATE_PARTITIONED_FEED_UPDATES = """
+CREATE TABLE feeds_feedupdate_partitioned (
+    LIKE feeds_feedupdate INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY
+) PARTITION BY RANGE (created_at);
+ALTER TABLE feeds_feedupdate_partitioned ADD PRIMARY KEY (id, created_at);
+CREATE TABLE feeds_feedupdate_default PARTITION OF feeds_feedupdate_partitioned DEFAULT;
+
+DO $$
+DECLARE
+    month timestamptz;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', COALESCE(MIN(created_at), now())),
+            date_trunc('month', now()) + interval '3 months',
+            interval '1 month'
+        )
+        FROM feeds_feedupdate
+    LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF feeds_feedupdate_partitioned FOR VALUES FROM (%L) TO (%L)',
+            'feeds_feedupdate_p' || to_char(month, 'YYYY_MM'),
+            month,
+            month + interval '1 month'
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO feeds_feedupdate_partitioned SELECT * FROM feeds_feedupdate;
+"""
+
+SWAP_PARTITIONED_FEED_UPDATES = """
+SELECT setval(
+    pg_get_serial_sequence('feeds_feedupdate_partitioned', 'id'),
+    COALESCE((SELECT MAX(id) FROM feeds_feedupdate), 0) + 1,
+    false
+);
+DROP TABLE feeds_feedupdate;
+
+ALTER TABLE feeds_feedupdate_partitioned RENAME TO feeds_feedupdate;
+ALTER SEQUENCE feeds_feedupdate_partitioned_id_seq RENAME TO feeds_feedupdate_id_seq;
+ALTER TABLE feeds_feedupdate
+    RENAME CONSTRAINT feeds_feedupdate_partitioned_pkey TO feeds_feedupdate_pkey;
+ALTER TABLE feeds_feedupdate
+    ADD CONSTRAINT feeds_feedupdate_feed_id_284cfe74_fk_feeds_feed_id
+    FOREIGN KEY (feed_id) REFERENCES feeds_feed (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+CREATE_UNPARTITIONED_FEED_UPDATES = """
+CREATE TABLE feeds_feedupdate_unpartitioned (
+    LIKE feeds_feedupdate INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY
+);
+INSERT INTO feeds_feedupdate_unpartitioned SELECT * FROM feeds_feedupdate;
+"""
+
+SWAP_UNPARTITIONED_FEED_UPDATES = """
+SELECT setval(
+    pg_get_serial_sequence('feeds_feedupdate_unpartitioned', 'id'),
+    COALESCE((SELECT MAX(id) FROM feeds_feedupdate), 0) + 1,
+    false
+);
+DROP TABLE feeds_feedupdate;
+
+ALTER TABLE feeds_feedupdate_unpartitioned RENAME TO feeds_feedupdate;
+ALTER SEQUENCE feeds_feedupdate_unpartitioned_id_seq RENAME TO feeds_feedupdate_id_seq;
+ALTER TABLE feeds_feedupdate ADD CONSTRAINT feeds_feedupdate_pkey PRIMARY KEY (id);
+ALTER TABLE feeds_feedupdate
+    ADD CONSTRAINT feeds_feedupdate_feed_id_284cfe74_fk_feeds_feed_id
+    FOREIGN KEY (feed_id) REFERENCES feeds_feed (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+SET_LATEST_FEED_UPDATES = """
+UPDATE feeds_feed SET latest_feed_update_id = (
+    SELECT id FROM feeds_feedupdate
+    WHERE feeds_feedupdate.feed_id = feeds_feed.id
+    ORDER BY created_at DESC
+    LIMIT 1
+);
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("feeds", "0016_feedhubsubscription"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="feed",
+            name="latest_feed_update",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                related_name="+",
+                to="feeds.feedupdate",
+            ),
+        ),
+        migrations.RunSQL(SET_LATEST_FEED_UPDATES, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(
+            [
+                CREATE_PARTITIONED_FEED_UPDATES,
+                SAVE_INDEXES,
+                SWAP_PARTITIONED_FEED_UPDATES,
+                RESTORE_INDEXES,
+            ],
+            reverse_sql=[
+                CREATE_UNPARTITIONED_FEED_UPDATES,
+                SAVE_INDEXES,
+                SWAP_UNPARTITIONED_FEED_UPDATES,
+                RESTORE_INDEXES,
+            ],
+        ),
+    ]
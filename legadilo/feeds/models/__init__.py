@@ -18,6 +18,8 @@ from .feed import Feed
 from .feed_article import FeedArticle
 from .feed_category import FeedCategory
 from .feed_deleted_article import FeedDeletedArticle
+from .feed_host import FeedHost
+from .feed_hub_subscription import FeedHubSubscription
 from .feed_tag import FeedTag
 from .feed_update import FeedUpdate
 
@@ -26,6 +28,8 @@ __all__ = [
     "FeedArticle",
     "FeedCategory",
     "FeedDeletedArticle",
+    "FeedHost",
+    "FeedHubSubscription",
     "FeedTag",
     "FeedUpdate",
 ]
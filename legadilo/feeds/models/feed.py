@@ -17,12 +17,16 @@
 from __future__ import annotations
 
 import calendar
-from datetime import datetime, timedelta
+from collections.abc import Mapping
+from datetime import datetime, time, timedelta
+from itertools import pairwise, takewhile
+from statistics import median
 from typing import TYPE_CHECKING, Any, assert_never, cast
 from zoneinfo import ZoneInfo
 
-from django.contrib.postgres.aggregates import ArrayAgg
+from django.conf import settings
 from django.db import models, transaction
+from django.db.models.functions import Coalesce
 from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 from slugify import slugify
@@ -34,12 +38,14 @@ from legadilo.users.models import User
 
 from ...users.models import Notification
 from ...utils.time_utils import utcnow
+from ...utils.timings import StageTimings, measure_stage
 from .. import constants as feeds_constants
 from ..services.feed_parsing import FeedData
 from .feed_article import FeedArticle
 from .feed_deleted_article import FeedDeletedArticle
+from .feed_hub_subscription import FeedHubSubscription
 from .feed_tag import FeedTag
-from .feed_update import FeedUpdate, FeedUpdateQuerySet
+from .feed_update import FeedUpdate
 
 if TYPE_CHECKING:
     from django_stubs_ext.db.models import TypedModelMeta
@@ -48,107 +54,79 @@ if TYPE_CHECKING:
 else:
     TypedModelMeta = object
 
+# Notes: cron will run each hour. Since it will take time to complete, we use 45m instead of 1h.
+_HOURLY_REFRESH_DELAY = timedelta(minutes=45)
 
-def _build_refresh_filters(  # noqa: C901, PLR0911, PLR0912 too complex
-    tzinfo: ZoneInfo, refresh_delay: feeds_constants.FeedRefreshDelays
-) -> models.When:
-    now = datetime.now(tzinfo)
-    last_day_of_month = calendar.monthrange(now.year, now.month)[1]
-    base_filters = models.Q(refresh_delay=refresh_delay)
 
-    # Notes: cron will run each hour. Since it will take time to complete, we use 45m instead
-    # in 1h in our conditions.
+def _get_next_refresh_at(  # noqa: C901, PLR0911, PLR0912 too complex
+    tzinfo: ZoneInfo, refresh_delay: feeds_constants.FeedRefreshDelays, now: datetime
+) -> datetime:
     match refresh_delay:
         case feeds_constants.FeedRefreshDelays.HOURLY:
-            return models.When(
-                base_filters
-                & models.Q(latest_feed_update__created_at__lte=now - timedelta(minutes=45)),
-                then=True,
-            )
+            return now + _HOURLY_REFRESH_DELAY
         case feeds_constants.FeedRefreshDelays.BIHOURLY:
-            return models.When(
-                base_filters
-                & models.Q(
-                    latest_feed_update__created_at__lte=now - timedelta(hours=1, minutes=45)
-                ),
-                then=True,
-            )
+            return now + timedelta(hours=1) + _HOURLY_REFRESH_DELAY
         case feeds_constants.FeedRefreshDelays.EVERY_MORNING:
-            if 8 <= now.hour <= 10:  # noqa: PLR2004 Magic value used in comparison
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, hour=8)
         case feeds_constants.FeedRefreshDelays.DAILY_AT_NOON:
-            if 12 <= now.hour <= 14:  # noqa: PLR2004 Magic value used in comparison
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, hour=12)
         case feeds_constants.FeedRefreshDelays.EVERY_EVENING:
-            if 20 <= now.hour <= 22:  # noqa: PLR2004 Magic value used in comparison
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, hour=20)
         case feeds_constants.FeedRefreshDelays.ON_MONDAYS:
-            if now.weekday() == calendar.MONDAY:
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, weekdays={calendar.MONDAY})
         case feeds_constants.FeedRefreshDelays.ON_THURSDAYS:
-            if now.weekday() == calendar.THURSDAY:
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, weekdays={calendar.THURSDAY})
         case feeds_constants.FeedRefreshDelays.ON_SATURDAYS:
-            if now.weekday() == calendar.SATURDAY:
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, weekdays={calendar.SATURDAY})
         case feeds_constants.FeedRefreshDelays.ON_SUNDAYS:
-            if now.weekday() == calendar.SUNDAY:
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, weekdays={calendar.SUNDAY})
         case feeds_constants.FeedRefreshDelays.TWICE_A_WEEK:
-            if now.weekday() in {calendar.MONDAY, calendar.THURSDAY}:
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, weekdays={calendar.MONDAY, calendar.THURSDAY})
         case feeds_constants.FeedRefreshDelays.FIRST_DAY_OF_THE_MONTH:
-            if now.day == 1:
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, days_of_month={1})
         case feeds_constants.FeedRefreshDelays.MIDDLE_OF_THE_MONTH:
-            if now.day == 15:  # noqa: PLR2004 Magic value used in comparison
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, days_of_month={15})
         case feeds_constants.FeedRefreshDelays.END_OF_THE_MONTH:
-            if now.day == last_day_of_month:
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, days_of_month={-1})
         case feeds_constants.FeedRefreshDelays.THRICE_A_MONTH:
-            if now.day in {1, 15, last_day_of_month}:
-                return models.When(
-                    base_filters & ~models.Q(latest_feed_update__created_at__day=now.day), then=True
-                )
-            return models.When(base_filters, then=False)
+            return _get_next_day_at(tzinfo, now, days_of_month={1, 15, -1})
+        case feeds_constants.FeedRefreshDelays.ADAPTIVE:
+            raise ValueError("Adaptive refresh delays depend on the feed history")
         case _:
             assert_never(refresh_delay)
 
 
+def _get_next_day_at(
+    tzinfo: ZoneInfo,
+    now: datetime,
+    *,
+    hour: int = 0,
+    weekdays: set[int] | None = None,
+    days_of_month: set[int] | None = None,
+) -> datetime:
+    """Find the first day strictly after now matching the constraints at the given hour.
+
+    -1 in days_of_month means the last day of the month. Everything is computed in the timezone of
+    the user so morning feeds are refreshed in their morning.
+    """
+    local_now = now.astimezone(tzinfo)
+    day = local_now.date()
+    while True:
+        candidate = datetime.combine(day, time(hour=hour), tzinfo=tzinfo)
+        last_day_of_month = calendar.monthrange(day.year, day.month)[1]
+        matches_weekday = weekdays is None or day.weekday() in weekdays
+        matches_day_of_month = days_of_month is None or bool(
+            {day.day, day.day - last_day_of_month - 1} & days_of_month
+        )
+        if candidate > local_now and matches_weekday and matches_day_of_month:
+            return candidate
+        day += timedelta(days=1)
+
+
+def _is_user_away(user: User) -> bool:
+    return utcnow() - user.last_activity_at > feeds_constants.AWAY_USER_DELAY
+
+
 class FeedQuerySet(models.QuerySet["Feed"]):
     def create(self, **kwargs):
         kwargs.setdefault("slug", slugify(kwargs["title"]))
@@ -160,33 +138,30 @@ class FeedQuerySet(models.QuerySet["Feed"]):
     def only_enabled(self):
         return self.filter(enabled=True)
 
-    def for_update(self, user: User):
-        return (
-            self.alias(
-                # We need to filter for update only on the latest FeedUpdate object. If we have
-                # entries that are too old, we don't want to include them or the feed will be
-                # refreshed even if according to its rules it should not: by default, we do a left
-                # join of FeedUpdate thus getting on the whole history. We only want to run our test
-                # on the latest entry to check whether it's too old and thus must be updated or not.
-                latest_feed_update=models.FilteredRelation(
-                    "feed_updates",
-                    condition=models.Q(
-                        feed_updates__id__in=models.Subquery(
-                            FeedUpdate.objects.get_queryset().only_latest()
-                        )
-                    ),
-                ),
-                must_update=models.Case(
-                    *[
-                        _build_refresh_filters(user.tzinfo, refresh_delay)
-                        for refresh_delay in feeds_constants.FeedRefreshDelays
-                    ],
-                    default=False,
-                    output_field=models.BooleanField(),
-                ),
+    def for_update(self, due_at: datetime | None = None):
+        # We filter on disabled_at and not on enabled to match the condition of the partial index.
+        # Feeds with an active WebSub lease are updated by their hub: we don't need to poll them.
+        return self.filter(
+            models.Q(next_refresh_at__isnull=True)
+            | models.Q(next_refresh_at__lte=due_at or utcnow()),
+            disabled_at__isnull=True,
+        ).exclude(
+            models.Exists(
+                FeedHubSubscription.objects.get_queryset()
+                .with_active_lease()
+                .filter(feed_url=models.OuterRef("feed_url"))
             )
-            .only_enabled()
-            .filter(must_update=True)
+        )
+
+    def waiting_for_adaptive_refresh(self):
+        """Feeds with an adaptive refresh delay that are not due but would be with an hourly one."""
+        now = utcnow()
+        return self.filter(
+            models.Q(latest_feed_update__isnull=True)
+            | models.Q(latest_feed_update__created_at__lte=now - _HOURLY_REFRESH_DELAY),
+            refresh_delay=feeds_constants.FeedRefreshDelays.ADAPTIVE,
+            next_refresh_at__gt=now,
+            disabled_at__isnull=True,
         )
 
     def for_user(self, user: User):
@@ -225,21 +200,113 @@ class FeedManager(models.Manager["Feed"]):
 
         return feeds_by_categories
 
+    @transaction.atomic()
+    def claim_for_update(self, batch_size: int, lease: timedelta) -> list[Feed]:
+        """Claim due feeds so no other worker updates them at the same time.
+
+        Feeds locked by other workers are skipped. Claimed feeds are not due for the lease duration:
+        updating them will schedule their next refresh. If the worker dies before, they will be
+        claimed again once the lease expires.
+
+        Due feeds sharing their URL with a claimed feed are claimed with it, even if it makes the
+        batch bigger than batch_size: this way, each URL is fetched once for all its feeds.
+        """
+        due_feeds_qs = (
+            self.get_queryset()
+            .for_update()
+            .select_related("user", "user__settings", "user__settings__timezone", "category")
+            .select_for_update(skip_locked=True, of=("self",))
+        )
+        feeds = list(
+            due_feeds_qs.order_by(models.F("next_refresh_at").asc(nulls_first=True), "id")[
+                :batch_size
+            ]
+        )
+        if feeds:
+            feeds.extend(
+                due_feeds_qs.filter(feed_url__in={feed.feed_url for feed in feeds})
+                .exclude(id__in=[feed.id for feed in feeds])
+                .order_by("id")
+            )
+        self.get_queryset().only_with_ids([feed.id for feed in feeds]).update(
+            next_refresh_at=utcnow() + lease
+        )
+
+        return feeds
+
+    def request_refresh(self, user: User) -> int:
+        """Make the feeds of the user due as soon as possible when they open a reading list.
+
+        If the user was away, their feeds were refreshed less often: the ones that would be due
+        later because of this are made due, so the next run of update_feeds refreshes them. If we
+        update feeds with feed_worker, we also move the due feeds of the user to the front of the
+        queue: feeds without a next refresh date are claimed first.
+        """
+        if _is_user_away(user):
+            feeds_qs = self.get_queryset().for_update(
+                utcnow() + feeds_constants.AWAY_USER_MIN_REFRESH_DELAY
+            )
+        elif settings.FEED_REFRESH_ON_READING_LIST_VIEW:
+            feeds_qs = self.get_queryset().for_update()
+        else:
+            return 0
+
+        return (
+            feeds_qs.for_user(user)
+            .filter(next_refresh_at__isnull=False)
+            .update(next_refresh_at=None)
+        )
+
+    def get_adaptive_refresh_delay(self, feed: Feed) -> timedelta:
+        """Compute how long to wait before refreshing the feed based on its history.
+
+        We use the median delay between the publication of its latest articles (or the date we found
+        them if they don't have a publication date). We then double it for each time in a row the
+        feed was not modified.
+        """
+        publication_dates = list(
+            FeedArticle.objects.filter(feed=feed)
+            .annotate(publication_date=Coalesce("article__published_at", "created_at"))
+            .order_by("-publication_date")
+            .values_list("publication_date", flat=True)[
+                : feeds_constants.ADAPTIVE_REFRESH_NB_ARTICLES
+            ]
+        )
+        if len(publication_dates) < 2:  # noqa: PLR2004 Magic value used in comparison
+            delay = feeds_constants.ADAPTIVE_REFRESH_DEFAULT_DELAY
+        else:
+            delay = median(newer - older for newer, older in pairwise(publication_dates))
+
+        latest_statuses = (
+            FeedUpdate.objects.get_queryset()
+            .for_feed(feed)
+            .order_by("-created_at")
+            .values_list("status", flat=True)[: feeds_constants.ADAPTIVE_REFRESH_MAX_BACKOFF]
+        )
+        nb_not_modified = len(
+            list(
+                takewhile(
+                    lambda status: status == feeds_constants.FeedUpdateStatus.NOT_MODIFIED,
+                    latest_statuses,
+                )
+            )
+        )
+        delay *= 2**nb_not_modified
+
+        return max(
+            feeds_constants.ADAPTIVE_REFRESH_MIN_DELAY,
+            min(delay, feeds_constants.ADAPTIVE_REFRESH_MAX_DELAY),
+        )
+
     def get_articles(self, feed: Feed) -> ArticleQuerySet:
         return cast(ArticleQuerySet, feed.articles.all()).for_feed()
 
-    def get_feed_update_for_cleanup(self) -> FeedUpdateQuerySet:
-        latest_feed_update_ids = (
+    def cleanup_feed_updates(self) -> tuple[list[str], int]:
+        return FeedUpdate.objects.cleanup(
             self.get_queryset()
-            .alias(
-                alias_feed_update_ids=ArrayAgg(
-                    "feed_updates__id", ordering="-feed_updates__created_at"
-                ),
-            )
-            .annotate(annot_latest_feed_update_id=models.F("alias_feed_update_ids__0"))
-            .values_list("annot_latest_feed_update_id", flat=True)
+            .filter(latest_feed_update__isnull=False)
+            .values("latest_feed_update_id")
         )
-        return FeedUpdate.objects.get_queryset().for_cleanup(set(latest_feed_update_ids))
 
     @transaction.atomic()
     def create_from_metadata(  # noqa: PLR0913 too many arguments
@@ -265,6 +332,7 @@ class FeedManager(models.Manager["Feed"]):
                 "description": feed_metadata.description,
                 "feed_type": feed_metadata.feed_type,
                 "category": category,
+                "entry_fingerprints": feed_metadata.entry_fingerprints,
             },
         )
 
@@ -278,9 +346,84 @@ class FeedManager(models.Manager["Feed"]):
 
         return feed, created
 
-    @transaction.atomic()
     def update_feed(self, feed: Feed, feed_metadata: FeedData):
-        deleted_feed_links = FeedDeletedArticle.objects.list_deleted_for_feed(feed)
+        failures = self.update_feeds([(feed, feed_metadata)])
+        if failures:
+            _, error = failures[0]
+            raise error
+
+    @transaction.atomic()
+    def update_feeds(
+        self,
+        updated_feeds: list[tuple[Feed, FeedData]],
+        *,
+        stage_timings_by_feed_id: Mapping[int, StageTimings] | None = None,
+    ) -> list[tuple[Feed, Exception]]:
+        """Save the results of many feed updates in one transaction.
+
+        Articles of each feed are saved in their own savepoint: if we fail to save them, the other
+        feeds are still updated and the failure is returned so the caller can log it. Feed updates
+        and the links between feeds and articles are inserted with one query for the whole batch.
+
+        The time spent saving articles is added to the timings of each feed (if supplied) and all
+        its timings are saved in the debug data of its update.
+        """
+        failures: list[tuple[Feed, Exception]] = []
+        saved_feeds: list[tuple[Feed, FeedData]] = []
+        feed_updates: list[FeedUpdate] = []
+        feed_articles: list[FeedArticle] = []
+        for feed, feed_metadata in updated_feeds:
+            stage_timings = (stage_timings_by_feed_id or {}).get(feed.id) or StageTimings()
+            try:
+                with (
+                    transaction.atomic(),
+                    stage_timings.activate(),
+                    measure_stage(feeds_constants.FeedUpdateStage.SAVE_ARTICLES),
+                ):
+                    deleted_feed_links, created_articles = self._save_feed_articles(
+                        feed, feed_metadata
+                    )
+            except Exception as e:  # noqa: BLE001 the caller is responsible for logging it.
+                failures.append((feed, e))
+                continue
+
+            saved_feeds.append((feed, feed_metadata))
+            feed_updates.append(
+                FeedUpdate(
+                    status=feeds_constants.FeedUpdateStatus.SUCCESS,
+                    ignored_article_links=list(deleted_feed_links),
+                    feed_etag=feed_metadata.etag,
+                    feed_last_modified=feed_metadata.last_modified,
+                    content_hash=feed_metadata.content_hash,
+                    technical_debug_data={"stage_durations": stage_timings.as_dict()},
+                    feed=feed,
+                )
+            )
+            feed_articles.extend(
+                FeedArticle(article=article, feed=feed) for article in created_articles
+            )
+
+        FeedUpdate.objects.bulk_create(feed_updates)
+        FeedArticle.objects.bulk_create(feed_articles, ignore_conflicts=True)
+        # The adaptive refresh delay depends on the latest updates: we must schedule the next
+        # refresh after having saved them.
+        for (feed, feed_metadata), feed_update in zip(saved_feeds, feed_updates, strict=True):
+            feed.entry_fingerprints = feed_metadata.entry_fingerprints
+            feed.latest_feed_update = feed_update
+            feed.schedule_next_refresh()
+        self.bulk_update(
+            [feed for feed, _ in saved_feeds],
+            ["entry_fingerprints", "latest_feed_update", "next_refresh_at"],
+        )
+
+        return failures
+
+    def _save_feed_articles(
+        self, feed: Feed, feed_metadata: FeedData
+    ) -> tuple[set[str], list[Article]]:
+        deleted_feed_links = FeedDeletedArticle.objects.list_deleted_for_feed(
+            feed, (article.link for article in feed_metadata.articles)
+        )
         articles = [
             article for article in feed_metadata.articles if article.link not in deleted_feed_links
         ]
@@ -290,26 +433,19 @@ class FeedManager(models.Manager["Feed"]):
             feed.tags.all(),
             source_type=reading_constants.ArticleSourceType.FEED,
         )
-        FeedUpdate.objects.create(
-            status=feeds_constants.FeedUpdateStatus.SUCCESS,
-            ignored_article_links=list(deleted_feed_links),
-            feed_etag=feed_metadata.etag,
-            feed_last_modified=feed_metadata.last_modified,
-            feed=feed,
-        )
-        FeedArticle.objects.bulk_create(
-            [FeedArticle(article=article, feed=feed) for article in created_articles],
-            ignore_conflicts=True,
-        )
+
+        return deleted_feed_links, created_articles
 
     @transaction.atomic()
     def log_error(self, feed: Feed, error_message: str, technical_debug_data: dict | None = None):
-        FeedUpdate.objects.create(
+        feed.latest_feed_update = FeedUpdate.objects.create(
             status=feeds_constants.FeedUpdateStatus.FAILURE,
             error_message=error_message,
             feed=feed,
             technical_debug_data=technical_debug_data,
         )
+        feed.schedule_next_refresh()
+        feed.save(update_fields=["latest_feed_update", "next_refresh_at"])
         if FeedUpdate.objects.must_disable_feed(feed):
             message = _("We failed too many times to fetch the feed")
             feed.disable(message)
@@ -322,11 +458,19 @@ class FeedManager(models.Manager["Feed"]):
                 link_text=str(_("Edit feed")),
             )
 
+    @transaction.atomic()
     def log_not_modified(self, feed: Feed):
-        FeedUpdate.objects.create(
+        feed.latest_feed_update = FeedUpdate.objects.create(
             status=feeds_constants.FeedUpdateStatus.NOT_MODIFIED,
             feed=feed,
         )
+        feed.schedule_next_refresh()
+        feed.save(update_fields=["latest_feed_update", "next_refresh_at"])
+
+    def postpone_refresh(self, feeds: list[Feed], refresh_at: datetime):
+        self.get_queryset().only_with_ids([feed.id for feed in feeds]).update(
+            next_refresh_at=refresh_at
+        )
 
     async def export(self, user: User) -> list[dict[str, Any]]:
         feeds = []
@@ -386,6 +530,21 @@ class Feed(models.Model):
         ),
     )
     open_original_link_by_default = models.BooleanField(default=False)
+    next_refresh_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_(
+            "When the feed must be refreshed next. Feeds without a date are refreshed ASAP."
+        ),
+    )
+    entry_fingerprints = models.JSONField(
+        blank=True,
+        default=dict,
+        help_text=_(
+            "Hash of the raw data of each entry of the feed indexed by entry id or link. Used to "
+            "skip entries that didn't change since the last update."
+        ),
+    )
 
     user = models.ForeignKey("users.User", related_name="feeds", on_delete=models.CASCADE)
     category = models.ForeignKey(
@@ -400,6 +559,16 @@ class Feed(models.Model):
         related_name="feeds",
         through="feeds.FeedArticle",
     )
+    # Feed updates are partitioned: we can't have a foreign key constraint to them. We keep the
+    # latest update of each feed when dropping old partitions, so this is never dangling.
+    latest_feed_update = models.ForeignKey(
+        "feeds.FeedUpdate",
+        related_name="+",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+    )
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -434,6 +603,13 @@ class Feed(models.Model):
                 | models.Q(enabled=False),
             ),
         ]
+        indexes = [
+            models.Index(
+                fields=["next_refresh_at"],
+                name="%(app_label)s_%(class)s_next_refresh",
+                condition=models.Q(disabled_at__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         category_title = self.category.title if self.category else "None"
@@ -448,3 +624,16 @@ class Feed(models.Model):
         self.disabled_reason = ""
         self.disabled_at = None
         self.enabled = True
+
+    def schedule_next_refresh(self):
+        refresh_delay = feeds_constants.FeedRefreshDelays(self.refresh_delay)
+        if refresh_delay == feeds_constants.FeedRefreshDelays.ADAPTIVE:
+            self.next_refresh_at = utcnow() + Feed.objects.get_adaptive_refresh_delay(self)
+        else:
+            self.next_refresh_at = _get_next_refresh_at(self.user.tzinfo, refresh_delay, utcnow())
+
+        if _is_user_away(self.user):
+            # Nobody reads these articles for now: let's spend our time on other feeds.
+            self.next_refresh_at = max(
+                self.next_refresh_at, utcnow() + feeds_constants.AWAY_USER_MIN_REFRESH_DELAY
+            )
@@ -16,11 +16,10 @@
 
 from __future__ import annotations
 
+from collections.abc import Iterable
 from typing import TYPE_CHECKING
 
-from django.contrib.postgres.aggregates import ArrayAgg
 from django.db import models
-from django.db.models.functions import Coalesce
 
 from legadilo.reading.models import Article
 
@@ -33,13 +32,21 @@ class FeedDeletedArticleQuerySet(models.QuerySet["FeedDeletedArticle"]):
 
 
 class FeedDeletedArticleManager(models.Manager["FeedDeletedArticle"]):
-    def list_deleted_for_feed(self, feed: Feed) -> set[str]:
-        deleted_links = (
+    def list_deleted_for_feed(self, feed: Feed, article_links: Iterable[str]) -> set[str]:
+        """Find which of these article links were deleted from the feed.
+
+        We only look for the links of the feed we are updating, not all the links ever deleted from
+        the feed which can be a lot for old feeds.
+        """
+        links = set(article_links)
+        if not links:
+            return set()
+
+        return set(
             self.get_queryset()
-            .filter(feed=feed)
-            .aggregate(deleted=Coalesce(ArrayAgg("article_link"), []))
+            .filter(feed=feed, article_link__in=links)
+            .values_list("article_link", flat=True)
         )
-        return set(deleted_links["deleted"])
 
     def delete_article(self, article: Article):
         feed_deleted_articles = []
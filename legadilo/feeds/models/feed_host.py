@@ -0,0 +1,118 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from django.db import models, transaction
+from django.utils.translation import gettext_lazy as _
+
+from ...utils.time_utils import utcnow
+from .. import constants
+
+if TYPE_CHECKING:
+    from django_stubs_ext.db.models import TypedModelMeta
+else:
+    TypedModelMeta = object
+
+
+class FeedHostQuerySet(models.QuerySet["FeedHost"]):
+    def for_hosts(self, hosts: Iterable[str]):
+        return self.filter(host__in=hosts)
+
+    def only_unhealthy(self):
+        return self.filter(nb_consecutive_failures__gt=0)
+
+
+class FeedHostManager(models.Manager["FeedHost"]):
+    _hints: dict
+
+    def get_queryset(self) -> FeedHostQuerySet:
+        return FeedHostQuerySet(model=self.model, using=self._db, hints=self._hints)
+
+    async def get_unhealthy_by_host(self, hosts: Iterable[str]) -> dict[str, FeedHost]:
+        return {
+            feed_host.host: feed_host
+            async for feed_host in self.get_queryset().for_hosts(hosts).only_unhealthy()
+        }
+
+    @transaction.atomic()
+    def log_failure(self, host: str, *, retry_after: timedelta | None = None) -> FeedHost:
+        """Record a failure to reach the host and open the circuit if needed.
+
+        The circuit opens after too many consecutive failures or when the host asked us to come
+        back later with Retry-After.
+        """
+        feed_host, _ = self.get_queryset().select_for_update().get_or_create(host=host)
+        feed_host.nb_consecutive_failures += 1
+        feed_host.last_failure_at = utcnow()
+
+        cooldown = timedelta(0)
+        if feed_host.nb_consecutive_failures >= constants.FEED_HOST_FAILURE_THRESHOLD:
+            nb_extra_failures = (
+                feed_host.nb_consecutive_failures - constants.FEED_HOST_FAILURE_THRESHOLD
+            )
+            # Prevent the exponent from growing too much, we will hit the max cooldown anyway.
+            cooldown = constants.FEED_HOST_COOLDOWN * 2 ** min(nb_extra_failures, 16)
+        if retry_after is not None:
+            cooldown = max(cooldown, retry_after)
+        cooldown = min(cooldown, constants.FEED_HOST_MAX_COOLDOWN)
+        if cooldown > timedelta(0):
+            feed_host.blocked_until = feed_host.last_failure_at + cooldown
+
+        feed_host.save()
+
+        return feed_host
+
+    def log_success(self, host: str):
+        self.get_queryset().filter(host=host).update(
+            nb_consecutive_failures=0, blocked_until=None, updated_at=utcnow()
+        )
+
+
+class FeedHost(models.Model):
+    host = models.CharField(max_length=255, unique=True)
+    nb_consecutive_failures = models.PositiveIntegerField(default=0)
+    last_failure_at = models.DateTimeField(null=True, blank=True)
+    blocked_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("Feeds from this host won't be fetched before this date."),
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FeedHostManager()
+
+    class Meta(TypedModelMeta):
+        db_table_comment = (
+            "Track the health of the hosts serving feeds to stop fetching feeds from hosts that "
+            "are down for a while."
+        )
+
+    def __str__(self):
+        return (
+            f"FeedHost(host={self.host}, nb_consecutive_failures={self.nb_consecutive_failures}, "
+            f"blocked_until={self.blocked_until})"
+        )
+
+    @property
+    def is_blocked(self) -> bool:
+        return self.blocked_until is not None and self.blocked_until > utcnow()
@@ -0,0 +1,141 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import uuid
+from datetime import timedelta
+from typing import TYPE_CHECKING
+
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from ...utils.time_utils import utcnow
+from .. import constants
+
+if TYPE_CHECKING:
+    from django_stubs_ext.db.models import TypedModelMeta
+else:
+    TypedModelMeta = object
+
+
+# Algorithms hubs can use to sign the content they distribute.
+SIGNATURE_ALGORITHMS = frozenset({"sha1", "sha256", "sha384", "sha512"})
+
+
+def _generate_secret() -> str:
+    return secrets.token_hex(32)
+
+
+class FeedHubSubscriptionQuerySet(models.QuerySet["FeedHubSubscription"]):
+    def with_active_lease(self):
+        """Subscriptions the hub verified and that we don't need to renew yet."""
+        return self.filter(lease_expires_at__gt=utcnow() + constants.WEBSUB_LEASE_RENEWAL_DELAY)
+
+
+class FeedHubSubscriptionManager(models.Manager["FeedHubSubscription"]):
+    _hints: dict
+
+    def get_queryset(self) -> FeedHubSubscriptionQuerySet:
+        return FeedHubSubscriptionQuerySet(model=self.model, using=self._db, hints=self._hints)
+
+    def prepare_subscription(
+        self, feed_url: str, *, hub_url: str, topic_url: str
+    ) -> FeedHubSubscription | None:
+        """Get the subscription to request to the hub or None if we don't need to subscribe."""
+        subscription, created = self.get_or_create(
+            feed_url=feed_url, defaults={"hub_url": hub_url, "topic_url": topic_url}
+        )
+        if not created and not subscription.must_subscribe(hub_url=hub_url, topic_url=topic_url):
+            return None
+
+        subscription.hub_url = hub_url
+        subscription.topic_url = topic_url
+        subscription.subscription_requested_at = utcnow()
+        subscription.save()
+
+        return subscription
+
+
+class FeedHubSubscription(models.Model):
+    feed_url = models.URLField(max_length=1_024, unique=True)
+    topic_url = models.URLField(max_length=1_024)
+    hub_url = models.URLField(max_length=1_024)
+    token = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        help_text=_("Identify the subscription in the callback URL."),
+    )
+    secret = models.CharField(
+        max_length=64,
+        default=_generate_secret,
+        help_text=_("Shared with the hub to sign the content it sends us."),
+    )
+    subscription_requested_at = models.DateTimeField(null=True, blank=True)
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("Feeds with an active lease are updated by the hub and are not polled."),
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FeedHubSubscriptionManager()
+
+    class Meta(TypedModelMeta):
+        db_table_comment = "WebSub subscriptions to the hubs feeds advertise."
+
+    def __str__(self):
+        return (
+            f"FeedHubSubscription(feed_url={self.feed_url}, hub_url={self.hub_url}, "
+            f"lease_expires_at={self.lease_expires_at})"
+        )
+
+    def must_subscribe(self, *, hub_url: str, topic_url: str) -> bool:
+        if self.hub_url != hub_url or self.topic_url != topic_url:
+            return True
+
+        now = utcnow()
+        if (
+            self.lease_expires_at is not None
+            and self.lease_expires_at > now + constants.WEBSUB_LEASE_RENEWAL_DELAY
+        ):
+            return False
+
+        # Give the hub some time to verify our intent before asking again.
+        return (
+            self.subscription_requested_at is None
+            or self.subscription_requested_at < now - constants.WEBSUB_PENDING_SUBSCRIPTION_DELAY
+        )
+
+    def confirm(self, lease_seconds: int | None):
+        if lease_seconds is None:
+            lease_seconds = int(constants.WEBSUB_LEASE_DURATION.total_seconds())
+        self.lease_expires_at = utcnow() + timedelta(seconds=lease_seconds)
+
+    def is_signature_valid(self, content: bytes, signature: str) -> bool:
+        algorithm, _, hex_digest = signature.partition("=")
+        if algorithm not in SIGNATURE_ALGORITHMS or not hex_digest:
+            return False
+
+        expected_digest = hmac.new(
+            self.secret.encode(), content, getattr(hashlib, algorithm)
+        ).hexdigest()
+        return hmac.compare_digest(expected_digest, hex_digest)
@@ -58,6 +58,11 @@ class FeedTagManager(models.Manager["FeedTag"]):
     ):
         if clear_existing:
             feed.feed_tags.all().delete()
+        if clear_existing and feed.entry_fingerprints:
+            # Unchanged entries are skipped during updates. Forget them so their articles get the
+            # new tags.
+            feed.entry_fingerprints = {}
+            feed.save(update_fields=["entry_fingerprints"])
         self.associate_feed_with_tags(
             feed, Tag.objects.get_or_create_from_list(feed.user, tag_slugs)
         )
@@ -16,10 +16,13 @@
 
 from __future__ import annotations
 
+import re
+from collections.abc import Iterable
+from datetime import UTC, datetime
 from typing import TYPE_CHECKING, assert_never
 
 from dateutil.relativedelta import relativedelta
-from django.db import models
+from django.db import connections, models, transaction
 
 from ...utils.time_utils import utcnow
 from ...utils.validators import list_of_strings_validator
@@ -32,6 +35,12 @@ if TYPE_CHECKING:
 else:
     TypedModelMeta = object
 
+_PARTITION_NAME_PATTERN = re.compile(r"_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def _get_month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1, tzinfo=UTC)
+
 
 class FeedUpdateQuerySet(models.QuerySet["FeedUpdate"]):
     def for_feed(self, feed: Feed):
@@ -43,10 +52,8 @@ class FeedUpdateQuerySet(models.QuerySet["FeedUpdate"]):
     def only_latest(self):
         return self.values("id").order_by("feed_id", "-created_at").distinct("feed_id")
 
-    def for_cleanup(self, latest_feed_update_ids: set[int | None]):
-        return self.filter(
-            created_at__lt=utcnow() - relativedelta(days=constants.KEEP_FEED_UPDATES_FOR)
-        ).exclude(id__in=latest_feed_update_ids)
+    def for_cleanup(self, latest_feed_update_ids: models.QuerySet, before: datetime):
+        return self.filter(created_at__lt=before).exclude(id__in=latest_feed_update_ids)
 
 
 class FeedUpdateManager(models.Manager["FeedUpdate"]):
@@ -58,6 +65,135 @@ class FeedUpdateManager(models.Manager["FeedUpdate"]):
     async def get_latest_success_for_feed(self, feed: Feed):
         return await self.get_queryset().for_feed(feed).only_success().afirst()
 
+    async def get_latest_success_for_feeds(self, feed_ids: Iterable[int]) -> dict[int, FeedUpdate]:
+        """Load the latest successful update of each feed in one query."""
+        qs = (
+            self.get_queryset()
+            .filter(feed_id__in=feed_ids)
+            .only_success()
+            .only("id", "feed_id", "feed_etag", "feed_last_modified", "content_hash", "created_at")
+            .order_by("feed_id", "-created_at")
+            .distinct("feed_id")
+        )
+        return {feed_update.feed_id: feed_update async for feed_update in qs}
+
+    def create_partitions(self) -> list[str]:
+        """Create the monthly partitions for this month and the next ones if needed.
+
+        Updates created while their partition didn't exist are stored in the default partition. We
+        move them to their partition when we create it.
+        """
+        current_month = _get_month_start(utcnow())
+        existing_partitions = self._get_partitions()
+        created_partitions = []
+        for nb_months in range(constants.FEED_UPDATE_NB_PARTITIONS_AHEAD + 1):
+            month = current_month + relativedelta(months=nb_months)
+            partition_name = self._get_partition_name(month)
+            if partition_name in existing_partitions:
+                continue
+
+            if self._create_partition(partition_name, month):
+                created_partitions.append(partition_name)
+
+        return created_partitions
+
+    def cleanup(self, latest_feed_update_ids: models.QuerySet) -> tuple[list[str], int]:
+        """Drop the partitions only containing updates older than KEEP_FEED_UPDATES_FOR.
+
+        The latest update of each feed (selected by latest_feed_update_ids) is kept: it's moved to
+        the default partition before its partition is dropped. Old updates in the default partition
+        that are not the latest of their feed anymore are then deleted. Other partitions are not
+        affected by this delete.
+        """
+        cutoff = utcnow() - relativedelta(days=constants.KEEP_FEED_UPDATES_FOR)
+        keep_sql, keep_params = latest_feed_update_ids.query.sql_with_params()
+        dropped_partitions = []
+        for partition_name, month in self._get_partitions().items():
+            if month + relativedelta(months=1) > cutoff:
+                continue
+
+            with transaction.atomic(using=self.db), connections[self.db].cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {self._table_name} DETACH PARTITION {partition_name}")
+                cursor.execute(
+                    f"INSERT INTO {self._table_name} SELECT * FROM {partition_name} "  # noqa: S608 not user input
+                    f"WHERE id IN ({keep_sql})",
+                    keep_params,
+                )
+                cursor.execute(f"DROP TABLE {partition_name}")
+            dropped_partitions.append(partition_name)
+
+        oldest_partition_start = min(self._get_partitions().values(), default=cutoff)
+        nb_deleted, _ = (
+            self.get_queryset()
+            .for_cleanup(latest_feed_update_ids, before=min(cutoff, oldest_partition_start))
+            .delete()
+        )
+
+        return dropped_partitions, nb_deleted
+
+    @property
+    def _table_name(self) -> str:
+        return self.model._meta.db_table
+
+    def _get_partition_name(self, month: datetime) -> str:
+        return f"{self._table_name}_p{month.year:04d}_{month.month:02d}"
+
+    def _get_partitions(self) -> dict[str, datetime]:
+        """List the monthly partitions with the first day of their month, oldest first."""
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+                "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+                "WHERE parent.relname = %s ORDER BY child.relname",
+                [self._table_name],
+            )
+            partition_names = [row[0] for row in cursor.fetchall()]
+
+        partitions = {}
+        for partition_name in partition_names:
+            if match := _PARTITION_NAME_PATTERN.search(partition_name):
+                partitions[partition_name] = datetime(
+                    int(match.group("year")), int(match.group("month")), 1, tzinfo=UTC
+                )
+
+        return partitions
+
+    def _create_partition(self, partition_name: str, month: datetime) -> bool:
+        """Create the partition unless another process created it in the meantime.
+
+        Creating the partition directly would fail if the default partition contains updates for
+        this month. So we create a standalone table, move these updates in it and attach it.
+        update_feeds, feed_worker and clean_data can all create partitions at the same time: we
+        serialize the creations with an advisory lock and check the partition doesn't exist once we
+        hold it.
+        """
+        next_month = month + relativedelta(months=1)
+        with transaction.atomic(using=self.db), connections[self.db].cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [self._table_name])
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [partition_name])
+            if cursor.fetchone()[0]:
+                return False
+
+            cursor.execute(
+                f"CREATE TABLE {partition_name} "
+                f"(LIKE {self._table_name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            )
+            cursor.execute(
+                f"WITH moved_feed_updates AS ("  # noqa: S608 not user input
+                f"DELETE FROM {self._table_name}_default "
+                f"WHERE created_at >= %s AND created_at < %s RETURNING *"
+                f") INSERT INTO {partition_name} SELECT * FROM moved_feed_updates",
+                [month, next_month],
+            )
+            cursor.execute(
+                f"ALTER TABLE {self._table_name} ATTACH PARTITION {partition_name} "
+                f"FOR VALUES FROM (%s) TO (%s)",
+                [month, next_month],
+            )
+
+        return True
+
     def must_disable_feed(
         self,
         feed: Feed,
@@ -99,6 +235,7 @@ class FeedUpdateManager(models.Manager["FeedUpdate"]):
                 | constants.FeedRefreshDelays.ON_SATURDAYS
                 | constants.FeedRefreshDelays.ON_SUNDAYS
                 | constants.FeedRefreshDelays.TWICE_A_WEEK
+                | constants.FeedRefreshDelays.ADAPTIVE
             ):
                 return relativedelta(months=2)
             case (
@@ -113,6 +250,12 @@ class FeedUpdateManager(models.Manager["FeedUpdate"]):
 
 
 class FeedUpdate(models.Model):
+    """Result of an update of a feed.
+
+    The table is partitioned by month on created_at (see migration 0017): old updates are removed
+    by dropping their partition. The primary key of the table is (id, created_at).
+    """
+
     status = models.CharField(choices=constants.FeedUpdateStatus.choices, max_length=100)
     ignored_article_links = models.JSONField(
         validators=[list_of_strings_validator], blank=True, default=list
@@ -121,6 +264,7 @@ class FeedUpdate(models.Model):
     technical_debug_data = models.JSONField(blank=True, null=True)
     feed_etag = models.CharField(max_length=100)
     feed_last_modified = models.DateTimeField(null=True, blank=True)
+    content_hash = models.CharField(max_length=64, blank=True, default="")
 
     feed = models.ForeignKey("feeds.Feed", on_delete=models.CASCADE, related_name="feed_updates")
 
@@ -14,20 +14,34 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+import hashlib
+import io
+import json
 import logging
+import multiprocessing
 import re
-import sys
 import time
+from collections.abc import Iterable, Iterator, Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import UTC, datetime
 from html import unescape
-from itertools import chain
-from typing import Annotated
+from itertools import chain, islice
+from typing import IO, Annotated
 from urllib.parse import parse_qs, urlparse
+from xml.sax import SAXException  # noqa: S406 we parse with defusedxml
+from xml.sax.handler import feature_namespaces
 
+import django
 import httpx
 from bs4 import BeautifulSoup
+from defusedxml import DefusedXmlException
+from defusedxml.expatreader import create_parser as create_sax_parser
+from django.core.cache import cache
 from feedparser import FeedParserDict
 from feedparser import parse as parse_feed
+from feedparser.api import StrictFeedParser
 from pydantic import BaseModel as BaseSchema
 
 from legadilo.reading.services.article_fetching import (
@@ -36,11 +50,14 @@ from legadilo.reading.services.article_fetching import (
 )
 from legadilo.utils.security import full_sanitize
 
+from ...utils.http_utils import ConnectionTimer, ResponseTooBigError, get_limited_content
 from ...utils.time_utils import dt_to_http_date
+from ...utils.timings import StageTimings, measure_stage, record_stage_durations
 from ...utils.validators import (
     FullSanitizeValidator,
     ValidUrlValidator,
     default_frozen_model_config,
+    is_url_valid,
     normalize_url,
     truncate,
 )
@@ -60,6 +77,11 @@ class FeedData(BaseSchema):
     etag: str
     last_modified: datetime | None
     articles: list[ArticleData]
+    content_hash: str = ""
+    entry_fingerprints: dict[str, str] = {}
+    # WebSub hub advertised by the feed and the topic to subscribe to.
+    hub_url: str = ""
+    hub_topic_url: str = ""
 
 
 class NoFeedUrlFoundError(Exception):
@@ -82,32 +104,314 @@ class InvalidFeedFileError(Exception):
     pass
 
 
+class FeedContentNotModifiedError(Exception):
+    pass
+
+
 class FailedToParseArticleError(InvalidFeedFileError):
     pass
 
 
-async def get_feed_data(
+class CannotStreamFeedError(Exception):
+    pass
+
+
+# Cached instead of a feed URL for pages in which we didn't find any feed.
+_NO_FEED_URL_FOUND = ""
+
+
+async def get_feed_data(  # noqa: C901, PLR0913 too complex, too many arguments
     url: str,
     *,
     client: httpx.AsyncClient,
     etag: str | None = None,
     last_modified: datetime | None = None,
+    content_hash: str | None = None,
+    known_entry_fingerprints: Mapping[str, str] | None = None,
+    parse_executor: Executor | None = None,
+    use_discovery_cache: bool = False,
 ) -> FeedData:
     """Find the feed data from the supplied URL.
 
-    It's either a feed or a page containing a link to a feed.
+    It's either a feed or a page containing a link to a feed. If a parse executor is supplied, the
+    CPU intensive parsing of the feed will be done in it instead of blocking the event loop. With
+    use_discovery_cache, the feed URL found in a page (or the absence of feed in it) is cached so
+    we can fetch the feed directly the next time we are given this page. If the cached URL is not a
+    feed anymore, we discover the feed from the page again.
+
+    Many servers ignore conditional requests. So if we get the exact same content as the one
+    identified by content_hash, we raise FeedContentNotModifiedError without parsing it. Entries
+    whose fingerprint is in known_entry_fingerprints are skipped: we already saved them.
     """
     if _is_youtube_link(url):
         url = _find_youtube_rss_feed_link(url)
 
-    parsed_feed, url_content, resolved_url = await _fetch_feed_and_raw_data(client, url)
-    if not parsed_feed.get("version"):
-        url = _find_feed_page_content(url_content)
-        parsed_feed, resolved_url = await _fetch_feed(
+    page_url = url
+    if use_discovery_cache and (discovered_feed_url := await _get_discovered_feed_url(page_url)):
+        try:
+            return await get_feed_data(
+                discovered_feed_url,
+                client=client,
+                etag=etag,
+                last_modified=last_modified,
+                content_hash=content_hash,
+                known_entry_fingerprints=known_entry_fingerprints,
+                parse_executor=parse_executor,
+            )
+        except (NoFeedUrlFoundError, InvalidFeedFileError):
+            # The page doesn't link to this feed anymore: let's discover it again.
+            await cache.adelete(_get_discovery_cache_key(page_url))
+
+    url_content, resolved_url, encoding, url_content_hash = await _fetch_feed_content(
+        client, url, etag=etag, last_modified=last_modified
+    )
+    if content_hash and url_content_hash == content_hash:
+        raise FeedContentNotModifiedError
+    feed_data = await aparse_feed_content(
+        url_content,
+        str(resolved_url),
+        encoding=encoding,
+        known_entry_fingerprints=known_entry_fingerprints,
+        executor=parse_executor,
+    )
+    if feed_data is None:
+        # Not a feed: it must be a page linking to the feed.
+        try:
+            url = _find_feed_page_content(url_content)
+        except NoFeedUrlFoundError:
+            if use_discovery_cache:
+                await _cache_discovered_feed_url(page_url, _NO_FEED_URL_FOUND)
+            raise
+        del url_content
+        feed_content, resolved_url, encoding, url_content_hash = await _fetch_feed_content(
             client, url, etag=etag, last_modified=last_modified
         )
+        if content_hash and url_content_hash == content_hash:
+            raise FeedContentNotModifiedError
+        feed_data = await aparse_feed_content(
+            feed_content,
+            str(resolved_url),
+            encoding=encoding,
+            known_entry_fingerprints=known_entry_fingerprints,
+            executor=parse_executor,
+        )
+        if feed_data is not None and use_discovery_cache:
+            await _cache_discovered_feed_url(page_url, url)
+
+    if feed_data is None:
+        raise InvalidFeedFileError(f"Content of {resolved_url} is not a valid feed")
 
-    return build_feed_data_from_parsed_feed(parsed_feed, str(resolved_url))
+    return feed_data.model_copy(update={"content_hash": url_content_hash})
+
+
+async def _get_discovered_feed_url(page_url: str) -> str | None:
+    discovered_feed_url = await cache.aget(_get_discovery_cache_key(page_url))
+    if discovered_feed_url == _NO_FEED_URL_FOUND:
+        raise NoFeedUrlFoundError
+
+    return discovered_feed_url
+
+
+async def _cache_discovered_feed_url(page_url: str, feed_url: str):
+    timeout = (
+        constants.FEED_DISCOVERY_NEGATIVE_CACHE_DURATION
+        if feed_url == _NO_FEED_URL_FOUND
+        else constants.FEED_DISCOVERY_CACHE_DURATION
+    )
+    await cache.aset(_get_discovery_cache_key(page_url), feed_url, timeout=timeout.total_seconds())
+
+
+def _get_discovery_cache_key(page_url: str) -> str:
+    # URLs can be longer than what cache backends accept as keys.
+    return f"feeds:discovered_feed_url:{hashlib.sha256(page_url.encode()).hexdigest()}"
+
+
+@contextmanager
+def build_parse_executor(nb_workers: int) -> Iterator[Executor | None]:
+    """Create a process pool to parse feeds outside the event loop.
+
+    Processes are spawned (not forked) so they don't share any thread, lock or database connection
+    with the current process. They need to set up Django since building articles relies on it.
+    """
+    if nb_workers <= 0:
+        yield None
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=nb_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=django.setup,
+    ) as executor:
+        yield executor
+
+
+async def aparse_feed_content(
+    feed_content: bytes,
+    resolved_url: str,
+    *,
+    encoding: str | None = None,
+    known_entry_fingerprints: Mapping[str, str] | None = None,
+    executor: Executor | None = None,
+) -> FeedData | None:
+    if executor is None:
+        return parse_feed_content(feed_content, resolved_url, known_entry_fingerprints, encoding)
+
+    feed_data, stage_durations = await asyncio.get_running_loop().run_in_executor(
+        executor,
+        _parse_feed_content_and_measure,
+        feed_content,
+        resolved_url,
+        known_entry_fingerprints,
+        encoding,
+    )
+    # The timings active in this process can't be seen by the worker.
+    record_stage_durations(stage_durations)
+    return feed_data
+
+
+def _parse_feed_content_and_measure(
+    feed_content: bytes,
+    resolved_url: str,
+    known_entry_fingerprints: Mapping[str, str] | None,
+    encoding: str | None,
+) -> tuple[FeedData | None, dict[str, float]]:
+    with StageTimings().activate() as stage_timings:
+        feed_data = parse_feed_content(
+            feed_content, resolved_url, known_entry_fingerprints, encoding
+        )
+
+    return feed_data, stage_timings.durations
+
+
+def parse_feed_content(
+    feed_content: bytes,
+    resolved_url: str,
+    known_entry_fingerprints: Mapping[str, str] | None = None,
+    encoding: str | None = None,
+) -> FeedData | None:
+    """Parse the content of a feed file and build its data.
+
+    Returns None if the content is not a feed. This is CPU intensive and its arguments and results
+    can be pickled, so it can run in a process pool.
+
+    We work on the raw bytes of the feed to avoid copying it: the encoding is the one sent by the
+    server if any, otherwise it's detected from the content.
+
+    Big feeds are parsed entry by entry to keep memory usage bounded. If we can't (because the feed
+    is not well-formed XML for instance), we parse it at once: feedparser is more lenient.
+    """
+    with measure_stage(constants.FeedUpdateStage.PARSE):
+        return _parse_feed_content(feed_content, resolved_url, known_entry_fingerprints, encoding)
+
+
+def _parse_feed_content(
+    feed_content: bytes,
+    resolved_url: str,
+    known_entry_fingerprints: Mapping[str, str] | None,
+    encoding: str | None,
+) -> FeedData | None:
+    if len(feed_content) >= constants.STREAM_PARSE_MIN_FEED_SIZE:
+        try:
+            return _stream_parse_feed_content(
+                feed_content, resolved_url, known_entry_fingerprints, encoding
+            )
+        except CannotStreamFeedError:
+            logger.info("Cannot stream feed %s, parsing it at once", resolved_url, exc_info=True)
+
+    parsed_feed = parse_feed(
+        # feedparser tries to open strings as files or URLs and copies them. It reads streams as
+        # is and BytesIO doesn't copy the content until it's modified.
+        io.BytesIO(feed_content),
+        response_headers={"content-type": f"application/xml; charset={encoding}"}
+        if encoding
+        else None,
+        resolve_relative_uris=True,
+        sanitize_html=False,
+    )
+    if not parsed_feed.get("version"):
+        return None
+
+    return build_feed_data_from_parsed_feed(parsed_feed, resolved_url, known_entry_fingerprints)
+
+
+def _stream_parse_feed_content(
+    feed_content: bytes,
+    resolved_url: str,
+    known_entry_fingerprints: Mapping[str, str] | None,
+    encoding: str | None,
+) -> FeedData:
+    try:
+        feed_stream = _FeedStream(feed_content, encoding)
+        parsed_feed = feed_stream.parse_metadata()
+        if not parsed_feed.get("version"):
+            raise CannotStreamFeedError("Feed type is not supported")
+
+        return _build_feed_data(parsed_feed, feed_stream, resolved_url, known_entry_fingerprints)
+    except (SAXException, DefusedXmlException, LookupError, UnicodeDecodeError) as e:
+        raise CannotStreamFeedError from e
+
+
+class _FeedStream:
+    """Parse an RSS or Atom feed chunk by chunk and iterate over its entries as they are parsed.
+
+    It relies on the strict parser of feedparser, so entries are the same as with a full parse.
+    Parsed entries are removed from the parser: memory usage doesn't depend on the number of
+    entries. The feed metadata is read until the first entry: since we stop parsing once we have
+    enough entries, metadata placed after them is ignored.
+    """
+
+    def __init__(self, feed_content: bytes, encoding: str | None = None):
+        self._source: IO = io.BytesIO(feed_content)
+        if encoding:
+            # The encoding sent by the server wins over the one declared in the document.
+            self._source = io.TextIOWrapper(self._source, encoding=encoding)
+        self._feed_parser = StrictFeedParser("", None, "utf-8")
+        self._feed_parser.resolve_relative_uris = True
+        self._feed_parser.sanitize_html = False
+        self._sax_parser = create_sax_parser()
+        self._sax_parser.setFeature(feature_namespaces, True)  # noqa: FBT003 positional value
+        self._sax_parser.setContentHandler(self._feed_parser)
+        self._sax_parser.setErrorHandler(self._feed_parser)
+        self._is_parsed = False
+
+    def parse_metadata(self) -> FeedParserDict:
+        while not self._is_parsed and not self._feed_parser.entries:
+            self._parse_next_chunk()
+
+        return FeedParserDict(
+            bozo=False,
+            entries=[],
+            feed=self._feed_parser.feeddata,
+            headers={},
+            version=self._feed_parser.version,
+            namespaces=self._feed_parser.namespaces_in_use,
+        )
+
+    def __iter__(self) -> Iterator[FeedParserDict]:
+        while True:
+            yield from self._pop_parsed_entries()
+            if self._is_parsed:
+                return
+            self._parse_next_chunk()
+
+    def _parse_next_chunk(self):
+        if chunk := self._source.read(constants.STREAM_PARSE_CHUNK_SIZE):
+            self._sax_parser.feed(chunk)
+        else:
+            self._sax_parser.close()
+            self._is_parsed = True
+
+    def _pop_parsed_entries(self) -> list[FeedParserDict]:
+        entries = self._feed_parser.entries
+        # The last entry is still being parsed.
+        nb_parsed_entries = len(entries) - 1 if self._feed_parser.inentry else len(entries)
+        parsed_entries = entries[:nb_parsed_entries]
+        del entries[:nb_parsed_entries]
+        for entry in parsed_entries:
+            # The parser keeps a reference to the entries it has seen.
+            self._feed_parser.property_depth_map.pop(entry, None)
+
+        return parsed_entries
 
 
 def _find_youtube_rss_feed_link(url: str) -> str:
@@ -136,8 +440,27 @@ def _find_youtube_rss_feed_link(url: str) -> str:
     return url
 
 
-def build_feed_data_from_parsed_feed(parsed_feed: FeedParserDict, resolved_url: str) -> FeedData:
+def build_feed_data_from_parsed_feed(
+    parsed_feed: FeedParserDict,
+    resolved_url: str,
+    known_entry_fingerprints: Mapping[str, str] | None = None,
+) -> FeedData:
+    return _build_feed_data(
+        parsed_feed, parsed_feed.entries, resolved_url, known_entry_fingerprints
+    )
+
+
+def _build_feed_data(
+    parsed_feed: FeedParserDict,
+    entries: Iterable[FeedParserDict],
+    resolved_url: str,
+    known_entry_fingerprints: Mapping[str, str] | None,
+) -> FeedData:
     feed_title = parsed_feed.feed.get("title", "")
+    articles, entry_fingerprints = _parse_articles_in_feed(
+        resolved_url, feed_title, parsed_feed, known_entry_fingerprints or {}, entries=entries
+    )
+    hub_url, hub_topic_url = _get_hub_links(parsed_feed, resolved_url)
 
     return FeedData(
         feed_url=resolved_url,
@@ -145,47 +468,76 @@ def build_feed_data_from_parsed_feed(parsed_feed: FeedParserDict, resolved_url:
         title=feed_title,
         description=full_sanitize(parsed_feed.feed.get("description", "")),
         feed_type=constants.SupportedFeedType(parsed_feed.version),
-        articles=_parse_articles_in_feed(resolved_url, feed_title, parsed_feed),
+        articles=articles,
+        entry_fingerprints=entry_fingerprints,
         etag=parsed_feed.get("etag", ""),
         last_modified=_parse_feed_time(parsed_feed.get("modified_parsed")),
+        hub_url=hub_url,
+        hub_topic_url=hub_topic_url,
     )
 
 
-async def _fetch_feed_and_raw_data(
+def _get_hub_links(parsed_feed: FeedParserDict, resolved_url: str) -> tuple[str, str]:
+    """Find the WebSub hub of the feed and the topic URL to subscribe to."""
+    hub_url = ""
+    topic_url = resolved_url
+    for link in parsed_feed.feed.get("links", []):
+        href = link.get("href", "")
+        if not is_url_valid(href):
+            continue
+
+        if link.get("rel") == "hub" and not hub_url:
+            hub_url = href
+        elif link.get("rel") == "self":
+            topic_url = href
+
+    if not hub_url:
+        return "", ""
+
+    return hub_url, topic_url
+
+
+async def _fetch_feed_content(
     client: httpx.AsyncClient,
     url: str,
     etag: str | None = None,
     last_modified: datetime | None = None,
-) -> tuple[FeedParserDict, str, httpx.URL]:
+) -> tuple[bytes, httpx.URL, str | None, str]:
+    """Fetch the feed and return its raw content, its URL, its declared encoding and its hash."""
     headers = {}
     if etag:
         headers["If-None-Match"] = etag
     if last_modified:
         headers["If-Modified-Since"] = dt_to_http_date(last_modified)
 
-    response = await client.get(url, headers=headers, follow_redirects=True)
-    raw_feed_content = response.raise_for_status().content
-    if sys.getsizeof(raw_feed_content) > constants.MAX_FEED_FILE_SIZE:
-        raise FeedFileTooBigError
+    connection_timer = ConnectionTimer()
+    started_at = time.perf_counter()
+    try:
+        raw_feed_content, response = await get_limited_content(
+            client,
+            url,
+            max_size=constants.MAX_FEED_FILE_SIZE,
+            headers=headers,
+            extensions={"trace": connection_timer.trace},
+        )
+    except ResponseTooBigError as e:
+        raise FeedFileTooBigError from e
+
+    fetch_duration = time.perf_counter() - started_at
+    record_stage_durations({
+        constants.FeedUpdateStage.CONNECT: connection_timer.duration,
+        constants.FeedUpdateStage.DOWNLOAD: fetch_duration - connection_timer.duration,
+    })
 
-    feed_content = raw_feed_content.decode(response.encoding or "utf-8")
     return (
-        parse_feed(feed_content, resolve_relative_uris=True, sanitize_html=False),
-        feed_content,
+        raw_feed_content,
         response.url,
+        response.charset_encoding,
+        hashlib.sha256(raw_feed_content).hexdigest(),
     )
 
 
-async def _fetch_feed(
-    client: httpx.AsyncClient, url: str, *, etag: str | None, last_modified: datetime | None
-) -> tuple[FeedParserDict, httpx.URL]:
-    parsed_feed, _, resolved_url = await _fetch_feed_and_raw_data(
-        client, url, etag=etag, last_modified=last_modified
-    )
-    return parsed_feed, resolved_url
-
-
-def _find_feed_page_content(page_content: str) -> str:
+def _find_feed_page_content(page_content: bytes | str) -> str:
     soup = BeautifulSoup(page_content, "html.parser")
     atom_feeds = soup.find_all("link", {"type": "application/atom+xml"})
     rss_feeds = soup.find_all("link", {"type": "application/rss+xml"})
@@ -218,35 +570,68 @@ def _normalize_found_link(link: str):
 
 
 def _parse_articles_in_feed(
-    feed_url: str, feed_title: str, parsed_feed: FeedParserDict
-) -> list[ArticleData]:
+    feed_url: str,
+    feed_title: str,
+    parsed_feed: FeedParserDict,
+    known_entry_fingerprints: Mapping[str, str],
+    *,
+    entries: Iterable[FeedParserDict] | None = None,
+) -> tuple[list[ArticleData], dict[str, str]]:
+    """Build the articles of the feed from its entries (all the entries of parsed_feed by default).
+
+    We only read the first MAX_FEED_ENTRIES_PER_UPDATE entries: feeds list their latest entries
+    first and huge archives would take too long to save.
+    """
     articles_data = []
-    for entry in parsed_feed.entries:
-        try:
-            article_link = _get_article_link(feed_url, entry)
-            content = _get_article_content(entry)
-            articles_data.append(
-                ArticleData(
-                    external_article_id=entry.get("id", ""),
-                    title=entry.title,
-                    summary=_get_summary(article_link, entry),
-                    content=content,
-                    authors=_get_article_authors(entry),
-                    contributors=_get_article_contributors(entry),
-                    tags=_get_articles_tags(entry),
-                    link=article_link,
-                    preview_picture_url=_get_preview_picture_url(article_link, entry),
-                    preview_picture_alt=_get_preview_picture_alt(entry),
-                    published_at=_feed_time_to_datetime(entry.get("published_parsed")),
-                    updated_at=_feed_time_to_datetime(entry.get("updated_parsed")),
-                    language=_get_language(parsed_feed, entry),
-                    source_title=feed_title,
+    entry_fingerprints = {}
+    if entries is None:
+        entries = parsed_feed.entries
+    for entry in islice(entries, constants.MAX_FEED_ENTRIES_PER_UPDATE):
+        with measure_stage(constants.FeedUpdateStage.BUILD_ARTICLES):
+            entry_key, entry_fingerprint = _get_entry_fingerprint(entry)
+            if entry_key and known_entry_fingerprints.get(entry_key) == entry_fingerprint:
+                entry_fingerprints[entry_key] = entry_fingerprint
+                continue
+
+            try:
+                article_link = _get_article_link(feed_url, entry)
+                content = _get_article_content(entry)
+                articles_data.append(
+                    ArticleData(
+                        external_article_id=entry.get("id", ""),
+                        title=entry.title,
+                        summary=_get_summary(article_link, entry),
+                        content=content,
+                        authors=_get_article_authors(entry),
+                        contributors=_get_article_contributors(entry),
+                        tags=_get_articles_tags(entry),
+                        link=article_link,
+                        preview_picture_url=_get_preview_picture_url(article_link, entry),
+                        preview_picture_alt=_get_preview_picture_alt(entry),
+                        published_at=_feed_time_to_datetime(entry.get("published_parsed")),
+                        updated_at=_feed_time_to_datetime(entry.get("updated_parsed")),
+                        language=_get_language(parsed_feed, entry),
+                        source_title=feed_title,
+                    )
                 )
-            )
-        except FailedToParseArticleError:
-            logger.exception("Failed to parse an article")
+            except FailedToParseArticleError:
+                logger.exception("Failed to parse an article")
+            else:
+                if entry_key:
+                    entry_fingerprints[entry_key] = entry_fingerprint
+
+    return articles_data, entry_fingerprints
+
+
+def _get_entry_fingerprint(entry) -> tuple[str, str]:
+    """Identify the entry and hash its raw data to know if it changed since the last update.
+
+    It's much cheaper than building the article and comparing it with what we have in the database.
+    """
+    entry_key = entry.get("id") or entry.get("link") or ""
+    raw_entry = json.dumps(entry, sort_keys=True, default=str)
 
-    return articles_data
+    return entry_key, hashlib.sha256(raw_entry.encode()).hexdigest()
 
 
 def _get_summary(article_url: str, entry) -> str:
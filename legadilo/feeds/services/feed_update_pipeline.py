@@ -0,0 +1,327 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+from asyncio import TaskGroup
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from urllib.parse import urlparse
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from legadilo.utils.byte_budget import ByteBudget
+from legadilo.utils.exceptions import extract_debug_information, format_exception
+from legadilo.utils.http_utils import get_rss_async_client, parse_retry_after
+from legadilo.utils.loggers import unlink_logger_from_sentry
+from legadilo.utils.timings import StageTimings
+
+from .. import constants
+from ..models import Feed, FeedHost, FeedUpdate
+from .feed_parsing import (
+    FeedContentNotModifiedError,
+    FeedData,
+    build_parse_executor,
+    get_feed_data,
+)
+from .feed_update_scheduler import FeedUpdateScheduler
+from .feed_update_writer import FeedUpdateWriter
+from .websub import subscribe_to_hub
+
+logger = logging.getLogger(__name__)
+
+unlink_logger_from_sentry(logger)
+
+# Statuses telling us the host is down or overloaded and not only that this feed is broken.
+HOST_FAILURE_STATUS_CODES = frozenset({
+    HTTPStatus.TOO_MANY_REQUESTS,
+    HTTPStatus.BAD_GATEWAY,
+    HTTPStatus.SERVICE_UNAVAILABLE,
+    HTTPStatus.GATEWAY_TIMEOUT,
+})
+
+
+def group_feeds_by_url(feeds: Iterable[Feed]) -> dict[str, list[Feed]]:
+    # Many users can subscribe to the same feed. We group them by URL to fetch and parse each
+    # feed only once and then update it for each subscriber.
+    feeds_by_url: dict[str, list[Feed]] = {}
+    for feed in feeds:
+        feeds_by_url.setdefault(feed.feed_url, []).append(feed)
+
+    return feeds_by_url
+
+
+@asynccontextmanager
+async def build_feed_update_pipeline(*, parse_workers: int) -> AsyncIterator[FeedUpdatePipeline]:
+    scheduler = FeedUpdateScheduler(
+        max_concurrency=settings.FEED_UPDATE_MAX_CONCURRENCY,
+        max_concurrency_per_host=settings.FEED_UPDATE_MAX_CONCURRENCY_PER_HOST,
+        min_interval_per_host=settings.FEED_UPDATE_MIN_INTERVAL_PER_HOST,
+    )
+    byte_budget = ByteBudget(
+        settings.FEED_UPDATE_MAX_IN_FLIGHT_BYTES,
+        estimated_bytes=constants.FEED_DOWNLOAD_ESTIMATED_SIZE,
+    )
+    with build_parse_executor(parse_workers) as executor:
+        async with (
+            get_rss_async_client() as client,
+            FeedUpdateWriter(
+                batch_size=settings.FEED_UPDATE_WRITE_BATCH_SIZE,
+                flush_interval=settings.FEED_UPDATE_WRITE_FLUSH_INTERVAL,
+            ) as writer,
+        ):
+            yield FeedUpdatePipeline(
+                client=client,
+                scheduler=scheduler,
+                writer=writer,
+                parse_executor=executor,
+                byte_budget=byte_budget,
+            )
+
+
+class FeedUpdatePipeline:
+    """Fetch, parse and save feeds.
+
+    Feeds must be grouped by URL and have their user with its settings and timezone loaded. Errors
+    are logged on the feeds: updating feeds never fails. Updated feeds are saved in batches by the
+    writer.
+
+    Failures to reach a host are also tracked per host. Once the circuit of a host is open, its
+    feeds are not fetched but postponed until the end of the cooldown. It opens at once if the host
+    doesn't answer in time.
+
+    The time spent in each stage of the update is measured for each feed. It's saved with the feed
+    update and aggregated by the writer.
+
+    Feeds are only fetched while the bytes downloaded by the feeds being fetched, parsed or waiting
+    to be saved stay under the byte budget. Without it, a few big feeds fetched at the same time
+    could use lots of memory. When no budget is given, the number of bytes isn't limited.
+    """
+
+    def __init__(
+        self,
+        *,
+        client: httpx.AsyncClient,
+        scheduler: FeedUpdateScheduler,
+        writer: FeedUpdateWriter,
+        parse_executor: Executor | None = None,
+        byte_budget: ByteBudget | None = None,
+    ):
+        self.client = client
+        self.scheduler = scheduler
+        self.writer = writer
+        self.parse_executor = parse_executor
+        self.byte_budget = byte_budget or ByteBudget(
+            sys.maxsize, estimated_bytes=constants.FEED_DOWNLOAD_ESTIMATED_SIZE
+        )
+        self.nb_postponed_feeds = 0
+        self._unhealthy_hosts: dict[str, FeedHost] = {}
+
+    async def update(self, feeds_by_url: dict[str, list[Feed]]):
+        self._unhealthy_hosts = await FeedHost.objects.get_unhealthy_by_host({
+            _get_host(feed_url) for feed_url in feeds_by_url
+        })
+        latest_success_by_feed_id = await FeedUpdate.objects.get_latest_success_for_feeds(
+            feed.id for feeds in feeds_by_url.values() for feed in feeds
+        )
+        async with TaskGroup() as tg:
+            for feed_url, feeds in feeds_by_url.items():
+                latest_success = self._get_shared_latest_success(feeds, latest_success_by_feed_id)
+                tg.create_task(self._update_feeds(feed_url, feeds, latest_success))
+
+        # Everything must be saved once the update is done.
+        await self.writer.flush()
+
+    async def _update_feeds(
+        self, feed_url: str, feeds: list[Feed], latest_success: FeedUpdate | None
+    ):
+        host = _get_host(feed_url)
+        if await self._postpone_if_host_blocked(host, feeds):
+            return
+
+        stage_timings = StageTimings()
+        try:
+            async with self.scheduler.slot(feed_url):
+                # The circuit may have opened while we were waiting for a slot.
+                if await self._postpone_if_host_blocked(host, feeds):
+                    return
+
+                logger.info("Updating feed %s for %s subscriber(s)", feed_url, len(feeds))
+                if self.byte_budget.is_exhausted:
+                    # Feeds waiting to be saved hold bytes of the budget: saving them makes room.
+                    await self.writer.flush()
+                async with self.byte_budget.reserve() as reservation:
+                    with stage_timings.activate():
+                        feed_metadata = await self._fetch_feed_data(
+                            host, feed_url, feeds, latest_success
+                        )
+                    # The parsed feed stays in memory until the writer saves it.
+                    reservation.keep()
+        except FeedContentNotModifiedError:
+            await self._log_not_modified(feeds)
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code == HTTPStatus.NOT_MODIFIED:
+                await self._log_not_modified(feeds)
+            else:
+                logger.exception("Failed to fetch feed %s", feed_url)
+                await self._log_error(feeds, e, extract_debug_information(e))
+        except httpx.HTTPError as e:
+            logger.exception("Failed to update feed %s", feed_url)
+            await self._log_error(feeds, e, extract_debug_information(e))
+        except Exception as e:
+            logger.exception("Failed to update feed %s", feed_url)
+            await self._log_error(feeds, e)
+        else:
+            await self.writer.add(feeds, feed_metadata, stage_timings, reservation)
+            await self._subscribe_to_hub(feed_url, feed_metadata)
+
+    async def _fetch_feed_data(
+        self, host: str, feed_url: str, feeds: list[Feed], latest_success: FeedUpdate | None
+    ) -> FeedData:
+        """Fetch the feed and track the health of its host.
+
+        This must be called while holding the slot of the host: other feeds of the host must see
+        the circuit open as soon as it is.
+        """
+        try:
+            # The client timeout applies to each read: a host sending its feed very slowly must not
+            # hold a slot forever.
+            async with asyncio.timeout(settings.RSS_FETCH_TOTAL_TIMEOUT):
+                feed_metadata = await get_feed_data(
+                    feed_url,
+                    client=self.client,
+                    etag=latest_success.feed_etag if latest_success else None,
+                    last_modified=latest_success.feed_last_modified if latest_success else None,
+                    content_hash=latest_success.content_hash if latest_success else None,
+                    known_entry_fingerprints=self._get_shared_entry_fingerprints(feeds),
+                    parse_executor=self.parse_executor,
+                )
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code in HOST_FAILURE_STATUS_CODES:
+                await self._log_host_failure(
+                    host, retry_after=parse_retry_after(e.response.headers.get("Retry-After"))
+                )
+            else:
+                await self._log_host_success(host)
+            raise
+        except (httpx.ConnectTimeout, TimeoutError):
+            # Each feed of a host that doesn't answer would wait for the timeout: we stop fetching
+            # from it right away.
+            await self._log_host_failure(host, retry_after=constants.FEED_HOST_COOLDOWN)
+            raise
+        except httpx.TransportError:
+            await self._log_host_failure(host)
+            raise
+        except FeedContentNotModifiedError:
+            await self._log_host_success(host)
+            raise
+
+        await self._log_host_success(host)
+        return feed_metadata
+
+    async def _subscribe_to_hub(self, feed_url: str, feed_metadata: FeedData):
+        try:
+            await subscribe_to_hub(self.client, feed_url, feed_metadata)
+        except Exception:
+            # We will keep polling the feed and try again on next update.
+            logger.exception("Failed to subscribe to the hub of %s", feed_url)
+
+    async def _postpone_if_host_blocked(self, host: str, feeds: list[Feed]) -> bool:
+        feed_host = self._unhealthy_hosts.get(host)
+        if feed_host is None or not feed_host.is_blocked or feed_host.blocked_until is None:
+            return False
+
+        logger.info(
+            "Postponing %s feed(s) of %s until %s since the host is unreachable",
+            len(feeds),
+            host,
+            feed_host.blocked_until,
+        )
+        await self._postpone_refresh(feeds, feed_host.blocked_until)
+        return True
+
+    async def _postpone_refresh(self, feeds: list[Feed], refresh_at: datetime):
+        self.nb_postponed_feeds += len(feeds)
+        await sync_to_async(Feed.objects.postpone_refresh)(feeds, refresh_at)
+
+    async def _log_host_failure(self, host: str, *, retry_after: timedelta | None = None):
+        feed_host = await sync_to_async(FeedHost.objects.log_failure)(host, retry_after=retry_after)
+        self._unhealthy_hosts[host] = feed_host
+        if feed_host.is_blocked:
+            logger.warning("Stopped fetching feeds from %s until %s", host, feed_host.blocked_until)
+
+    async def _log_host_success(self, host: str):
+        if self._unhealthy_hosts.pop(host, None) is not None:
+            await sync_to_async(FeedHost.objects.log_success)(host)
+
+    def _get_shared_latest_success(
+        self, feeds: list[Feed], latest_success_by_feed_id: dict[int, FeedUpdate]
+    ) -> FeedUpdate | None:
+        """Find the latest successful update to use to know whether the feed changed.
+
+        We rely on its ETag, Last-Modified and content hash only if all subscribers share the same
+        values. Otherwise, we could think the feed was not modified while some subscribers didn't
+        get its latest version.
+        """
+        latest_successes = []
+        for feed in feeds:
+            feed_update = latest_success_by_feed_id.get(feed.id)
+            if feed_update is None:
+                return None
+            latest_successes.append(feed_update)
+
+        if (
+            len({
+                (
+                    feed_update.feed_etag,
+                    feed_update.feed_last_modified,
+                    feed_update.content_hash,
+                )
+                for feed_update in latest_successes
+            })
+            != 1
+        ):
+            return None
+
+        return latest_successes[0]
+
+    def _get_shared_entry_fingerprints(self, feeds: list[Feed]) -> dict[str, str]:
+        """Only skip entries that are unchanged for all subscribers."""
+        return dict(set.intersection(*(set(feed.entry_fingerprints.items()) for feed in feeds)))
+
+    async def _log_not_modified(self, feeds: list[Feed]):
+        for feed in feeds:
+            await sync_to_async(Feed.objects.log_not_modified)(feed)
+
+    async def _log_error(
+        self, feeds: list[Feed], error: Exception, technical_debug_data: dict | None = None
+    ):
+        for feed in feeds:
+            await sync_to_async(Feed.objects.log_error)(
+                feed, format_exception(error), technical_debug_data
+            )
+
+
+def _get_host(url: str) -> str:
+    return urlparse(url).netloc
@@ -0,0 +1,135 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from operator import itemgetter
+from urllib.parse import urlparse
+
+
+@dataclass
+class _HostState:
+    semaphore: asyncio.Semaphore
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    next_request_allowed_at: float = 0.0
+
+
+@dataclass
+class SchedulerStats:
+    nb_requests: int = 0
+    queue_depth: int = 0
+    max_queue_depth: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+    max_queue_depth_per_host: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def mean_wait_time(self) -> float:
+        if self.nb_requests == 0:
+            return 0.0
+
+        return self.total_wait_time / self.nb_requests
+
+    @property
+    def busiest_host(self) -> tuple[str, int] | None:
+        if not self.max_queue_depth_per_host:
+            return None
+
+        return max(self.max_queue_depth_per_host.items(), key=itemgetter(1))
+
+    def __str__(self):
+        busiest_host = self.busiest_host
+        return (
+            f"SchedulerStats(nb_requests={self.nb_requests}, "
+            f"max_queue_depth={self.max_queue_depth}, "
+            f"mean_wait_time={self.mean_wait_time:.3f}s, "
+            f"max_wait_time={self.max_wait_time:.3f}s, "
+            f"busiest_host={busiest_host[0] if busiest_host else None} "
+            f"(max_queue_depth={busiest_host[1] if busiest_host else 0}))"
+        )
+
+
+class FeedUpdateScheduler:
+    """Limit how many feeds we fetch at once and how fast we fetch feeds from the same host.
+
+    We have a global concurrency cap, a cap per host and a minimal interval between two requests to
+    the same host. This prevents us from being throttled by hosts that serve lots of feeds (like
+    Medium, Substack or YouTube) and prevents the loop from being clogged by requests waiting for a
+    connection slot.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_concurrency: int,
+        max_concurrency_per_host: int,
+        min_interval_per_host: float,
+    ):
+        self._global_semaphore = asyncio.Semaphore(max_concurrency)
+        self._max_concurrency_per_host = max_concurrency_per_host
+        self._min_interval_per_host = min_interval_per_host
+        self._hosts: dict[str, _HostState] = {}
+        self._queue_depth_per_host: dict[str, int] = {}
+        self.stats = SchedulerStats()
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        host = urlparse(url).netloc
+        host_state = self._hosts.setdefault(
+            host, _HostState(semaphore=asyncio.Semaphore(self._max_concurrency_per_host))
+        )
+        enqueued_at = time.monotonic()
+        self._enqueue(host)
+        dequeued = False
+        try:
+            # We wait for the host first: this way, we don't hold a global slot while waiting for a
+            # busy host.
+            async with host_state.semaphore:
+                await self._wait_for_host_interval(host_state)
+                async with self._global_semaphore:
+                    self._dequeue(host, time.monotonic() - enqueued_at)
+                    dequeued = True
+                    yield
+        finally:
+            if not dequeued:
+                # We were cancelled while waiting for a slot.
+                self.stats.queue_depth -= 1
+                self._queue_depth_per_host[host] -= 1
+
+    async def _wait_for_host_interval(self, host_state: _HostState):
+        async with host_state.lock:
+            delay = host_state.next_request_allowed_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            host_state.next_request_allowed_at = time.monotonic() + self._min_interval_per_host
+
+    def _enqueue(self, host: str):
+        self.stats.queue_depth += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.stats.queue_depth)
+        self._queue_depth_per_host[host] = self._queue_depth_per_host.get(host, 0) + 1
+        self.stats.max_queue_depth_per_host[host] = max(
+            self.stats.max_queue_depth_per_host.get(host, 0), self._queue_depth_per_host[host]
+        )
+
+    def _dequeue(self, host: str, wait_time: float):
+        self.stats.queue_depth -= 1
+        self._queue_depth_per_host[host] -= 1
+        self.stats.nb_requests += 1
+        self.stats.total_wait_time += wait_time
+        self.stats.max_wait_time = max(self.stats.max_wait_time, wait_time)
@@ -0,0 +1,136 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from types import TracebackType
+
+from asgiref.sync import sync_to_async
+
+from legadilo.utils.byte_budget import ByteBudgetReservation
+from legadilo.utils.exceptions import format_exception
+from legadilo.utils.loggers import unlink_logger_from_sentry
+from legadilo.utils.timings import StageTimings, StageTimingsStats
+
+from ..models import Feed
+from .feed_parsing import FeedData
+
+logger = logging.getLogger(__name__)
+
+unlink_logger_from_sentry(logger)
+
+
+class FeedUpdateWriter:
+    """Gather updated feeds and save them in batches.
+
+    Saving each feed in its own transaction means lots of short transactions competing for the
+    thread used to run sync code. Instead, we queue updated feeds and save them together once the
+    batch is full or when the flush interval is elapsed. Use it as an async context manager to
+    flush periodically and to save pending feeds on exit.
+
+    The timings of the saved feeds are aggregated in stage_timings_stats. The byte budget
+    reservation given with a feed is released once it's saved: queued feeds stay in memory until
+    then.
+    """
+
+    def __init__(self, *, batch_size: int, flush_interval: float):
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._pending: list[tuple[Feed, FeedData]] = []
+        self._stage_timings_by_feed_id: dict[int, StageTimings] = {}
+        self._reservation_by_feed_id: dict[int, ByteBudgetReservation] = {}
+        self._flush_lock = asyncio.Lock()
+        self._periodic_flush_task: asyncio.Task | None = None
+        self.nb_flushes = 0
+        self.stage_timings_stats = StageTimingsStats()
+
+    async def __aenter__(self) -> FeedUpdateWriter:
+        self._periodic_flush_task = asyncio.create_task(self._flush_periodically())
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ):
+        if self._periodic_flush_task is not None:
+            self._periodic_flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._periodic_flush_task
+            self._periodic_flush_task = None
+        await self.flush()
+
+    async def add(
+        self,
+        feeds: list[Feed],
+        feed_metadata: FeedData,
+        stage_timings: StageTimings | None = None,
+        reservation: ByteBudgetReservation | None = None,
+    ):
+        if reservation is not None:
+            # Feeds are saved in order: the data is freed once its last feed is saved.
+            self._reservation_by_feed_id[feeds[-1].id] = reservation
+        for feed in feeds:
+            self._pending.append((feed, feed_metadata))
+            # Each feed gets its own copy: articles are saved separately for each of them.
+            self._stage_timings_by_feed_id[feed.id] = StageTimings(
+                stage_timings.durations if stage_timings else None
+            )
+        if len(self._pending) >= self._batch_size:
+            await self.flush()
+
+    async def flush(self):
+        async with self._flush_lock:
+            while self._pending:
+                batch = self._pending[: self._batch_size]
+                del self._pending[: self._batch_size]
+                await self._save(batch)
+
+    async def _save(self, batch: list[tuple[Feed, FeedData]]):
+        stage_timings_by_feed_id = {
+            feed.id: self._stage_timings_by_feed_id.pop(feed.id, StageTimings())
+            for feed, _ in batch
+        }
+        try:
+            failures = await sync_to_async(Feed.objects.update_feeds)(
+                batch, stage_timings_by_feed_id=stage_timings_by_feed_id
+            )
+        except Exception as e:
+            # The transaction is rolled back, nothing was saved.
+            logger.exception("Failed to save a batch of %s feeds", len(batch))
+            failures = [(feed, e) for feed, _ in batch]
+
+        self.nb_flushes += 1
+        failed_feeds = {feed.id for feed, _ in failures}
+        for feed, _ in batch:
+            if feed.id not in failed_feeds:
+                logger.info("Updated feed %s", feed)
+                self.stage_timings_stats.add(feed.feed_url, stage_timings_by_feed_id[feed.id])
+        for feed, error in failures:
+            logger.error("Failed to update feed %s", feed, exc_info=error)
+            await sync_to_async(Feed.objects.log_error)(feed, format_exception(error))
+        for feed, _ in batch:
+            if (reservation := self._reservation_by_feed_id.pop(feed.id, None)) is not None:
+                await reservation.release()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            await self.flush()
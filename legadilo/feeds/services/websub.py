@@ -0,0 +1,114 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.urls import reverse
+
+from legadilo.utils.exceptions import format_exception
+
+from .. import constants
+from ..models import Feed, FeedHubSubscription
+from .feed_parsing import FeedData, InvalidFeedFileError, parse_feed_content
+
+logger = logging.getLogger(__name__)
+
+# Hubs advertised by feeds push us their updates once subscribed.
+# See https://www.w3.org/TR/websub/ for the specification.
+
+
+def is_websub_enabled() -> bool:
+    # Hubs must be able to reach us to verify our subscriptions and push content.
+    return bool(settings.WEBSUB_CALLBACK_BASE_URL)
+
+
+def build_callback_url(subscription: FeedHubSubscription) -> str:
+    return settings.WEBSUB_CALLBACK_BASE_URL.rstrip("/") + reverse(
+        "feeds:websub_callback", kwargs={"subscription_token": subscription.token}
+    )
+
+
+async def subscribe_to_hub(client: httpx.AsyncClient, feed_url: str, feed_data: FeedData) -> bool:
+    """Ask the hub advertised by the feed to push us its updates.
+
+    Returns whether we requested a subscription. The hub will verify it by calling our callback: we
+    will stop polling the feed only then.
+    """
+    if not is_websub_enabled() or not feed_data.hub_url:
+        return False
+
+    subscription = await sync_to_async(FeedHubSubscription.objects.prepare_subscription)(
+        feed_url, hub_url=feed_data.hub_url, topic_url=feed_data.hub_topic_url
+    )
+    if subscription is None:
+        return False
+
+    response = await client.post(
+        subscription.hub_url,
+        data={
+            "hub.mode": "subscribe",
+            "hub.topic": subscription.topic_url,
+            "hub.callback": build_callback_url(subscription),
+            "hub.secret": subscription.secret,
+            "hub.lease_seconds": str(int(constants.WEBSUB_LEASE_DURATION.total_seconds())),
+        },
+    )
+    response.raise_for_status()
+    logger.info("Requested subscription to %s for %s", subscription.hub_url, feed_url)
+
+    return True
+
+
+def update_feeds_from_pushed_content(
+    subscription: FeedHubSubscription, content: bytes, encoding: str | None = None
+) -> int:
+    """Update all the feeds of the subscription with the content pushed by the hub.
+
+    Returns the number of updated feeds.
+    """
+    feed_data = parse_feed_content(content, subscription.feed_url, encoding=encoding)
+    if feed_data is None:
+        raise InvalidFeedFileError(
+            f"Content pushed for {subscription.feed_url} is not a valid feed"
+        )
+
+    feeds = list(
+        Feed.objects.get_queryset()
+        .filter(feed_url=subscription.feed_url)
+        .only_enabled()
+        .select_related("user", "user__settings", "user__settings__timezone")
+    )
+    # Hubs may only push the new or updated entries: we must keep the fingerprints of the others or
+    # the next poll of the feed would consider them as changed.
+    failures = Feed.objects.update_feeds([
+        (
+            feed,
+            feed_data.model_copy(
+                update={
+                    "entry_fingerprints": feed.entry_fingerprints | feed_data.entry_fingerprints
+                }
+            ),
+        )
+        for feed in feeds
+    ])
+    for feed, error in failures:
+        logger.error("Failed to update feed %s from pushed content", feed, exc_info=error)
+        Feed.objects.log_error(feed, format_exception(error))
+
+    return len(feeds) - len(failures)
@@ -0,0 +1,25 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from legadilo.feeds.models import Feed
+from legadilo.reading.signals import reading_list_viewed
+
+
+def refresh_feeds_on_reading_list_view(sender, user, **kwargs):
+    Feed.objects.request_refresh(user)
+
+
+reading_list_viewed.connect(refresh_feeds_on_reading_list_view)
@@ -19,6 +19,7 @@ from typing import Any
 
 import httpx
 import pytest
+import time_machine
 from django.urls import reverse
 
 from legadilo.feeds import constants
@@ -286,7 +287,7 @@ class TestSubscribeToFeedView:
             "legadilo.feeds.api.get_feed_data", return_value=FeedDataFactory(feed_url=feed_url)
         )
 
-        with django_assert_num_queries(21):
+        with django_assert_num_queries(23):
             response = logged_in_sync_client.post(
                 self.url, {"feed_url": feed_url}, content_type="application/json"
             )
@@ -311,7 +312,7 @@ class TestSubscribeToFeedView:
         category = FeedCategoryFactory(user=user)
         existing_tag = TagFactory(user=user)
 
-        with django_assert_num_queries(25):
+        with django_assert_num_queries(27):
             response = logged_in_sync_client.post(
                 self.url,
                 {
@@ -487,7 +488,7 @@ class TestUpdateFeedView:
         }
 
     def test_update(self, logged_in_sync_client, django_assert_num_queries, snapshot):
-        with django_assert_num_queries(9):
+        with django_assert_num_queries(10):
             response = logged_in_sync_client.patch(
                 self.url,
                 {
@@ -508,6 +509,20 @@ class TestUpdateFeedView:
             "feed.json",
         )
 
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_update_to_adaptive_refresh_delay(self, logged_in_sync_client):
+        response = logged_in_sync_client.patch(
+            self.url,
+            {"refresh_delay": constants.FeedRefreshDelays.ADAPTIVE},
+            content_type="application/json",
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        self.feed.refresh_from_db()
+        assert self.feed.refresh_delay == constants.FeedRefreshDelays.ADAPTIVE
+        # Without history, we use the default adaptive delay.
+        assert self.feed.next_refresh_at == utcdt(2024, 5, 9, 10)
+
     def test_disable_feed(self, logged_in_sync_client):
         response = logged_in_sync_client.patch(
             self.url,
@@ -539,7 +554,7 @@ class TestUpdateFeedView:
         tag_to_delete = TagFactory(user=user, title="Tag to delete")
         self.feed.tags.add(existing_tag, tag_to_delete)
 
-        with django_assert_num_queries(18):
+        with django_assert_num_queries(17):
             response = logged_in_sync_client.patch(
                 self.url,
                 {
@@ -0,0 +1,81 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from legadilo.feeds.models import Feed, FeedUpdate
+from legadilo.reading.models import Article
+from legadilo.users.models import User
+
+
+@pytest.mark.django_db
+class TestBenchmarkFeedUpdatesCommand:
+    @pytest.fixture(autouse=True)
+    def _setup_settings(self, settings):
+        settings.FEED_UPDATE_MIN_INTERVAL_PER_HOST = 0
+
+    def test_benchmark(self):
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_feed_updates",
+            nb_users=2,
+            nb_feeds=4,
+            nb_hosts=2,
+            nb_entries=3,
+            latency=0,
+            stdout=stdout,
+        )
+
+        output = stdout.getvalue()
+        assert "Round 1: 4 feeds in " in output
+        assert "4 updated, 0 not modified, 0 failed, 0 postponed" in output
+        assert "Round 2: 4 feeds in " in output
+        assert "0 updated, 4 not modified, 0 failed, 0 postponed" in output
+        assert "Per feed latency: p50=" in output
+        assert "per feed)" in output
+        assert "Peak RSS: " in output
+        assert User.objects.count() == 0
+        assert Feed.objects.count() == 0
+        assert FeedUpdate.objects.count() == 0
+        assert Article.objects.count() == 0
+
+    def test_benchmark_with_corpus_and_errors(self, tmp_path):
+        (tmp_path / "feed.xml").write_text(
+            '<rss version="2.0"><channel><title>Feed</title><item><title>Article</title>'
+            "<link>https://example.com/article</link></item></channel></rss>",
+            encoding="utf-8",
+        )
+        stdout = StringIO()
+
+        call_command(
+            "benchmark_feed_updates",
+            corpus=tmp_path,
+            nb_users=1,
+            nb_feeds=2,
+            nb_hosts=1,
+            latency=0,
+            error_rate=1,
+            rounds=1,
+            keep_data=True,
+            stdout=stdout,
+        )
+
+        assert "0 updated, 0 not modified, 2 failed" in stdout.getvalue()
+        assert Feed.objects.count() == 2
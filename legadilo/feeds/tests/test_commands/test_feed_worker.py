@@ -0,0 +1,61 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from datetime import UTC, datetime
+
+import pytest
+import time_machine
+from django.core.management import call_command
+
+from legadilo.feeds.models import FeedUpdate
+from legadilo.feeds.tests.factories import FeedFactory
+from legadilo.reading.models import Article
+
+from ... import constants
+from ..fixtures import get_feed_fixture_content
+
+
+@pytest.mark.django_db
+class TestFeedWorkerCommand:
+    @pytest.fixture(autouse=True)
+    def _setup_settings(self, settings):
+        settings.FEED_UPDATE_MIN_INTERVAL_PER_HOST = 0
+
+    def test_no_feed(self):
+        call_command("feed_worker", exit_when_idle=True)
+
+    def test_update_feeds_in_batches(self, httpx_mock):
+        feed_url = "http://example.com/feed/rss.xml"
+        other_feed_url = "http://example.com/feed/atom.xml"
+        feed = FeedFactory(feed_url=feed_url, next_refresh_at=None)
+        other_feed = FeedFactory(feed_url=other_feed_url, next_refresh_at=None)
+        FeedFactory(next_refresh_at=datetime(2024, 1, 1, tzinfo=UTC))
+        httpx_mock.add_response(url=feed_url, content=get_feed_fixture_content("sample_rss.xml"))
+        httpx_mock.add_response(
+            url=other_feed_url, content=get_feed_fixture_content("sample_atom.xml")
+        )
+
+        with time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False):
+            call_command("feed_worker", batch_size=1, exit_when_idle=True)
+
+        assert len(httpx_mock.get_requests()) == 2
+        assert Article.objects.count() == 3
+        assert set(FeedUpdate.objects.values_list("feed_id", "status")) == {
+            (feed.id, constants.FeedUpdateStatus.SUCCESS),
+            (other_feed.id, constants.FeedUpdateStatus.SUCCESS),
+        }
+        feed.refresh_from_db()
+        assert feed.next_refresh_at == datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
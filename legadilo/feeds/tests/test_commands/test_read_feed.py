@@ -0,0 +1,31 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from django.core.management import call_command
+
+from ..fixtures import get_feed_fixture_content
+
+
+def test_read_feed(httpx_mock, capsys):
+    feed_url = "https://example.com/feed.xml"
+    httpx_mock.add_response(url=feed_url, content=get_feed_fixture_content("sample_rss.xml"))
+
+    call_command("read_feed", feed_url, trace_memory=True)
+
+    output = capsys.readouterr().out
+    assert "Peak memory: " in output
+    assert "Feed Sample Feed (rss20)" in output
+    assert "has 1 articles" in output
@@ -14,6 +14,9 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import asyncio
+import hashlib
+import re
 from datetime import UTC, datetime
 from http import HTTPStatus
 
@@ -22,7 +25,7 @@ import pytest
 import time_machine
 from django.core.management import call_command
 
-from legadilo.feeds.models import FeedUpdate
+from legadilo.feeds.models import Feed, FeedArticle, FeedHost, FeedUpdate
 from legadilo.feeds.tests.factories import FeedFactory, FeedUpdateFactory
 from legadilo.reading.models import Article
 from legadilo.users.models import Notification
@@ -34,6 +37,10 @@ from ..fixtures import get_feed_fixture_content
 
 @pytest.mark.django_db
 class TestUpdateFeedsCommand:
+    @pytest.fixture(autouse=True)
+    def _setup_settings(self, settings):
+        settings.FEED_UPDATE_MIN_INTERVAL_PER_HOST = 0
+
     def test_update_feed_command_no_feed(self):
         call_command("update_feeds")
 
@@ -61,8 +68,139 @@ class TestUpdateFeedsCommand:
         assert feed_update.status == constants.FeedUpdateStatus.SUCCESS
         assert not feed_update.feed_etag
         assert feed_update.feed_last_modified is None
+        assert len(feed_update.content_hash) == 64
+        assert feed_update.technical_debug_data is not None
+        assert set(feed_update.technical_debug_data["stage_durations"].keys()) == {
+            "connect",
+            "download",
+            "parse",
+            "build_articles",
+            "save_articles",
+            "associate_tags",
+        }
         assert feed_without_feed_update.feed_updates.count() == 1
 
+    def test_update_feed_command_shared_feed_url(self, httpx_mock, user, other_user):
+        feed_url = "http://example.com/feed/rss.xml"
+        with time_machine.travel(datetime(2023, 12, 30, tzinfo=UTC)):
+            feed_update = FeedUpdateFactory(
+                feed__feed_url=feed_url, feed__user=user, feed_etag="W/etag"
+            )
+            other_feed_update = FeedUpdateFactory(
+                feed__feed_url=feed_url, feed__user=other_user, feed_etag="W/etag"
+            )
+        httpx_mock.add_response(url=feed_url, content=get_feed_fixture_content("sample_rss.xml"))
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        assert len(httpx_mock.get_requests()) == 1
+        assert httpx_mock.get_requests()[0].headers["If-None-Match"] == "W/etag"
+        assert Article.objects.count() == 2
+        assert set(Article.objects.values_list("user_id", flat=True)) == {user.id, other_user.id}
+        assert feed_update.feed.feed_updates.count() == 2
+        assert other_feed_update.feed.feed_updates.count() == 2
+
+    def test_update_feed_command_shared_feed_url_different_etags(
+        self, httpx_mock, user, other_user
+    ):
+        feed_url = "http://example.com/feed/rss.xml"
+        with time_machine.travel(datetime(2023, 12, 30, tzinfo=UTC)):
+            FeedUpdateFactory(feed__feed_url=feed_url, feed__user=user, feed_etag="W/etag")
+            FeedUpdateFactory(
+                feed__feed_url=feed_url, feed__user=other_user, feed_etag="W/other-etag"
+            )
+        httpx_mock.add_response(url=feed_url, content=get_feed_fixture_content("sample_rss.xml"))
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        assert len(httpx_mock.get_requests()) == 1
+        assert "If-None-Match" not in httpx_mock.get_requests()[0].headers
+        assert Article.objects.count() == 2
+
+    def test_update_feed_command_small_byte_budget(self, httpx_mock, settings):
+        settings.FEED_UPDATE_MAX_IN_FLIGHT_BYTES = 1
+        feed_url = "http://example.com/feed/rss.xml"
+        other_feed_url = "http://example.org/feed/atom.xml"
+        FeedFactory(feed_url=feed_url, next_refresh_at=None)
+        FeedFactory(feed_url=other_feed_url, next_refresh_at=None)
+        httpx_mock.add_response(url=feed_url, content=get_feed_fixture_content("sample_rss.xml"))
+        httpx_mock.add_response(
+            url=other_feed_url, content=get_feed_fixture_content("sample_atom.xml")
+        )
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        # Feeds are fetched one after the other but they are all updated.
+        assert FeedUpdate.objects.filter(status=constants.FeedUpdateStatus.SUCCESS).count() == 2
+        assert Article.objects.count() == 3
+
+    def test_update_feed_command_count_queued_feeds_in_byte_budget(
+        self, httpx_mock, settings, mocker
+    ):
+        settings.FEED_UPDATE_MAX_CONCURRENCY = 1
+        settings.FEED_UPDATE_WRITE_BATCH_SIZE = 10
+        settings.FEED_UPDATE_WRITE_FLUSH_INTERVAL = 60
+        feed_url = "http://example.com/feed/rss.xml"
+        other_feed_url = "http://example.org/feed/atom.xml"
+        FeedFactory(feed_url=feed_url, next_refresh_at=None)
+        FeedFactory(feed_url=other_feed_url, next_refresh_at=None)
+        httpx_mock.add_response(url=feed_url, content=get_feed_fixture_content("sample_rss.xml"))
+        httpx_mock.add_response(
+            url=other_feed_url, content=get_feed_fixture_content("sample_atom.xml")
+        )
+        logger = mocker.patch("legadilo.feeds.management.commands.update_feeds.logger")
+
+        with time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False):
+            call_command("update_feeds")
+
+        # Feeds are fetched one after the other, but the first one is still waiting to be saved
+        # when the second one is fetched.
+        byte_budget = logger.info.call_args.args[-1]
+        assert byte_budget.peak_bytes == 2 * constants.FEED_DOWNLOAD_ESTIMATED_SIZE
+        assert byte_budget.in_flight_bytes == 0
+        assert FeedUpdate.objects.filter(status=constants.FeedUpdateStatus.SUCCESS).count() == 2
+
+    def test_update_feed_command_count_polls_saved_by_adaptive_refresh(self, httpx_mock, mocker):
+        feed_url = "http://example.com/feed/rss.xml"
+        with time_machine.travel(datetime(2023, 12, 31, 10, 0, tzinfo=UTC)):
+            FeedUpdateFactory(
+                feed__feed_url=feed_url,
+                feed__refresh_delay=constants.FeedRefreshDelays.ADAPTIVE,
+                feed__next_refresh_at=None,
+            )
+            waiting_feed_update = FeedUpdateFactory(
+                feed__refresh_delay=constants.FeedRefreshDelays.ADAPTIVE,
+                feed__next_refresh_at=datetime(2024, 1, 1, tzinfo=UTC),
+            )
+        with time_machine.travel(datetime(2023, 12, 31, 11, 50, tzinfo=UTC)):
+            recent_feed_update = FeedUpdateFactory(
+                feed__refresh_delay=constants.FeedRefreshDelays.ADAPTIVE,
+                feed__next_refresh_at=datetime(2024, 1, 1, tzinfo=UTC),
+            )
+        for feed_update in (waiting_feed_update, recent_feed_update):
+            Feed.objects.filter(id=feed_update.feed_id).update(latest_feed_update=feed_update)
+        httpx_mock.add_response(url=feed_url, content=get_feed_fixture_content("sample_rss.xml"))
+
+        logger = mocker.patch("legadilo.feeds.management.commands.update_feeds.logger")
+
+        with time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False):
+            call_command("update_feeds")
+
+        # The feed we just updated is not due anymore but it was polled: it's not a saved poll.
+        # Neither is the feed polled 10 minutes ago: an hourly refresh wouldn't have polled it.
+        _, nb_feeds, _, nb_saved_polls, *_ = logger.info.call_args.args
+        assert nb_feeds == 1
+        assert nb_saved_polls == 1
+
     def test_update_feed_command_feed_not_modified(self, httpx_mock, django_assert_num_queries):
         feed_url = "http://example.com/feed/rss.xml"
         with time_machine.travel(datetime(2023, 12, 30, tzinfo=UTC)):
@@ -80,6 +218,49 @@ class TestUpdateFeedsCommand:
         assert feed_update is not None
         assert feed_update.created_at == datetime(2023, 12, 31, 12, 0, tzinfo=UTC)
         assert feed_update.status == constants.FeedUpdateStatus.NOT_MODIFIED
+        assert feed_update.feed.next_refresh_at == datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+
+    def test_update_feed_command_same_content(self, httpx_mock):
+        feed_url = "http://example.com/feed/rss.xml"
+        feed_content = get_feed_fixture_content("sample_rss.xml")
+        with time_machine.travel(datetime(2023, 12, 30, tzinfo=UTC)):
+            FeedUpdateFactory(
+                feed__feed_url=feed_url,
+                content_hash=hashlib.sha256(feed_content.encode()).hexdigest(),
+            )
+        httpx_mock.add_response(url=feed_url, content=feed_content)
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        assert Article.objects.count() == 0
+        assert FeedUpdate.objects.count() == 2
+        feed_update = FeedUpdate.objects.first()
+        assert feed_update is not None
+        assert feed_update.status == constants.FeedUpdateStatus.NOT_MODIFIED
+
+    def test_update_feed_command_skip_unchanged_entries(self, httpx_mock):
+        feed_url = "http://example.com/feed/rss.xml"
+        feed = FeedFactory(feed_url=feed_url)
+        feed_content = get_feed_fixture_content("sample_rss.xml")
+        httpx_mock.add_response(url=feed_url, content=feed_content)
+        httpx_mock.add_response(
+            url=feed_url, content=feed_content.replace("Sample Feed", "Updated Sample Feed")
+        )
+
+        call_command("update_feeds", force=True)
+        feed.refresh_from_db()
+        assert Article.objects.count() == 1
+        assert list(feed.entry_fingerprints.keys()) == ["http://example.org/entry/3"]
+        # Since the entry didn't change, we won't create it again.
+        FeedArticle.objects.all().delete()
+        Article.objects.all().delete()
+        call_command("update_feeds", force=True)
+
+        assert Article.objects.count() == 0
+        assert FeedUpdate.objects.filter(status=constants.FeedUpdateStatus.SUCCESS).count() == 2
 
     def test_update_feed_command_http_error(self, httpx_mock, django_assert_num_queries):
         feed_url = "http://example.com/feed/rss.xml"
@@ -135,3 +316,128 @@ class TestUpdateFeedsCommand:
         assert feed_update.feed.disabled_reason == "We failed too many times to fetch the feed"
         assert feed_update.feed.disabled_at == utcdt(2023, 12, 31, 12)
         assert Notification.objects.count() == 1
+
+    def test_update_feed_command_host_blocked(self, httpx_mock):
+        feed = FeedFactory(feed_url="http://example.com/feed/rss.xml", next_refresh_at=None)
+        FeedHost.objects.create(
+            host="example.com", nb_consecutive_failures=3, blocked_until=utcdt(2023, 12, 31, 13)
+        )
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        assert len(httpx_mock.get_requests()) == 0
+        assert FeedUpdate.objects.count() == 0
+        feed.refresh_from_db()
+        assert feed.next_refresh_at == utcdt(2023, 12, 31, 13)
+
+    def test_update_feed_command_retry_after(self, httpx_mock, settings):
+        settings.FEED_UPDATE_MAX_CONCURRENCY_PER_HOST = 1
+        FeedFactory(feed_url="http://example.com/feed/rss.xml", next_refresh_at=None)
+        FeedFactory(feed_url="http://example.com/feed/atom.xml", next_refresh_at=None)
+        httpx_mock.add_response(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE, headers={"Retry-After": "3600"}
+        )
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        # Once the host asked us to wait, we don't fetch its other feeds.
+        assert len(httpx_mock.get_requests()) == 1
+        feed_update = FeedUpdate.objects.get()
+        assert feed_update.status == constants.FeedUpdateStatus.FAILURE
+        postponed_feed = Feed.objects.exclude(id=feed_update.feed_id).get()
+        assert postponed_feed.next_refresh_at == utcdt(2023, 12, 31, 13)
+        feed_host = FeedHost.objects.get()
+        assert feed_host.host == "example.com"
+        assert feed_host.nb_consecutive_failures == 1
+        assert feed_host.blocked_until == utcdt(2023, 12, 31, 13)
+
+    def test_update_feed_command_unreachable_host(self, httpx_mock):
+        feed_url = "http://example.com/feed/rss.xml"
+        FeedFactory(feed_url=feed_url, next_refresh_at=None)
+        httpx_mock.add_exception(httpx.ConnectError("Connection refused"), url=feed_url)
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        assert FeedUpdate.objects.get().status == constants.FeedUpdateStatus.FAILURE
+        feed_host = FeedHost.objects.get()
+        assert feed_host.nb_consecutive_failures == 1
+        assert feed_host.blocked_until is None
+
+    def test_update_feed_command_host_never_answers(self, httpx_mock, settings):
+        settings.FEED_UPDATE_MAX_CONCURRENCY_PER_HOST = 1
+        settings.RSS_FETCH_TOTAL_TIMEOUT = 0.1
+        FeedFactory(feed_url="http://example.com/feed/rss.xml", next_refresh_at=None)
+        FeedFactory(feed_url="http://example.com/feed/atom.xml", next_refresh_at=None)
+        other_feed = FeedFactory(feed_url="http://example.org/feed/rss.xml", next_refresh_at=None)
+
+        async def hang(request: httpx.Request):
+            await asyncio.sleep(3600)
+
+        httpx_mock.add_callback(hang, url=re.compile(r"http://example\.com/.*"))
+        httpx_mock.add_response(
+            url=other_feed.feed_url, content=get_feed_fixture_content("sample_rss.xml")
+        )
+
+        # The clock must run for the timeout to expire.
+        with time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=True):
+            call_command("update_feeds")
+
+        # We don't wait for the timeout again for the other feed of the host.
+        assert len(httpx_mock.get_requests()) == 2
+        assert FeedUpdate.objects.get(feed=other_feed).status == (
+            constants.FeedUpdateStatus.SUCCESS
+        )
+        feed_update = FeedUpdate.objects.exclude(feed=other_feed).get()
+        assert feed_update.status == constants.FeedUpdateStatus.FAILURE
+        feed_host = FeedHost.objects.get()
+        assert feed_host.host == "example.com"
+        assert feed_host.nb_consecutive_failures == 1
+        assert feed_host.blocked_until is not None
+        assert utcdt(2023, 12, 31, 12, 30) < feed_host.blocked_until < utcdt(2023, 12, 31, 12, 31)
+        postponed_feed = Feed.objects.exclude(id__in=[feed_update.feed_id, other_feed.id]).get()
+        assert postponed_feed.next_refresh_at == feed_host.blocked_until
+
+    def test_update_feed_command_connect_timeout(self, httpx_mock, settings):
+        settings.FEED_UPDATE_MAX_CONCURRENCY_PER_HOST = 1
+        FeedFactory(feed_url="http://example.com/feed/rss.xml", next_refresh_at=None)
+        FeedFactory(feed_url="http://example.com/feed/atom.xml", next_refresh_at=None)
+        httpx_mock.add_exception(httpx.ConnectTimeout("Timed out"))
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        assert len(httpx_mock.get_requests()) == 1
+        feed_update = FeedUpdate.objects.get()
+        assert feed_update.status == constants.FeedUpdateStatus.FAILURE
+        postponed_feed = Feed.objects.exclude(id=feed_update.feed_id).get()
+        assert postponed_feed.next_refresh_at == utcdt(2023, 12, 31, 12, 30)
+        assert FeedHost.objects.get().blocked_until == utcdt(2023, 12, 31, 12, 30)
+
+    def test_update_feed_command_host_recovered(self, httpx_mock):
+        feed_url = "http://example.com/feed/rss.xml"
+        FeedFactory(feed_url=feed_url, next_refresh_at=None)
+        FeedHost.objects.create(
+            host="example.com", nb_consecutive_failures=3, blocked_until=utcdt(2023, 12, 31, 11)
+        )
+        httpx_mock.add_response(url=feed_url, content=get_feed_fixture_content("sample_rss.xml"))
+
+        with (
+            time_machine.travel(datetime(2023, 12, 31, 12, 0, tzinfo=UTC), tick=False),
+        ):
+            call_command("update_feeds")
+
+        assert FeedUpdate.objects.get().status == constants.FeedUpdateStatus.SUCCESS
+        feed_host = FeedHost.objects.get()
+        assert feed_host.nb_consecutive_failures == 0
+        assert feed_host.blocked_until is None
@@ -15,17 +15,23 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import re
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 
 import pytest
 import time_machine
 from asgiref.sync import async_to_sync
 
 from legadilo.core.models import Timezone
-from legadilo.feeds.models import FeedArticle, FeedDeletedArticle, FeedUpdate
+from legadilo.feeds.models import (
+    FeedArticle,
+    FeedDeletedArticle,
+    FeedHubSubscription,
+    FeedUpdate,
+)
 from legadilo.feeds.services.feed_parsing import ArticleData, FeedData
 from legadilo.feeds.tests.factories import (
     FeedCategoryFactory,
+    FeedDataFactory,
     FeedFactory,
     FeedUpdateFactory,
 )
@@ -81,125 +87,59 @@ class TestFeedQuerySet:
         assert list(feeds) == [feed]
 
     @time_machine.travel("2024-05-08 10:00:00")
-    def test_for_update(self, user):
-        feed_updated_more_than_one_hour_ago = FeedFactory(
-            title="Updated more than one hour ago",
-            user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.HOURLY,
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_for_update(self, user, other_user):
+        feed_to_refresh = FeedFactory(
+            title="Must be refreshed", user=user, next_refresh_at=utcdt(2024, 5, 8, 9)
         )
-        with time_machine.travel("2024-05-08 09:00:00"):
-            FeedUpdateFactory(feed=feed_updated_more_than_one_hour_ago)
-        disabled_feed_updated_more_than_one_hour_ago = FeedFactory(
+        feed_to_refresh_now = FeedFactory(
+            title="Must be refreshed now", user=user, next_refresh_at=utcdt(2024, 5, 8, 10)
+        )
+        FeedFactory(
             title="Disabled feed",
             user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.HOURLY,
+            next_refresh_at=utcdt(2024, 5, 8, 9),
             disabled_at=utcnow(),
         )
-        with time_machine.travel("2024-05-08 09:00:00"):
-            FeedUpdateFactory(feed=disabled_feed_updated_more_than_one_hour_ago)
-        feed_updated_less_than_one_hour_ago = FeedFactory(
-            title="Updated less than one hour ago",
-            user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.HOURLY,
-        )
-        with time_machine.travel("2024-05-08 07:30:00"):
-            FeedUpdateFactory(feed=feed_updated_less_than_one_hour_ago)
-        with time_machine.travel("2024-05-08 09:30:00"):
-            FeedUpdateFactory(feed=feed_updated_less_than_one_hour_ago)
-        feed_updated_this_morning = FeedFactory(
-            title="Updated this morning",
-            user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.EVERY_MORNING,
-        )
-        with time_machine.travel("2024-05-07 09:00:00"):
-            FeedUpdateFactory(feed=feed_updated_this_morning)
-        with time_machine.travel("2024-05-08 09:00:00"):
-            FeedUpdateFactory(feed=feed_updated_this_morning)
-        feed_not_yet_updated_this_morning = FeedFactory(
-            title="Not yet updated this morning",
-            user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.EVERY_MORNING,
+        FeedFactory(title="Refreshed later", user=user, next_refresh_at=utcdt(2024, 5, 8, 11))
+        feed_never_refreshed = FeedFactory(title="Never refreshed", user=user, next_refresh_at=None)
+        feed_of_other_user = FeedFactory(
+            title="Other user", user=other_user, next_refresh_at=utcdt(2024, 5, 7, 9)
         )
-        with time_machine.travel("2024-05-07 09:00:00"):
-            FeedUpdateFactory(feed=feed_not_yet_updated_this_morning)
 
-        feed_no_feed_update_object = FeedFactory(
-            title="Not yet updated this morning",
-            user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.EVERY_MORNING,
-        )
-
-        feeds_to_update = Feed.objects.get_queryset().for_update(user)
+        feeds_to_update = Feed.objects.get_queryset().for_update().order_by("id")
 
         assert list(feeds_to_update) == [
-            feed_updated_more_than_one_hour_ago,
-            feed_not_yet_updated_this_morning,
-            feed_no_feed_update_object,
+            feed_to_refresh,
+            feed_to_refresh_now,
+            feed_never_refreshed,
+            feed_of_other_user,
         ]
 
-    @time_machine.travel("2024-05-08 10:00:00")
-    def test_for_update_non_utc_user_nothing_to_update(self, user):
-        user.settings.timezone, _ = Timezone.objects.get_or_create(name="Europe/Paris")
-        user.settings.save()
-
-        feed_updated_more_than_one_hour_ago = FeedFactory(
-            title="Updated more than one hour ago",
-            user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.HOURLY,
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_for_update_with_websub_lease(self, user):
+        feed_pushed_by_hub = FeedFactory(
+            user=user, feed_url="https://example.com/pushed.xml", next_refresh_at=None
         )
-        with time_machine.travel("2024-05-08 09:00:00"):
-            FeedUpdateFactory(feed=feed_updated_more_than_one_hour_ago)
-        feed_not_yet_updated_this_morning = FeedFactory(
-            title="Not yet updated this morning",
-            user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.EVERY_MORNING,
-        )
-        with time_machine.travel("2024-05-07 09:00:00"):
-            FeedUpdateFactory(feed=feed_not_yet_updated_this_morning)
-
-        # Morning feed update time passed in user TZ (but not in UTC).
-        feeds_to_update = Feed.objects.get_queryset().for_update(user)
-
-        assert list(feeds_to_update) == [
-            feed_updated_more_than_one_hour_ago,
-        ]
-
-    @time_machine.travel("2024-05-08 08:00:00")
-    def test_for_update_non_utc_user(self, user):
-        user.settings.timezone, _ = Timezone.objects.get_or_create(name="Europe/Paris")
-        user.settings.save()
-
-        feed_not_yet_updated_this_morning = FeedFactory(
-            title="Not yet updated this morning",
-            user=user,
-            refresh_delay=feeds_constants.FeedRefreshDelays.EVERY_MORNING,
+        FeedHubSubscription.objects.create(
+            feed_url=feed_pushed_by_hub.feed_url,
+            hub_url="https://hub.example.com/",
+            topic_url=feed_pushed_by_hub.feed_url,
+            lease_expires_at=utcdt(2024, 5, 12),
         )
-        with time_machine.travel("2024-05-07 09:00:00"):
-            FeedUpdateFactory(feed=feed_not_yet_updated_this_morning)
-
-        # Morning feed can be updated in user TZ (although not yet in UTC).
-        feeds_to_update = Feed.objects.get_queryset().for_update(user)
-
-        assert list(feeds_to_update) == [
-            feed_not_yet_updated_this_morning,
-        ]
-
-    @time_machine.travel("2024-05-08 13:00:00")
-    def test_for_update_not_morning(self, user):
-        feed_updated_this_morning = FeedFactory(
-            user=user, refresh_delay=feeds_constants.FeedRefreshDelays.EVERY_MORNING
+        feed_to_renew = FeedFactory(
+            user=user, feed_url="https://example.com/renew.xml", next_refresh_at=None
         )
-        with time_machine.travel("2024-05-08 10:00:00"):
-            FeedUpdateFactory(feed=feed_updated_this_morning)
-        feed_not_yet_updated_this_morning = FeedFactory(
-            user=user, refresh_delay=feeds_constants.FeedRefreshDelays.EVERY_MORNING
+        FeedHubSubscription.objects.create(
+            feed_url=feed_to_renew.feed_url,
+            hub_url="https://hub.example.com/",
+            topic_url=feed_to_renew.feed_url,
+            lease_expires_at=utcdt(2024, 5, 8, 20),
         )
-        with time_machine.travel("2024-05-07 10:00:00"):
-            FeedUpdateFactory(feed=feed_not_yet_updated_this_morning)
 
-        feeds_to_update = Feed.objects.get_queryset().for_update(user)
+        feeds_to_update = list(Feed.objects.get_queryset().for_update())
 
-        assert list(feeds_to_update) == []
+        assert feeds_to_update == [feed_to_renew]
 
     def test_only_with_ids(self):
         feed1 = FeedFactory(disabled_at=None)
@@ -299,6 +239,142 @@ class TestFeedManager:
 
         assert list(articles_qs) == [article_of_feed]
 
+    def _add_articles_published_every(self, user, delay: timedelta, nb_articles: int = 5):
+        for i in range(nb_articles):
+            article = ArticleFactory(user=user, published_at=utcdt(2024, 5, 1) + i * delay)
+            FeedArticle.objects.create(feed=self.feed, article=article)
+
+    def test_get_adaptive_refresh_delay_no_history(self):
+        assert Feed.objects.get_adaptive_refresh_delay(self.feed) == timedelta(days=1)
+
+    def test_get_adaptive_refresh_delay(self, user):
+        self._add_articles_published_every(user, timedelta(hours=6))
+        FeedUpdateFactory(feed=self.feed, status=feeds_constants.FeedUpdateStatus.SUCCESS)
+
+        assert Feed.objects.get_adaptive_refresh_delay(self.feed) == timedelta(hours=6)
+
+    def test_get_adaptive_refresh_delay_back_off_when_not_modified(self, user):
+        self._add_articles_published_every(user, timedelta(hours=6))
+        with time_machine.travel("2024-05-08 09:00:00"):
+            FeedUpdateFactory(feed=self.feed, status=feeds_constants.FeedUpdateStatus.SUCCESS)
+        with time_machine.travel("2024-05-08 15:00:00"):
+            FeedUpdateFactory(feed=self.feed, status=feeds_constants.FeedUpdateStatus.NOT_MODIFIED)
+        with time_machine.travel("2024-05-09 03:00:00"):
+            FeedUpdateFactory(feed=self.feed, status=feeds_constants.FeedUpdateStatus.NOT_MODIFIED)
+
+        assert Feed.objects.get_adaptive_refresh_delay(self.feed) == timedelta(days=1)
+
+    @pytest.mark.parametrize(
+        ("publication_delay", "expected_refresh_delay"),
+        [
+            pytest.param(timedelta(minutes=5), timedelta(minutes=45), id="min-delay"),
+            pytest.param(timedelta(days=30), timedelta(days=7), id="max-delay"),
+        ],
+    )
+    def test_get_adaptive_refresh_delay_bounds(
+        self, user, publication_delay, expected_refresh_delay
+    ):
+        self._add_articles_published_every(user, publication_delay)
+
+        assert Feed.objects.get_adaptive_refresh_delay(self.feed) == expected_refresh_delay
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_claim_for_update(self, user, django_assert_num_queries):
+        self.feed.next_refresh_at = utcdt(2024, 5, 8, 9)
+        self.feed.save()
+        feed_never_refreshed = FeedFactory(user=user, next_refresh_at=None)
+        FeedFactory(user=user, next_refresh_at=utcdt(2024, 5, 8, 11))
+        FeedFactory(user=user, next_refresh_at=None, disabled_at=utcnow())
+
+        with django_assert_num_queries(5):
+            claimed_feeds = Feed.objects.claim_for_update(1, timedelta(minutes=15))
+
+        assert claimed_feeds == [feed_never_refreshed]
+        feed_never_refreshed.refresh_from_db()
+        assert feed_never_refreshed.next_refresh_at == utcdt(2024, 5, 8, 10, 15)
+        assert Feed.objects.claim_for_update(10, timedelta(minutes=15)) == [self.feed]
+        assert Feed.objects.claim_for_update(10, timedelta(minutes=15)) == []
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_claim_for_update_feeds_with_same_url(self, user, other_user):
+        self.feed.next_refresh_at = utcdt(2024, 5, 8, 11)
+        self.feed.save()
+        feed_never_refreshed = FeedFactory(
+            user=user, feed_url="https://example.com/shared.xml", next_refresh_at=None
+        )
+        FeedFactory(user=user, next_refresh_at=utcdt(2024, 5, 8, 8))
+        other_user_feed = FeedFactory(
+            user=other_user,
+            feed_url="https://example.com/shared.xml",
+            next_refresh_at=utcdt(2024, 5, 8, 9),
+        )
+        FeedFactory(
+            user=UserFactory(),
+            feed_url="https://example.com/shared.xml",
+            next_refresh_at=utcdt(2024, 5, 8, 11),
+        )
+
+        claimed_feeds = Feed.objects.claim_for_update(1, timedelta(minutes=15))
+
+        assert claimed_feeds == [feed_never_refreshed, other_user_feed]
+        other_user_feed.refresh_from_db()
+        assert other_user_feed.next_refresh_at == utcdt(2024, 5, 8, 10, 15)
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_request_refresh(self, user, other_user, settings, django_assert_num_queries):
+        settings.FEED_REFRESH_ON_READING_LIST_VIEW = True
+        user.date_joined = utcdt(2024, 5, 1)
+        self.feed.next_refresh_at = utcdt(2024, 5, 8, 9)
+        self.feed.save()
+        later_feed = FeedFactory(user=user, next_refresh_at=utcdt(2024, 5, 8, 11))
+        disabled_feed = FeedFactory(
+            user=user, next_refresh_at=utcdt(2024, 5, 8, 9), disabled_at=utcnow()
+        )
+        other_user_feed = FeedFactory(user=other_user, next_refresh_at=utcdt(2024, 5, 8, 9))
+
+        with django_assert_num_queries(1):
+            nb_feeds = Feed.objects.request_refresh(user)
+
+        assert nb_feeds == 1
+        self.feed.refresh_from_db()
+        assert self.feed.next_refresh_at is None
+        later_feed.refresh_from_db()
+        assert later_feed.next_refresh_at == utcdt(2024, 5, 8, 11)
+        disabled_feed.refresh_from_db()
+        assert disabled_feed.next_refresh_at == utcdt(2024, 5, 8, 9)
+        other_user_feed.refresh_from_db()
+        assert other_user_feed.next_refresh_at == utcdt(2024, 5, 8, 9)
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_request_refresh_without_feed_workers(self, user, django_assert_num_queries):
+        user.date_joined = utcdt(2024, 5, 1)
+        self.feed.next_refresh_at = utcdt(2024, 5, 8, 9)
+        self.feed.save()
+
+        # The feed is due: update_feeds will refresh it on its next run.
+        with django_assert_num_queries(0):
+            nb_feeds = Feed.objects.request_refresh(user)
+
+        assert nb_feeds == 0
+        self.feed.refresh_from_db()
+        assert self.feed.next_refresh_at == utcdt(2024, 5, 8, 9)
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_request_refresh_when_user_was_away(self, user):
+        user.date_joined = utcdt(2024, 1, 1)
+        user.last_login = utcdt(2024, 4, 1)
+        self.feed.next_refresh_at = utcdt(2024, 5, 8, 21)
+        self.feed.save()
+        weekly_feed = FeedFactory(user=user, next_refresh_at=utcdt(2024, 5, 13))
+
+        nb_feeds = Feed.objects.request_refresh(user)
+
+        assert nb_feeds == 1
+        self.feed.refresh_from_db()
+        assert self.feed.next_refresh_at is None
+        weekly_feed.refresh_from_db()
+        assert weekly_feed.next_refresh_at == utcdt(2024, 5, 13)
+
     def test_recreate_feed_from_data_on_active_feed(self, user, django_assert_num_queries):
         existing_feed = FeedFactory(user=user, disabled_at=None)
 
@@ -331,7 +407,7 @@ class TestFeedManager:
             feed_url=ONE_ARTICLE_FEED_DATA.feed_url, user=user, disabled_at=utcnow()
         )
 
-        with django_assert_num_queries(16):
+        with django_assert_num_queries(19):
             feed, created = Feed.objects.create_from_metadata(
                 ONE_ARTICLE_FEED_DATA,
                 user,
@@ -347,7 +423,7 @@ class TestFeedManager:
         assert feed.feed_updates.count() == 1
 
     def test_create_from_feed_data(self, user, django_assert_num_queries):
-        with django_assert_num_queries(16):
+        with django_assert_num_queries(18):
             feed, created = Feed.objects.create_from_metadata(
                 FeedData(
                     feed_url="https://example.com/feeds/atom.xml",
@@ -409,7 +485,7 @@ class TestFeedManager:
     def test_create_from_metadata_with_tags(self, user, django_assert_num_queries):
         tag = TagFactory()
 
-        with django_assert_num_queries(19):
+        with django_assert_num_queries(20):
             feed, _ = Feed.objects.create_from_metadata(
                 ONE_ARTICLE_FEED_DATA,
                 user,
@@ -473,6 +549,7 @@ class TestFeedManager:
         feed_update = self.feed.feed_updates.last()
         assert feed_update.status == feeds_constants.FeedUpdateStatus.FAILURE
         assert feed_update.error_message == "Something went wrong"
+        assert self.feed.latest_feed_update == feed_update
         notification = Notification.objects.get()
         assert not notification.is_read
         assert notification.title == f"Feed '{self.feed.title}' was disabled"
@@ -489,7 +566,7 @@ class TestFeedManager:
         )
         FeedArticle.objects.create(feed=self.feed, article=existing_article)
 
-        with django_assert_num_queries(11):
+        with django_assert_num_queries(12):
             Feed.objects.update_feed(
                 self.feed,
                 FeedData(
@@ -552,8 +629,12 @@ class TestFeedManager:
     def test_update_feed_with_deleted_articles(self, django_assert_num_queries):
         deleted_link = "https://example.com/deleted/"
         FeedDeletedArticle.objects.create(article_link=deleted_link, feed=self.feed)
+        # Not in the feed anymore: it must not be listed in the ignored links.
+        FeedDeletedArticle.objects.create(
+            article_link="https://example.com/old-deleted/", feed=self.feed
+        )
 
-        with django_assert_num_queries(10):
+        with django_assert_num_queries(12):
             Feed.objects.update_feed(
                 self.feed,
                 FeedData(
@@ -611,27 +692,63 @@ class TestFeedManager:
         assert feed_update.status == feeds_constants.FeedUpdateStatus.SUCCESS
         assert feed_update.ignored_article_links == [deleted_link]
 
-    def test_get_feed_update_for_cleanup(self):
+    def test_update_feeds(self, user, mocker, django_assert_num_queries):
+        other_feed = FeedFactory(id=2, user=user)
+        failing_feed = FeedFactory(id=3, user=user)
+        mocker.patch.object(
+            Article.objects,
+            "update_or_create_from_articles_list",
+            side_effect=[[], [], ValueError("Cannot save articles")],
+        )
+
+        with django_assert_num_queries(11):
+            failures = Feed.objects.update_feeds([
+                (self.feed, FeedDataFactory(etag="W/etag")),
+                (other_feed, FeedDataFactory(entry_fingerprints={"id": "hash"})),
+                (failing_feed, FeedDataFactory()),
+            ])
+
+        assert failures == [(failing_feed, mocker.ANY)]
+        assert str(failures[0][1]) == "Cannot save articles"
+        assert list(
+            FeedUpdate.objects.order_by("feed_id").values_list("feed_id", "status", "feed_etag")
+        ) == [
+            (self.feed.id, feeds_constants.FeedUpdateStatus.SUCCESS, "W/etag"),
+            (other_feed.id, feeds_constants.FeedUpdateStatus.SUCCESS, ""),
+        ]
+        other_feed.refresh_from_db()
+        assert other_feed.entry_fingerprints == {"id": "hash"}
+        assert other_feed.next_refresh_at is not None
+        assert other_feed.latest_feed_update == FeedUpdate.objects.get(feed=other_feed)
+        failing_feed.refresh_from_db()
+        assert failing_feed.next_refresh_at is None
+        assert failing_feed.latest_feed_update is None
+
+    def test_cleanup_feed_updates(self):
         feed = FeedFactory()
         other_feed = FeedFactory()
         with time_machine.travel("2024-03-15 12:00:00"):
-            feed_update_to_cleanup = FeedUpdateFactory(feed=feed)
+            FeedUpdateFactory(feed=feed)
             # We only have this one, let's keep it.
-            FeedUpdateFactory()
+            only_feed_update = FeedUpdateFactory()
+        only_feed_update.feed.latest_feed_update = only_feed_update
+        only_feed_update.feed.save()
 
         with time_machine.travel("2024-05-01 12:00:00"):
-            FeedUpdateFactory(feed=feed)
-            FeedUpdateFactory(feed=other_feed)  # Too recent.
-
-        with time_machine.travel("2024-05-03 12:00:00"):
-            FeedUpdateFactory(feed=other_feed)  # Too recent.
+            latest_feed_update = FeedUpdateFactory(feed=feed)
+            other_feed_update = FeedUpdateFactory(feed=other_feed)  # Too recent.
+        feed.latest_feed_update = latest_feed_update
+        feed.save()
 
         with time_machine.travel("2024-06-01 12:00:00"):
-            feed_updates_to_cleanup = Feed.objects.get_feed_update_for_cleanup()
+            _, nb_deleted = Feed.objects.cleanup_feed_updates()
 
-        assert list(feed_updates_to_cleanup) == [
-            feed_update_to_cleanup,
-        ]
+        assert nb_deleted == 1
+        assert set(FeedUpdate.objects.all()) == {
+            only_feed_update,
+            latest_feed_update,
+            other_feed_update,
+        }
 
     def test_export(self, user, other_user, snapshot, django_assert_num_queries):
         feed_category = FeedCategoryFactory(user=user, id=1, title="Some category")
@@ -656,6 +773,130 @@ class TestFeedManager:
 
 
 class TestFeedModel:
+    @pytest.mark.parametrize(
+        ("refresh_delay", "now", "timezone", "expected_next_refresh_at"),
+        [
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.HOURLY,
+                utcdt(2024, 5, 8, 9),
+                "UTC",
+                utcdt(2024, 5, 8, 9, 45),
+                id="hourly",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.BIHOURLY,
+                utcdt(2024, 5, 8, 9),
+                "UTC",
+                utcdt(2024, 5, 8, 10, 45),
+                id="bihourly",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.EVERY_MORNING,
+                utcdt(2024, 5, 8, 7),
+                "UTC",
+                utcdt(2024, 5, 8, 8),
+                id="every-morning-before-morning",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.EVERY_MORNING,
+                utcdt(2024, 5, 8, 8),
+                "UTC",
+                utcdt(2024, 5, 9, 8),
+                id="every-morning-in-the-morning",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.EVERY_MORNING,
+                utcdt(2024, 5, 8, 7),
+                "Europe/Paris",
+                utcdt(2024, 5, 9, 6),
+                id="every-morning-non-utc-user",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.DAILY_AT_NOON,
+                utcdt(2024, 5, 8, 13),
+                "UTC",
+                utcdt(2024, 5, 9, 12),
+                id="daily-at-noon",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.EVERY_EVENING,
+                utcdt(2024, 5, 8, 13),
+                "America/New_York",
+                utcdt(2024, 5, 9, 0),
+                id="every-evening-non-utc-user",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.ON_MONDAYS,
+                utcdt(2024, 5, 8, 13),
+                "UTC",
+                utcdt(2024, 5, 13),
+                id="on-mondays",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.TWICE_A_WEEK,
+                utcdt(2024, 5, 8, 13),
+                "UTC",
+                utcdt(2024, 5, 9),
+                id="twice-a-week",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.FIRST_DAY_OF_THE_MONTH,
+                utcdt(2024, 5, 1, 13),
+                "UTC",
+                utcdt(2024, 6, 1),
+                id="first-day-of-the-month",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.END_OF_THE_MONTH,
+                utcdt(2024, 2, 3),
+                "UTC",
+                utcdt(2024, 2, 29),
+                id="end-of-the-month",
+            ),
+            pytest.param(
+                feeds_constants.FeedRefreshDelays.THRICE_A_MONTH,
+                utcdt(2024, 5, 15, 10),
+                "UTC",
+                utcdt(2024, 5, 31),
+                id="thrice-a-month",
+            ),
+        ],
+    )
+    def test_schedule_next_refresh(
+        self, user, refresh_delay, now, timezone, expected_next_refresh_at
+    ):
+        user.settings.timezone, _ = Timezone.objects.get_or_create(name=timezone)
+        user.settings.save()
+        feed = FeedFactory(user=user, refresh_delay=refresh_delay)
+
+        with time_machine.travel(now, tick=False):
+            feed.schedule_next_refresh()
+
+        assert feed.next_refresh_at == expected_next_refresh_at
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_schedule_next_adaptive_refresh(self, user):
+        feed = FeedFactory(user=user, refresh_delay=feeds_constants.FeedRefreshDelays.ADAPTIVE)
+
+        feed.schedule_next_refresh()
+
+        assert feed.next_refresh_at == utcdt(2024, 5, 9, 10)
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_schedule_next_refresh_when_user_is_away(self, user):
+        user.date_joined = utcdt(2024, 1, 1)
+        user.last_seen_at = utcdt(2024, 4, 1)
+        hourly_feed = FeedFactory(user=user, refresh_delay=feeds_constants.FeedRefreshDelays.HOURLY)
+        weekly_feed = FeedFactory(
+            user=user, refresh_delay=feeds_constants.FeedRefreshDelays.ON_MONDAYS
+        )
+
+        hourly_feed.schedule_next_refresh()
+        weekly_feed.schedule_next_refresh()
+
+        assert hourly_feed.next_refresh_at == utcdt(2024, 5, 9, 10)
+        assert weekly_feed.next_refresh_at == utcdt(2024, 5, 13)
+
     def test_disable(self):
         feed = FeedFactory.build(disabled_at=None, disabled_reason="")
 
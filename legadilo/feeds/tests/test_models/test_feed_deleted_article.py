@@ -28,22 +28,41 @@ class TestFeedDeletedArticleManager:
     def _setup_data(self):
         pass
 
-    def test_list_deleted_for_feed(self):
+    def test_list_deleted_for_feed(self, django_assert_num_queries):
         feed = FeedFactory()
         deleted1 = FeedDeletedArticleFactory(feed=feed)
-        deleted2 = FeedDeletedArticleFactory(feed=feed)
-        FeedDeletedArticleFactory()
+        FeedDeletedArticleFactory(feed=feed)
+        other_feed_deleted = FeedDeletedArticleFactory()
 
-        all_deleted = FeedDeletedArticle.objects.list_deleted_for_feed(feed)
+        with django_assert_num_queries(1):
+            deleted = FeedDeletedArticle.objects.list_deleted_for_feed(
+                feed,
+                [
+                    deleted1.article_link,
+                    other_feed_deleted.article_link,
+                    "https://example.com/articles/not-deleted.html",
+                ],
+            )
 
-        assert all_deleted == {deleted1.article_link, deleted2.article_link}
+        assert deleted == {deleted1.article_link}
 
     def test_list_deleted_for_feed_nothing_deleted(self):
         feed = FeedFactory()
 
-        all_deleted = FeedDeletedArticle.objects.list_deleted_for_feed(feed)
+        deleted = FeedDeletedArticle.objects.list_deleted_for_feed(
+            feed, ["https://example.com/articles/1.html"]
+        )
 
-        assert list(all_deleted) == []
+        assert deleted == set()
+
+    def test_list_deleted_for_feed_no_links(self, django_assert_num_queries):
+        feed = FeedFactory()
+        FeedDeletedArticleFactory(feed=feed)
+
+        with django_assert_num_queries(0):
+            deleted = FeedDeletedArticle.objects.list_deleted_for_feed(feed, [])
+
+        assert deleted == set()
 
     def test_delete_article_not_linked_to_feed(self):
         article = ArticleFactory()
@@ -0,0 +1,83 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from datetime import timedelta
+
+import pytest
+import time_machine
+from asgiref.sync import async_to_sync
+
+from legadilo.feeds.models import FeedHost
+from legadilo.utils.time_utils import utcdt
+
+
+@pytest.mark.django_db
+class TestFeedHostManager:
+    def test_get_unhealthy_by_host(self):
+        unhealthy_host = FeedHost.objects.create(host="example.com", nb_consecutive_failures=1)
+        FeedHost.objects.create(host="example.org", nb_consecutive_failures=0)
+        FeedHost.objects.create(host="example.net", nb_consecutive_failures=2)
+
+        feed_hosts = async_to_sync(FeedHost.objects.get_unhealthy_by_host)([
+            "example.com",
+            "example.org",
+            "unknown.com",
+        ])
+
+        assert feed_hosts == {"example.com": unhealthy_host}
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_log_failure(self):
+        feed_host = FeedHost.objects.log_failure("example.com")
+        assert feed_host.nb_consecutive_failures == 1
+        assert feed_host.last_failure_at == utcdt(2024, 5, 8, 10)
+        assert feed_host.blocked_until is None
+        assert not feed_host.is_blocked
+
+        FeedHost.objects.log_failure("example.com")
+        feed_host = FeedHost.objects.log_failure("example.com")
+        assert feed_host.nb_consecutive_failures == 3
+        assert feed_host.blocked_until == utcdt(2024, 5, 8, 10, 30)
+        assert feed_host.is_blocked
+
+        feed_host = FeedHost.objects.log_failure("example.com")
+        assert feed_host.blocked_until == utcdt(2024, 5, 8, 11)
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_log_failure_max_cooldown(self):
+        FeedHost.objects.create(host="example.com", nb_consecutive_failures=1_000)
+
+        feed_host = FeedHost.objects.log_failure("example.com")
+
+        assert feed_host.blocked_until == utcdt(2024, 5, 9, 10)
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_log_failure_with_retry_after(self):
+        feed_host = FeedHost.objects.log_failure("example.com", retry_after=timedelta(hours=2))
+
+        assert feed_host.nb_consecutive_failures == 1
+        assert feed_host.blocked_until == utcdt(2024, 5, 8, 12)
+
+    def test_log_success(self):
+        FeedHost.objects.create(
+            host="example.com", nb_consecutive_failures=5, blocked_until=utcdt(2024, 5, 8, 12)
+        )
+
+        FeedHost.objects.log_success("example.com")
+
+        feed_host = FeedHost.objects.get(host="example.com")
+        assert feed_host.nb_consecutive_failures == 0
+        assert feed_host.blocked_until is None
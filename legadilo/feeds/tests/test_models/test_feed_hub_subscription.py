@@ -0,0 +1,127 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import hmac
+
+import pytest
+import time_machine
+
+from legadilo.feeds.models import FeedHubSubscription
+from legadilo.utils.time_utils import utcdt
+
+FEED_URL = "https://example.com/feed.xml"
+HUB_URL = "https://hub.example.com/"
+
+
+@pytest.mark.django_db
+class TestFeedHubSubscriptionManager:
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_prepare_new_subscription(self):
+        subscription = FeedHubSubscription.objects.prepare_subscription(
+            FEED_URL, hub_url=HUB_URL, topic_url=FEED_URL
+        )
+
+        assert subscription is not None
+        assert subscription.hub_url == HUB_URL
+        assert subscription.topic_url == FEED_URL
+        assert subscription.subscription_requested_at == utcdt(2024, 5, 8, 10)
+        assert len(subscription.secret) == 64
+
+    @pytest.mark.parametrize(
+        ("subscription_data", "hub_url", "must_subscribe"),
+        [
+            pytest.param(
+                {"subscription_requested_at": utcdt(2024, 5, 8, 9, 30)},
+                HUB_URL,
+                False,
+                id="pending",
+            ),
+            pytest.param(
+                {"subscription_requested_at": utcdt(2024, 5, 8, 8)},
+                HUB_URL,
+                True,
+                id="never-verified",
+            ),
+            pytest.param(
+                {"lease_expires_at": utcdt(2024, 5, 12)},
+                HUB_URL,
+                False,
+                id="active-lease",
+            ),
+            pytest.param(
+                {"lease_expires_at": utcdt(2024, 5, 8, 20)},
+                HUB_URL,
+                True,
+                id="lease-to-renew",
+            ),
+            pytest.param(
+                {"lease_expires_at": utcdt(2024, 5, 12)},
+                "https://other-hub.example.com/",
+                True,
+                id="hub-changed",
+            ),
+        ],
+    )
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_prepare_existing_subscription(self, subscription_data, hub_url, must_subscribe):
+        FeedHubSubscription.objects.create(
+            feed_url=FEED_URL, hub_url=HUB_URL, topic_url=FEED_URL, **subscription_data
+        )
+
+        subscription = FeedHubSubscription.objects.prepare_subscription(
+            FEED_URL, hub_url=hub_url, topic_url=FEED_URL
+        )
+
+        assert (subscription is not None) == must_subscribe
+        assert FeedHubSubscription.objects.get().hub_url == hub_url
+
+
+class TestFeedHubSubscriptionModel:
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_confirm(self):
+        subscription = FeedHubSubscription()
+
+        subscription.confirm(None)
+        assert subscription.lease_expires_at == utcdt(2024, 5, 18, 10)
+
+        subscription.confirm(3600)
+        assert subscription.lease_expires_at == utcdt(2024, 5, 8, 11)
+
+    @pytest.mark.parametrize("algorithm", ["sha1", "sha256", "sha512"])
+    def test_signature_valid(self, algorithm):
+        subscription = FeedHubSubscription(secret="some-secret")
+        content = b"Some content"
+        digest = hmac.new(b"some-secret", content, algorithm).hexdigest()
+
+        assert subscription.is_signature_valid(content, f"{algorithm}={digest}")
+
+    @pytest.mark.parametrize(
+        "signature",
+        [
+            pytest.param("", id="empty"),
+            pytest.param("sha256=", id="no-digest"),
+            pytest.param("md5=" + hashlib.md5(b"Some content").hexdigest(), id="md5"),  # noqa: S324
+            pytest.param(
+                "sha256=" + hmac.new(b"wrong-secret", b"Some content", "sha256").hexdigest(),
+                id="wrong-secret",
+            ),
+        ],
+    )
+    def test_signature_invalid(self, signature):
+        subscription = FeedHubSubscription(secret="some-secret")
+
+        assert not subscription.is_signature_valid(b"Some content", signature)
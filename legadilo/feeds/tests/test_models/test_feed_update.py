@@ -19,8 +19,11 @@ from datetime import UTC, datetime
 import pytest
 import time_machine
 from asgiref.sync import async_to_sync
+from django.db import connection
 
-from legadilo.feeds.models import FeedUpdate
+from legadilo.feeds.models import Feed, FeedUpdate
+from legadilo.feeds.models.feed_update import FeedUpdateManager
+from legadilo.utils.time_utils import utcdt
 
 from ... import constants
 from ..factories import FeedFactory, FeedUpdateFactory
@@ -55,17 +58,83 @@ class TestFeedUpdateQuerySet:
         with time_machine.travel("2024-05-03 12:00:00"):
             FeedUpdateFactory(feed=other_feed)  # Too recent.
 
-        with time_machine.travel("2024-06-01 12:00:00"):
-            feed_updates_to_cleanup = FeedUpdate.objects.get_queryset().for_cleanup({
-                None,
-                only_feed_update_for_feed.id,
-            })
+        only_feed_update_for_feed.feed.latest_feed_update = only_feed_update_for_feed
+        only_feed_update_for_feed.feed.save()
+
+        feed_updates_to_cleanup = FeedUpdate.objects.get_queryset().for_cleanup(
+            Feed.objects.filter(latest_feed_update__isnull=False).values("latest_feed_update_id"),
+            before=utcdt(2024, 4, 1),
+        )
 
         assert list(feed_updates_to_cleanup) == [feed_update_to_cleanup]
 
 
+def _get_partition(feed_update: FeedUpdate) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT tableoid::regclass::text FROM feeds_feedupdate WHERE id = %s", [feed_update.id]
+        )
+        return cursor.fetchone()[0]
+
+
 @pytest.mark.django_db
 class TestFeedUpdateManager:
+    def test_create_partitions(self):
+        with time_machine.travel("2030-01-15 12:00:00", tick=False):
+            feed_update = FeedUpdateFactory()
+            assert _get_partition(feed_update) == "feeds_feedupdate_default"
+
+            created_partitions = FeedUpdate.objects.create_partitions()
+
+            assert created_partitions == [
+                "feeds_feedupdate_p2030_01",
+                "feeds_feedupdate_p2030_02",
+                "feeds_feedupdate_p2030_03",
+                "feeds_feedupdate_p2030_04",
+            ]
+            assert _get_partition(feed_update) == "feeds_feedupdate_p2030_01"
+            assert FeedUpdate.objects.create_partitions() == []
+            assert _get_partition(FeedUpdateFactory()) == "feeds_feedupdate_p2030_01"
+
+    def test_create_partitions_created_concurrently(self, mocker):
+        with time_machine.travel("2030-01-15 12:00:00", tick=False):
+            FeedUpdate.objects.create_partitions()
+            # Another process listed the partitions before we created them.
+            mocker.patch.object(FeedUpdateManager, "_get_partitions", return_value={})
+
+            assert FeedUpdate.objects.create_partitions() == []
+
+    def test_cleanup(self):
+        feed = FeedFactory()
+        other_feed = FeedFactory()
+        with time_machine.travel("2030-01-15 12:00:00", tick=False):
+            FeedUpdate.objects.create_partitions()
+            FeedUpdateFactory(feed=feed)
+            other_feed.latest_feed_update = FeedUpdateFactory(feed=other_feed)
+            other_feed.save()
+        with time_machine.travel("2030-02-10 12:00:00", tick=False):
+            feed.latest_feed_update = FeedUpdateFactory(feed=feed)
+            feed.save()
+        # Like in production, the foreign keys of the updates must be checked before we try to
+        # drop their partition.
+        connection.check_constraints()
+
+        with time_machine.travel("2030-04-15 12:00:00", tick=False):
+            dropped_partitions, nb_deleted = FeedUpdate.objects.cleanup(
+                Feed.objects.filter(latest_feed_update__isnull=False).values(
+                    "latest_feed_update_id"
+                )
+            )
+
+        assert "feeds_feedupdate_p2030_01" in dropped_partitions
+        assert "feeds_feedupdate_p2030_02" not in dropped_partitions
+        assert nb_deleted == 0
+        assert set(FeedUpdate.objects.all()) == {
+            feed.latest_feed_update,
+            other_feed.latest_feed_update,
+        }
+        assert _get_partition(other_feed.latest_feed_update) == "feeds_feedupdate_default"
+
     def test_get_latest_for_feed(self):
         feed = FeedFactory()
         with time_machine.travel(datetime(2023, 12, 30, tzinfo=UTC)):
@@ -81,6 +150,33 @@ class TestFeedUpdateManager:
         assert latest.pk == latest_feed_update.pk
         assert latest.created_at == datetime(2023, 12, 31, 11, tzinfo=UTC)
 
+    def test_get_latest_success_for_feeds(self, django_assert_num_queries):
+        feed = FeedFactory()
+        other_feed = FeedFactory()
+        feed_without_success = FeedFactory()
+        with time_machine.travel(datetime(2023, 12, 30, tzinfo=UTC)):
+            FeedUpdateFactory(feed=feed)
+            other_feed_update = FeedUpdateFactory(feed=other_feed)
+            FeedUpdateFactory(feed=feed_without_success, status=constants.FeedUpdateStatus.FAILURE)
+        with time_machine.travel(datetime(2023, 12, 31, 11, tzinfo=UTC)):
+            latest_feed_update = FeedUpdateFactory(feed=feed, feed_etag="W/etag")
+        with time_machine.travel(datetime(2023, 12, 31, 12, tzinfo=UTC)):
+            FeedUpdateFactory(feed=feed, status=constants.FeedUpdateStatus.FAILURE)
+            FeedUpdateFactory()
+
+        with django_assert_num_queries(1):
+            latest_by_feed_id = async_to_sync(FeedUpdate.objects.get_latest_success_for_feeds)([
+                feed.id,
+                other_feed.id,
+                feed_without_success.id,
+            ])
+
+        assert latest_by_feed_id == {
+            feed.id: latest_feed_update,
+            other_feed.id: other_feed_update,
+        }
+        assert latest_by_feed_id[feed.id].feed_etag == "W/etag"
+
     def test_must_not_disable_feed_no_error(self):
         feed = FeedFactory()
         FeedUpdateFactory(feed=feed)
@@ -17,16 +17,21 @@
 import httpx
 import pytest
 
+from legadilo.feeds import constants
 from legadilo.feeds.constants import SupportedFeedType
+from legadilo.feeds.services import feed_parsing
 from legadilo.feeds.services.feed_parsing import (
+    FeedContentNotModifiedError,
     FeedFileTooBigError,
     MultipleFeedFoundError,
     NoFeedUrlFoundError,
     _find_feed_page_content,
     _find_youtube_rss_feed_link,
     _parse_articles_in_feed,
+    build_parse_executor,
     get_feed_data,
     parse_feed,
+    parse_feed_content,
 )
 from legadilo.utils.testing import serialize_for_snapshot
 
@@ -249,10 +254,106 @@ class TestGetFeedMetadata:
         snapshot.assert_match(serialize_for_snapshot(feed_data), "feed_data.json")
 
     @pytest.mark.asyncio
-    async def test_feed_file_too_big(self, httpx_mock, mocker):
-        mocker.patch(
-            "legadilo.feeds.services.feed_parsing.sys.getsizeof", return_value=11 * 1024 * 1024
+    async def test_cache_discovered_feed_url(self, httpx_mock):
+        page_content = get_page_for_feed_subscription_content({
+            "feed_links": """<link href="//www.jujens.eu/feeds/all.atom.xml" type="application/atom+xml" rel="alternate" title="Jujens' blog Atom">""",  # noqa: E501
+        })
+        page_url = "https://www.jujens.eu"
+        feed_url = "https://www.jujens.eu/feeds/all.atom.xml"
+        feed_content = get_feed_fixture_content("sample_atom.xml")
+        httpx_mock.add_response(text=page_content, url=page_url)
+        httpx_mock.add_response(text=feed_content, url=feed_url)
+        httpx_mock.add_response(text=feed_content, url=feed_url)
+
+        async with httpx.AsyncClient() as client:
+            feed_data = await get_feed_data(page_url, client=client, use_discovery_cache=True)
+            cached_feed_data = await get_feed_data(
+                page_url, client=client, use_discovery_cache=True
+            )
+
+        assert cached_feed_data == feed_data
+        assert [str(request.url) for request in httpx_mock.get_requests()] == [
+            page_url,
+            feed_url,
+            feed_url,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_invalidate_cached_feed_url(self, httpx_mock):
+        page_url = "https://www.jujens.eu"
+        old_feed_url = "https://www.jujens.eu/feeds/all.atom.xml"
+        new_feed_url = "https://www.jujens.eu/feeds/all.rss.xml"
+        httpx_mock.add_response(
+            text=get_page_for_feed_subscription_content({
+                "feed_links": f"""<link href="{old_feed_url}" type="application/atom+xml" rel="alternate">""",  # noqa: E501
+            }),
+            url=page_url,
+        )
+        httpx_mock.add_response(text=get_feed_fixture_content("sample_atom.xml"), url=old_feed_url)
+        # The old feed now redirects to the home page which links to the new feed.
+        httpx_mock.add_response(
+            text=get_page_for_feed_subscription_content({"feed_links": ""}), url=old_feed_url
         )
+        httpx_mock.add_response(
+            text=get_page_for_feed_subscription_content({
+                "feed_links": f"""<link href="{new_feed_url}" type="application/rss+xml" rel="alternate">""",  # noqa: E501
+            }),
+            url=page_url,
+        )
+        httpx_mock.add_response(text=get_feed_fixture_content("sample_rss.xml"), url=new_feed_url)
+        httpx_mock.add_response(text=get_feed_fixture_content("sample_rss.xml"), url=new_feed_url)
+
+        async with httpx.AsyncClient() as client:
+            await get_feed_data(page_url, client=client, use_discovery_cache=True)
+            feed_data = await get_feed_data(page_url, client=client, use_discovery_cache=True)
+            cached_feed_data = await get_feed_data(
+                page_url, client=client, use_discovery_cache=True
+            )
+
+        assert feed_data.feed_url == new_feed_url
+        assert cached_feed_data == feed_data
+        assert [str(request.url) for request in httpx_mock.get_requests()] == [
+            page_url,
+            old_feed_url,
+            old_feed_url,
+            page_url,
+            new_feed_url,
+            new_feed_url,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_cache_page_without_feed(self, httpx_mock):
+        page_url = "https://www.jujens.eu"
+        httpx_mock.add_response(
+            text=get_page_for_feed_subscription_content({"feed_links": ""}), url=page_url
+        )
+
+        async with httpx.AsyncClient() as client:
+            with pytest.raises(NoFeedUrlFoundError):
+                await get_feed_data(page_url, client=client, use_discovery_cache=True)
+            with pytest.raises(NoFeedUrlFoundError):
+                await get_feed_data(page_url, client=client, use_discovery_cache=True)
+
+        assert len(httpx_mock.get_requests()) == 1
+
+    @pytest.mark.asyncio
+    async def test_discovery_not_cached_by_default(self, httpx_mock):
+        page_url = "https://www.jujens.eu"
+        page_content = get_page_for_feed_subscription_content({"feed_links": ""})
+        httpx_mock.add_response(text=page_content, url=page_url)
+        httpx_mock.add_response(text=page_content, url=page_url)
+
+        async with httpx.AsyncClient() as client:
+            with pytest.raises(NoFeedUrlFoundError):
+                await get_feed_data(page_url, client=client)
+            with pytest.raises(NoFeedUrlFoundError):
+                await get_feed_data(page_url, client=client)
+
+        assert len(httpx_mock.get_requests()) == 2
+
+    @pytest.mark.asyncio
+    async def test_feed_file_too_big(self, httpx_mock, mocker):
+        mocker.patch("legadilo.feeds.constants.MAX_FEED_FILE_SIZE", 10)
         httpx_mock.add_response(
             text=get_feed_fixture_content("sample_atom.xml"),
             url="https://www.jujens.eu/feed/rss.xml",
@@ -262,6 +363,55 @@ class TestGetFeedMetadata:
             async with httpx.AsyncClient() as client:
                 await get_feed_data("https://www.jujens.eu/feed/rss.xml", client=client)
 
+    @pytest.mark.asyncio
+    async def test_get_feed_metadata_with_parse_executor(self, httpx_mock):
+        feed_url = "https://www.jujens.eu/feed/atom.xml"
+        httpx_mock.add_response(text=get_feed_fixture_content("sample_atom.xml"), url=feed_url)
+
+        with build_parse_executor(1) as executor:
+            assert executor is not None
+            async with httpx.AsyncClient() as client:
+                feed_data = await get_feed_data(feed_url, client=client, parse_executor=executor)
+
+        assert feed_data.feed_url == feed_url
+        assert feed_data.feed_type == SupportedFeedType.atom10
+        assert len(feed_data.articles) > 0
+
+    def test_parse_executor_without_workers(self):
+        with build_parse_executor(0) as executor:
+            assert executor is None
+
+    @pytest.mark.asyncio
+    async def test_feed_content_not_modified(self, httpx_mock):
+        feed_url = "https://www.jujens.eu/feed/atom.xml"
+        feed_content = get_feed_fixture_content("sample_atom.xml")
+        httpx_mock.add_response(text=feed_content, url=feed_url)
+        httpx_mock.add_response(text=feed_content, url=feed_url)
+
+        async with httpx.AsyncClient() as client:
+            feed_data = await get_feed_data(feed_url, client=client)
+            with pytest.raises(FeedContentNotModifiedError):
+                await get_feed_data(feed_url, client=client, content_hash=feed_data.content_hash)
+
+    @pytest.mark.asyncio
+    async def test_use_encoding_sent_by_server(self, httpx_mock):
+        feed_url = "https://example.com/feed.xml"
+        feed_content = (
+            get_feed_fixture_content("sample_rss.xml")
+            .replace('<?xml version="1.0" encoding="utf-8"?>', "")
+            .replace("Sample Feed", "Café Feed")
+        )
+        httpx_mock.add_response(
+            content=feed_content.encode("iso-8859-1"),
+            headers={"Content-Type": "application/rss+xml; charset=iso-8859-1"},
+            url=feed_url,
+        )
+
+        async with httpx.AsyncClient() as client:
+            feed_data = await get_feed_data(feed_url, client=client)
+
+        assert feed_data.title == "Café Feed"
+
     @pytest.mark.asyncio
     async def test_feed_file_is_an_attack(self, httpx_mock, snapshot):
         feed_url = "https://example.com/feed.xml"
@@ -273,6 +423,31 @@ class TestGetFeedMetadata:
         snapshot.assert_match(serialize_for_snapshot(feed_data), "feed_data.json")
 
 
+@pytest.mark.parametrize(
+    ("links", "expected_hub_url", "expected_topic_url"),
+    [
+        pytest.param("", "", "", id="no-hub"),
+        pytest.param(
+            '<link rel="hub" href="https://hub.example.com/"/>',
+            "https://hub.example.com/",
+            "http://www.example.org/atom10.xml",
+            id="hub",
+        ),
+        pytest.param('<link rel="hub" href="javascript:alert(1)"/>', "", "", id="invalid-hub-url"),
+    ],
+)
+def test_find_hub_links(links, expected_hub_url, expected_topic_url):
+    feed_content = get_feed_fixture_content("sample_atom.xml").replace(
+        '<link rel="alternate" href="/"/>', f'<link rel="alternate" href="/"/>{links}'
+    )
+
+    feed_data = parse_feed_content(feed_content.encode(), "https://example.org/feed.atom")
+
+    assert feed_data is not None
+    assert feed_data.hub_url == expected_hub_url
+    assert feed_data.hub_topic_url == expected_topic_url
+
+
 class TestParseArticlesInFeed:
     @pytest.mark.parametrize(
         "feed_content",
@@ -308,8 +483,121 @@ class TestParseArticlesInFeed:
     def test_parse_articles(self, feed_content, snapshot):
         feed_data = parse_feed(feed_content)
 
-        articles = _parse_articles_in_feed(
-            "https://example.com/feeds/feed.xml", "Some feed", feed_data
+        articles, _ = _parse_articles_in_feed(
+            "https://example.com/feeds/feed.xml", "Some feed", feed_data, {}
         )
 
         snapshot.assert_match(serialize_for_snapshot(articles), "articles.json")
+
+    def test_skip_unchanged_entries(self):
+        feed_data = parse_feed(get_feed_fixture_content("sample_rss.xml"))
+        articles, entry_fingerprints = _parse_articles_in_feed(
+            "https://example.com/feeds/feed.xml", "Some feed", feed_data, {}
+        )
+        assert len(articles) == 1
+        assert list(entry_fingerprints.keys()) == ["http://example.org/entry/3"]
+
+        same_articles, same_entry_fingerprints = _parse_articles_in_feed(
+            "https://example.com/feeds/feed.xml", "Some feed", feed_data, entry_fingerprints
+        )
+        assert same_articles == []
+        assert same_entry_fingerprints == entry_fingerprints
+
+        updated_feed_data = parse_feed(
+            get_feed_fixture_content("sample_rss.xml").replace(
+                "First entry title", "Updated entry title"
+            )
+        )
+        updated_articles, updated_entry_fingerprints = _parse_articles_in_feed(
+            "https://example.com/feeds/feed.xml", "Some feed", updated_feed_data, entry_fingerprints
+        )
+        assert len(updated_articles) == 1
+        assert updated_entry_fingerprints != entry_fingerprints
+
+
+class TestStreamParseFeedContent:
+    @pytest.mark.parametrize(
+        "fixture_name",
+        ["sample_rss.xml", "sample_atom.xml", "sample_youtube_atom.xml"],
+    )
+    def test_same_result_as_full_parsing(self, mocker, fixture_name):
+        feed_content = get_feed_fixture_content(fixture_name)
+        feed_data = parse_feed_content(feed_content.encode(), "https://example.com/feeds/feed.xml")
+        stream_parse_spy = mocker.spy(feed_parsing, "_stream_parse_feed_content")
+        mocker.patch.object(constants, "STREAM_PARSE_MIN_FEED_SIZE", 0)
+        # Entries are split across chunks.
+        mocker.patch.object(constants, "STREAM_PARSE_CHUNK_SIZE", 100)
+
+        streamed_feed_data = parse_feed_content(
+            feed_content.encode(), "https://example.com/feeds/feed.xml"
+        )
+
+        assert stream_parse_spy.call_count == 1
+        assert stream_parse_spy.spy_exception is None
+        assert streamed_feed_data == feed_data
+
+    def test_parse_content_once(self, mocker):
+        feed_content = get_feed_fixture_content("sample_youtube_atom.xml")
+        parse_feed_spy = mocker.spy(feed_parsing, "parse_feed")
+        mocker.patch.object(constants, "STREAM_PARSE_MIN_FEED_SIZE", 0)
+
+        feed_data = parse_feed_content(feed_content.encode(), "https://example.com/feeds/feed.xml")
+
+        assert feed_data is not None
+        assert len(feed_data.articles) == 1
+        assert parse_feed_spy.call_count == 0
+
+    def test_fallback_to_full_parsing(self, mocker):
+        feed_content = get_feed_fixture_content("sample_rss.xml").replace(
+            "</channel>", "<br></channel>"
+        )
+        feed_data = parse_feed_content(feed_content.encode(), "https://example.com/feeds/feed.xml")
+        mocker.patch.object(constants, "STREAM_PARSE_MIN_FEED_SIZE", 0)
+
+        streamed_feed_data = parse_feed_content(
+            feed_content.encode(), "https://example.com/feeds/feed.xml"
+        )
+
+        assert feed_data is not None
+        assert len(feed_data.articles) == 1
+        assert streamed_feed_data == feed_data
+
+    def test_limit_number_of_entries(self, mocker):
+        feed_content = get_feed_fixture_content("sample_rss.xml")
+        item = feed_content[feed_content.index("<item>") : feed_content.index("</item>") + 7]
+        feed_content = feed_content.replace(
+            item, "".join(item.replace("entry/3", f"entry/{i}") for i in range(5))
+        )
+        mocker.patch.object(constants, "STREAM_PARSE_MIN_FEED_SIZE", 0)
+        mocker.patch.object(constants, "MAX_FEED_ENTRIES_PER_UPDATE", 2)
+
+        feed_data = parse_feed_content(feed_content.encode(), "https://example.com/feeds/feed.xml")
+
+        assert feed_data is not None
+        assert [article.external_article_id for article in feed_data.articles] == [
+            "http://example.org/entry/0",
+            "http://example.org/entry/1",
+        ]
+        assert len(feed_data.entry_fingerprints) == 2
+
+    def test_use_encoding_sent_by_server(self, mocker):
+        feed_content = (
+            get_feed_fixture_content("sample_rss.xml")
+            .replace('<?xml version="1.0" encoding="utf-8"?>', "")
+            .replace("Sample Feed", "Café Feed")
+            .encode("iso-8859-1")
+        )
+        feed_data = parse_feed_content(
+            feed_content, "https://example.com/feeds/feed.xml", encoding="iso-8859-1"
+        )
+        stream_parse_spy = mocker.spy(feed_parsing, "_stream_parse_feed_content")
+        mocker.patch.object(constants, "STREAM_PARSE_MIN_FEED_SIZE", 0)
+
+        streamed_feed_data = parse_feed_content(
+            feed_content, "https://example.com/feeds/feed.xml", encoding="iso-8859-1"
+        )
+
+        assert stream_parse_spy.spy_exception is None
+        assert feed_data is not None
+        assert feed_data.title == "Café Feed"
+        assert streamed_feed_data == feed_data
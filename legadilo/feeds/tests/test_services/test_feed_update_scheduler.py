@@ -0,0 +1,111 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+import time
+
+import pytest
+
+from legadilo.feeds.services.feed_update_scheduler import FeedUpdateScheduler
+
+
+class Tracker:
+    def __init__(self):
+        self.running: dict[str, int] = {}
+        self.max_running: dict[str, int] = {}
+        self.max_running_total = 0
+        self.started_at: dict[str, list[float]] = {}
+
+    async def run(self, scheduler: FeedUpdateScheduler, url: str, host: str):
+        async with scheduler.slot(url):
+            self.started_at.setdefault(host, []).append(time.monotonic())
+            self.running[host] = self.running.get(host, 0) + 1
+            self.max_running[host] = max(self.max_running.get(host, 0), self.running[host])
+            self.max_running_total = max(self.max_running_total, sum(self.running.values()))
+            await asyncio.sleep(0.01)
+            self.running[host] -= 1
+
+
+@pytest.mark.asyncio
+async def test_limit_concurrency():
+    scheduler = FeedUpdateScheduler(
+        max_concurrency=3, max_concurrency_per_host=2, min_interval_per_host=0
+    )
+    tracker = Tracker()
+
+    async with asyncio.TaskGroup() as tg:
+        for host in ("example.com", "example.org", "example.net"):
+            for i in range(5):
+                tg.create_task(tracker.run(scheduler, f"https://{host}/feed-{i}.xml", host))
+
+    assert tracker.max_running_total == 3
+    assert all(max_running <= 2 for max_running in tracker.max_running.values())
+    assert scheduler.stats.nb_requests == 15
+    assert scheduler.stats.queue_depth == 0
+    # The first 3 tasks get a slot right away, all the others must wait.
+    assert scheduler.stats.max_queue_depth == 12
+    assert set(scheduler.stats.max_queue_depth_per_host.keys()) == {
+        "example.com",
+        "example.org",
+        "example.net",
+    }
+    assert scheduler.stats.max_wait_time > 0
+
+
+@pytest.mark.asyncio
+async def test_min_interval_per_host():
+    scheduler = FeedUpdateScheduler(
+        max_concurrency=10, max_concurrency_per_host=10, min_interval_per_host=0.05
+    )
+    tracker = Tracker()
+
+    async with asyncio.TaskGroup() as tg:
+        for i in range(3):
+            tg.create_task(
+                tracker.run(scheduler, f"https://example.com/feed-{i}.xml", "example.com")
+            )
+        tg.create_task(tracker.run(scheduler, "https://example.org/feed.xml", "example.org"))
+
+    example_com_starts = tracker.started_at["example.com"]
+    assert len(example_com_starts) == 3
+    assert example_com_starts[1] - example_com_starts[0] >= 0.05
+    assert example_com_starts[2] - example_com_starts[1] >= 0.05
+    # Other hosts are not slowed down.
+    assert tracker.started_at["example.org"][0] < example_com_starts[1]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_while_waiting():
+    scheduler = FeedUpdateScheduler(
+        max_concurrency=1, max_concurrency_per_host=1, min_interval_per_host=0
+    )
+    blocker = asyncio.Event()
+
+    async def hold_slot():
+        async with scheduler.slot("https://example.com/feed.xml"):
+            await blocker.wait()
+
+    holder = asyncio.create_task(hold_slot())
+    waiter = asyncio.create_task(hold_slot())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    blocker.set()
+    await holder
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    assert scheduler.stats.queue_depth == 0
+    assert scheduler.stats.nb_requests == 1
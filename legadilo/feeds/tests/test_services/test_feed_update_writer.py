@@ -0,0 +1,94 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+
+from legadilo.feeds import constants
+from legadilo.feeds.models import Feed, FeedUpdate
+from legadilo.feeds.services.feed_update_writer import FeedUpdateWriter
+from legadilo.feeds.tests.factories import FeedDataFactory, FeedFactory
+from legadilo.utils.byte_budget import ByteBudget
+
+
+@pytest.mark.django_db
+class TestFeedUpdateWriter:
+    def test_save_in_batches(self, user):
+        feeds = FeedFactory.create_batch(3, user=user)
+
+        async def update_feeds():
+            async with FeedUpdateWriter(batch_size=2, flush_interval=60) as writer:
+                await writer.add(feeds[:1], FeedDataFactory())
+                assert writer.nb_flushes == 0
+                await writer.add(feeds[1:2], FeedDataFactory())
+                assert writer.nb_flushes == 1
+                assert await FeedUpdate.objects.acount() == 2
+                await writer.add(feeds[2:], FeedDataFactory())
+                assert writer.nb_flushes == 1
+
+            return writer
+
+        writer = async_to_sync(update_feeds)()
+
+        assert writer.nb_flushes == 2
+        assert set(FeedUpdate.objects.values_list("feed_id", "status")) == {
+            (feed.id, constants.FeedUpdateStatus.SUCCESS) for feed in feeds
+        }
+
+    def test_flush_periodically(self, user):
+        feed = FeedFactory(user=user)
+
+        async def update_feed():
+            async with FeedUpdateWriter(batch_size=10, flush_interval=0.01) as writer:
+                await writer.add([feed], FeedDataFactory())
+                await asyncio.sleep(0.1)
+                return writer.nb_flushes
+
+        assert async_to_sync(update_feed)() == 1
+        assert FeedUpdate.objects.filter(feed=feed).count() == 1
+
+    def test_release_reservation_once_saved(self, user):
+        feeds = FeedFactory.create_batch(2, user=user)
+        budget = ByteBudget(1000, estimated_bytes=100)
+
+        async def update_feeds():
+            async with FeedUpdateWriter(batch_size=10, flush_interval=60) as writer:
+                async with budget.reserve() as reservation:
+                    reservation.keep()
+                await writer.add(feeds, FeedDataFactory(), reservation=reservation)
+                assert budget.in_flight_bytes == 100
+                await writer.flush()
+                assert budget.in_flight_bytes == 0
+
+        async_to_sync(update_feeds)()
+
+    def test_log_failures(self, user, mocker):
+        feed = FeedFactory(user=user)
+        mocker.patch.object(
+            Feed.objects, "update_feeds", return_value=[(feed, ValueError("Cannot save feed"))]
+        )
+
+        async def update_feed():
+            async with FeedUpdateWriter(batch_size=10, flush_interval=60) as writer:
+                await writer.add([feed], FeedDataFactory())
+
+        async_to_sync(update_feed)()
+
+        feed_update = FeedUpdate.objects.get()
+        assert feed_update.status == constants.FeedUpdateStatus.FAILURE
+        assert feed_update.error_message == "ValueError(Cannot save feed)"
@@ -78,7 +78,7 @@ class TestSubscribeToFeedView:
     ):
         httpx_mock.add_response(text=sample_rss_feed, url=self.feed_url)
 
-        with django_assert_num_queries(30):
+        with django_assert_num_queries(32):
             response = logged_in_sync_client.post(self.url, self.sample_payload)
 
         assert response.status_code == HTTPStatus.CREATED
@@ -106,7 +106,7 @@ class TestSubscribeToFeedView:
     ):
         httpx_mock.add_response(text=sample_rss_feed, url=self.feed_url)
 
-        with django_assert_num_queries(35):
+        with django_assert_num_queries(36):
             response = logged_in_sync_client.post(self.url, self.sample_payload_with_tags)
 
         assert response.status_code == HTTPStatus.CREATED, response.context_data["form"].errors
@@ -142,7 +142,7 @@ class TestSubscribeToFeedView:
         }
         httpx_mock.add_response(text=sample_rss_feed, url=self.feed_url)
 
-        with django_assert_num_queries(30):
+        with django_assert_num_queries(32):
             response = logged_in_sync_client.post(self.url, sample_payload_with_category)
 
         assert response.status_code == HTTPStatus.CREATED
@@ -216,9 +216,7 @@ class TestSubscribeToFeedView:
         ]
 
     def test_fetched_file_too_big(self, logged_in_sync_client, httpx_mock, mocker, sample_rss_feed):
-        mocker.patch(
-            "legadilo.feeds.services.feed_parsing.sys.getsizeof", return_value=11 * 1024 * 1024
-        )
+        mocker.patch("legadilo.feeds.constants.MAX_FEED_FILE_SIZE", 10)
         httpx_mock.add_response(text=sample_rss_feed, url=self.feed_url)
 
         response = logged_in_sync_client.post(self.url, self.sample_payload)
@@ -0,0 +1,276 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import hashlib
+import hmac
+import re
+from datetime import UTC, datetime
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+import time_machine
+from django.core.management import call_command
+from django.urls import reverse
+
+from legadilo.feeds.models import Feed, FeedArticle, FeedHubSubscription, FeedUpdate
+from legadilo.feeds.tests.factories import FeedFactory
+from legadilo.reading.models import Article
+from legadilo.utils.time_utils import utcdt
+
+from ... import constants
+from ..fixtures import get_feed_fixture_content
+
+HUB_URL = "https://hub.example.com/"
+TOPIC_URL = "http://www.example.org/atom10.xml"
+FEED_URL = "http://example.org/feed.atom"
+
+
+def get_feed_with_hub_content() -> str:
+    return get_feed_fixture_content("sample_atom.xml").replace(
+        '<link rel="alternate" href="/"/>',
+        f'<link rel="alternate" href="/"/><link rel="hub" href="{HUB_URL}"/>',
+    )
+
+
+def sign(secret: str, content: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode(), content, hashlib.sha256).hexdigest()
+
+
+class LocalHub:
+    """Stand-in for a WebSub hub: it records subscriptions and calls our callback."""
+
+    def __init__(self, httpx_mock, client):
+        self.client = client
+        self.subscriptions: list[dict[str, str]] = []
+        httpx_mock.add_callback(self._subscribe, url=HUB_URL, method="POST")
+
+    def _subscribe(self, request: httpx.Request) -> httpx.Response:
+        self.subscriptions.append({
+            key: values[0] for key, values in parse_qs(request.content.decode()).items()
+        })
+        return httpx.Response(status_code=HTTPStatus.ACCEPTED)
+
+    def verify_intent(self, subscription: dict[str, str]):
+        return self.client.get(
+            urlparse(subscription["hub.callback"]).path,
+            {
+                "hub.mode": "subscribe",
+                "hub.topic": subscription["hub.topic"],
+                "hub.challenge": "some-challenge",
+                "hub.lease_seconds": subscription["hub.lease_seconds"],
+            },
+        )
+
+    def publish(self, subscription: dict[str, str], content: bytes, *, secret: str | None = None):
+        return self.client.post(
+            urlparse(subscription["hub.callback"]).path,
+            content,
+            content_type="application/atom+xml",
+            headers={"X-Hub-Signature": sign(secret or subscription["hub.secret"], content)},
+        )
+
+
+@pytest.mark.django_db
+class TestWebSubCallbackView:
+    @pytest.fixture(autouse=True)
+    def _setup_data(self, settings):
+        settings.FEED_UPDATE_MIN_INTERVAL_PER_HOST = 0
+        settings.WEBSUB_CALLBACK_BASE_URL = "https://legadilo.example.com"
+        self.subscription = FeedHubSubscription.objects.create(
+            feed_url=FEED_URL, hub_url=HUB_URL, topic_url=TOPIC_URL
+        )
+        self.url = reverse(
+            "feeds:websub_callback", kwargs={"subscription_token": self.subscription.token}
+        )
+
+    def test_unknown_subscription(self, client):
+        response = client.get(
+            reverse(
+                "feeds:websub_callback",
+                kwargs={"subscription_token": "7c9e1c0e-3a5d-4f0f-8a52-7d0a4b1b2c3d"},
+            )
+        )
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_verify_subscription(self, client):
+        response = client.get(
+            self.url,
+            {
+                "hub.mode": "subscribe",
+                "hub.topic": TOPIC_URL,
+                "hub.challenge": "some-challenge",
+                "hub.lease_seconds": "3600",
+            },
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.content == b"some-challenge"
+        self.subscription.refresh_from_db()
+        assert self.subscription.lease_expires_at == utcdt(2024, 5, 8, 11)
+
+    def test_verify_subscription_wrong_topic(self, client):
+        response = client.get(
+            self.url,
+            {
+                "hub.mode": "subscribe",
+                "hub.topic": "https://example.com/other-feed.xml",
+                "hub.challenge": "some-challenge",
+            },
+        )
+
+        assert response.status_code == HTTPStatus.NOT_FOUND
+        self.subscription.refresh_from_db()
+        assert self.subscription.lease_expires_at is None
+
+    def test_verify_unsubscription(self, client):
+        response = client.get(
+            self.url,
+            {"hub.mode": "unsubscribe", "hub.topic": TOPIC_URL, "hub.challenge": "challenge"},
+        )
+
+        assert response.status_code == HTTPStatus.OK
+        assert response.content == b"challenge"
+        assert FeedHubSubscription.objects.count() == 0
+
+    def test_subscription_denied(self, client):
+        response = client.get(self.url, {"hub.mode": "denied", "hub.topic": TOPIC_URL})
+
+        assert response.status_code == HTTPStatus.OK
+        assert FeedHubSubscription.objects.count() == 0
+
+    def test_receive_content(self, client, user, other_user):
+        feed = FeedFactory(feed_url=FEED_URL, user=user)
+        other_feed = FeedFactory(feed_url=FEED_URL, user=other_user)
+        content = get_feed_with_hub_content().encode()
+
+        response = client.post(
+            self.url,
+            content,
+            content_type="application/atom+xml",
+            headers={"X-Hub-Signature": sign(self.subscription.secret, content)},
+        )
+
+        assert response.status_code == HTTPStatus.ACCEPTED
+        assert feed.articles.count() == 2
+        assert other_feed.articles.count() == 2
+        assert FeedUpdate.objects.filter(status=constants.FeedUpdateStatus.SUCCESS).count() == 2
+
+    def test_receive_content_invalid_signature(self, client, user):
+        FeedFactory(feed_url=FEED_URL, user=user)
+        content = get_feed_with_hub_content().encode()
+
+        response = client.post(
+            self.url,
+            content,
+            content_type="application/atom+xml",
+            headers={"X-Hub-Signature": sign("not-the-secret", content)},
+        )
+
+        assert response.status_code == HTTPStatus.ACCEPTED
+        assert Article.objects.count() == 0
+
+    def test_receive_invalid_content(self, client, user):
+        FeedFactory(feed_url=FEED_URL, user=user)
+        content = b"Not a feed"
+
+        response = client.post(
+            self.url,
+            content,
+            content_type="application/atom+xml",
+            headers={"X-Hub-Signature": sign(self.subscription.secret, content)},
+        )
+
+        assert response.status_code == HTTPStatus.ACCEPTED
+        assert FeedUpdate.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_subscribe_and_receive_pushed_content(httpx_mock, client, user, settings):
+    settings.FEED_UPDATE_MIN_INTERVAL_PER_HOST = 0
+    settings.WEBSUB_CALLBACK_BASE_URL = "https://legadilo.example.com"
+    feed = FeedFactory(feed_url=FEED_URL, user=user, next_refresh_at=None)
+    httpx_mock.add_response(url=FEED_URL, content=get_feed_with_hub_content())
+    hub = LocalHub(httpx_mock, client)
+
+    with time_machine.travel(datetime(2024, 5, 8, 10, tzinfo=UTC), tick=False):
+        call_command("update_feeds")
+
+    assert len(hub.subscriptions) == 1
+    subscription = hub.subscriptions[0]
+    assert subscription["hub.mode"] == "subscribe"
+    assert subscription["hub.topic"] == TOPIC_URL
+    assert subscription["hub.callback"].startswith("https://legadilo.example.com/feeds/websub/")
+    assert subscription["hub.lease_seconds"] == "864000"
+
+    with time_machine.travel(datetime(2024, 5, 8, 10, 1, tzinfo=UTC), tick=False):
+        response = hub.verify_intent(subscription)
+        assert response.status_code == HTTPStatus.OK
+        assert response.content == b"some-challenge"
+
+    # The hub updates the feed: we must not poll it anymore.
+    with time_machine.travel(datetime(2024, 5, 9, 10, tzinfo=UTC), tick=False):
+        assert not Feed.objects.get_queryset().for_update().exists()
+
+        content = get_feed_with_hub_content().replace('href="/entry/3"', 'href="/entry/4"')
+        response = hub.publish(subscription, content.encode())
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert feed.articles.filter(link="http://example.org/entry/4").exists()
+    assert feed.feed_updates.count() == 2
+
+
+@pytest.mark.django_db
+def test_poll_after_receiving_partial_content(httpx_mock, client, user, settings):
+    settings.FEED_UPDATE_MIN_INTERVAL_PER_HOST = 0
+    subscription = FeedHubSubscription.objects.create(
+        feed_url=FEED_URL, hub_url=HUB_URL, topic_url=TOPIC_URL
+    )
+    feed = FeedFactory(feed_url=FEED_URL, user=user, next_refresh_at=None)
+    updated_content = get_feed_with_hub_content().replace(
+        "First entry title", "Updated first entry title"
+    )
+    httpx_mock.add_response(url=FEED_URL, content=get_feed_with_hub_content())
+    httpx_mock.add_response(url=FEED_URL, content=updated_content)
+    call_command("update_feeds")
+    feed.refresh_from_db()
+    initial_entry_fingerprints = feed.entry_fingerprints
+    assert len(initial_entry_fingerprints) == 2
+
+    # The hub only pushes the updated entry.
+    pushed_content = re.sub(
+        r"<entry>\s*<title>With tags</title>.*?</entry>", "", updated_content, flags=re.DOTALL
+    ).encode()
+    response = client.post(
+        reverse("feeds:websub_callback", kwargs={"subscription_token": subscription.token}),
+        pushed_content,
+        content_type="application/atom+xml",
+        headers={"X-Hub-Signature": sign(subscription.secret, pushed_content)},
+    )
+    assert response.status_code == HTTPStatus.ACCEPTED
+    feed.refresh_from_db()
+    assert feed.entry_fingerprints.keys() == initial_entry_fingerprints.keys()
+    assert feed.entry_fingerprints != initial_entry_fingerprints
+
+    # Since no entry changed since the push, we won't create them again.
+    FeedArticle.objects.all().delete()
+    Article.objects.all().delete()
+    call_command("update_feeds", force=True)
+
+    assert Article.objects.count() == 0
@@ -38,4 +38,9 @@ urlpatterns = [
     ),
     path("articles/<int:article_id>/delete/", views.delete_article_view, name="delete_article"),
     path("articles/<int:feed_id>/", views.feed_articles_view, name="feed_articles"),
+    path(
+        "websub/<uuid:subscription_token>/",
+        views.websub_callback_view,
+        name="websub_callback",
+    ),
 ]
@@ -23,6 +23,7 @@ from .feed_categories_admin_views import (
 )
 from .feeds_admin_view import edit_feed_view, feeds_admin_view
 from .subscribe_to_feed_view import subscribe_to_feed_view
+from .websub_callback_view import websub_callback_view
 
 __all__ = [
     "create_feed_category_view",
@@ -33,4 +34,5 @@ __all__ = [
     "feed_category_admin_view",
     "feeds_admin_view",
     "subscribe_to_feed_view",
+    "websub_callback_view",
 ]
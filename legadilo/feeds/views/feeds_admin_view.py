@@ -118,6 +118,9 @@ class EditFeedForm(forms.ModelForm):
         if self.cleaned_data["category"] != self.instance.category:
             self.instance.category = self.cleaned_data["category"]
 
+        if "refresh_delay" in self.changed_data:
+            self.instance.schedule_next_refresh()
+
         return super().save(commit=commit)
 
 
@@ -161,7 +161,9 @@ async def _handle_creation(request: AuthenticatedHttpRequest):  # noqa: PLR0911
 
     try:
         async with get_rss_async_client() as client:
-            feed_medata = await get_feed_data(form.feed_url, client=client)
+            feed_medata = await get_feed_data(
+                form.feed_url, client=client, use_discovery_cache=True
+            )
         tags = await sync_to_async(Tag.objects.get_or_create_from_list)(
             request.user, form.cleaned_data["tags"]
         )
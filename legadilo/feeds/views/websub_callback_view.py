@@ -0,0 +1,91 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from http import HTTPStatus
+from uuid import UUID
+
+from django.http import HttpRequest, HttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_http_methods
+
+from ..models import FeedHubSubscription
+from ..services.feed_parsing import InvalidFeedFileError
+from ..services.websub import update_feeds_from_pushed_content
+
+logger = logging.getLogger(__name__)
+
+
+@csrf_exempt
+@require_http_methods(["GET", "POST"])
+def websub_callback_view(request: HttpRequest, subscription_token: UUID) -> HttpResponse:
+    """Callback called by WebSub hubs to verify our subscriptions and push feed content."""
+    subscription = get_object_or_404(FeedHubSubscription, token=subscription_token)
+
+    if request.method == "GET":
+        return _verify_intent(request, subscription)
+
+    return _receive_content(request, subscription)
+
+
+def _verify_intent(request: HttpRequest, subscription: FeedHubSubscription) -> HttpResponse:
+    mode = request.GET.get("hub.mode", "")
+    topic = request.GET.get("hub.topic", "")
+    challenge = request.GET.get("hub.challenge", "")
+    if topic != subscription.topic_url:
+        return HttpResponse(status=HTTPStatus.NOT_FOUND)
+
+    if mode == "denied":
+        logger.info("Hub %s denied subscription to %s", subscription.hub_url, topic)
+        subscription.delete()
+        return HttpResponse()
+
+    if not challenge:
+        return HttpResponse(status=HTTPStatus.NOT_FOUND)
+
+    if mode == "subscribe":
+        lease_seconds = request.GET.get("hub.lease_seconds", "")
+        subscription.confirm(int(lease_seconds) if lease_seconds.isdigit() else None)
+        subscription.save()
+    elif mode == "unsubscribe":
+        subscription.delete()
+    else:
+        return HttpResponse(status=HTTPStatus.NOT_FOUND)
+
+    return HttpResponse(challenge, content_type="text/plain")
+
+
+def _receive_content(request: HttpRequest, subscription: FeedHubSubscription) -> HttpResponse:
+    # We must acknowledge the content even if we ignore it, otherwise the hub would retry.
+    if not subscription.is_signature_valid(
+        request.body, request.headers.get("X-Hub-Signature", "")
+    ):
+        logger.warning("Ignoring content with invalid signature for %s", subscription.feed_url)
+        return HttpResponse(status=HTTPStatus.ACCEPTED)
+
+    try:
+        nb_updated_feeds = update_feeds_from_pushed_content(
+            subscription, request.body, request.encoding
+        )
+    except InvalidFeedFileError:
+        logger.exception("Failed to parse content pushed for %s", subscription.feed_url)
+    else:
+        logger.info(
+            "Updated %s feeds from content pushed for %s", nb_updated_feeds, subscription.feed_url
+        )
+
+    return HttpResponse(status=HTTPStatus.ACCEPTED)
@@ -121,7 +121,9 @@ async def _import_feed(user, category, row, feed_url_in_file_to_true_feed):
 
     try:
         async with get_rss_async_client() as client:
-            feed_data = await get_feed_data(row["feed_url"], client=client)
+            feed_data = await get_feed_data(
+                row["feed_url"], client=client, use_discovery_cache=True
+            )
 
         feed, created = await sync_to_async(Feed.objects.create_from_metadata)(
             feed_data,
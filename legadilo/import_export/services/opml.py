@@ -144,7 +144,7 @@ async def _process_feed(user, client, outline, category=None):
     nb_imported_feeds = 0
     try:
         logger.debug(f"Importing feed {outline.feed_url}")
-        feed_data = await get_feed_data(outline.feed_url, client=client)
+        feed_data = await get_feed_data(outline.feed_url, client=client, use_discovery_cache=True)
         _feed, created = await sync_to_async(Feed.objects.create_from_metadata)(
             feed_data,
             user,
@@ -114,7 +114,16 @@ def test_import_custom_csv(user, httpx_mock, snapshot):
             list(
                 Feed.objects.order_by("id").values(
                     *all_model_fields_except(
-                        Feed, {"id", "user", "category", "created_at", "updated_at"}
+                        Feed,
+                        {
+                            "id",
+                            "user",
+                            "category",
+                            "created_at",
+                            "updated_at",
+                            "next_refresh_at",
+                            "latest_feed_update",
+                        },
                     ),
                     "category__title",
                 )
@@ -128,3 +128,6 @@ KEEP_ARTICLE_FETCH_ERROR_FOR = 60  # In days
 LANGUAGE_CODE_MAX_LENGTH = 5
 EXTERNAL_ARTICLE_ID_MAX_LENGTH = 512
 MAX_EXPORT_ARTICLES_PER_PAGE = 100
+UPSERT_ARTICLES_BATCH_SIZE = 1000
+# Name of the stage measured while associating saved articles with their tags.
+TAG_ASSOCIATION_STAGE = "associate_tags"
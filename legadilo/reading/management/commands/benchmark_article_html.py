@@ -0,0 +1,91 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from pathlib import Path
+from typing import Any
+
+from django.core.management import BaseCommand, CommandError
+from django.core.management.base import CommandParser
+
+from legadilo.reading.services.article_fetching import ArticleData
+from legadilo.utils.collections_utils import percentile
+
+
+class Command(BaseCommand):
+    help = """Benchmark how we process the HTML of articles.
+
+    Each file of the corpus is used as the content of an article without summary: we resolve its
+    links, build its table of content, sanitize it, build its summary and count its words like we
+    do for articles we fetch or read from feeds. Use saved pages of real articles as corpus.
+    """
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "corpus", type=Path, help="Directory containing the HTML files of the articles."
+        )
+        parser.add_argument(
+            "--rounds",
+            default=5,
+            type=int,
+            help="Number of times to process all the articles.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        corpus = self._load_corpus(options["corpus"])
+        corpus_size = sum(len(content.encode()) for _, content in corpus)
+        self.stdout.write(f"Corpus: {len(corpus)} articles ({corpus_size / 1024 / 1024:.2f}MiB)")
+
+        for round_number in range(1, options["rounds"] + 1):
+            latencies = []
+            started_at = time.perf_counter()
+            for name, content in corpus:
+                article_started_at = time.perf_counter()
+                ArticleData(
+                    external_article_id=name,
+                    source_title="Benchmark",
+                    title=name,
+                    summary="",
+                    content=content,
+                    link=f"https://example.com/articles/{name}",
+                    language="en",
+                )
+                latencies.append(time.perf_counter() - article_started_at)
+            duration = time.perf_counter() - started_at
+
+            self.stdout.write(
+                f"Round {round_number}: {len(corpus)} articles in {duration:.2f}s "
+                f"({len(corpus) / duration if duration > 0 else 0:.2f} articles/s, "
+                f"{corpus_size / 1024 / 1024 / duration if duration > 0 else 0:.2f}MiB/s)"
+            )
+            self.stdout.write(
+                f"  Per article latency: p50={percentile(latencies, 50) * 1000:.2f}ms "
+                f"p95={percentile(latencies, 95) * 1000:.2f}ms "
+                f"max={max(latencies) * 1000:.2f}ms"
+            )
+
+    def _load_corpus(self, corpus_dir: Path) -> list[tuple[str, str]]:
+        if not corpus_dir.is_dir():
+            raise CommandError(f"{corpus_dir} is not a directory")
+        corpus = [
+            (path.name, path.read_text(encoding="utf-8", errors="replace"))
+            for path in sorted(corpus_dir.iterdir())
+            if path.is_file()
+        ]
+        if not corpus:
+            raise CommandError(f"No article file found in {corpus_dir}")
+
+        return corpus
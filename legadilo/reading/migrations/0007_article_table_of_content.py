@@ -16,11 +16,36 @@
 
 # Generated by Django 5.1.1 on 2024-09-08 20:46
 
+import nh3
+from bs4 import BeautifulSoup
 from django.core.paginator import Paginator
 from django.db import migrations, models
+from slugify import slugify
 
 import legadilo.utils.validators
-from legadilo.reading.services.article_fetching import _build_table_of_content
+
+
+def _build_table_of_content(content):
+    # Frozen copy of how the table of content was built when this migration was written.
+    soup = BeautifulSoup(content, "html.parser")
+    toc = []
+    toc_item_top_level = None
+
+    for header in soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"]):
+        text = nh3.clean(header.text, tags=set(), strip_comments=True)
+        id_ = header.get("id") or slugify(text)
+        header["id"] = id_
+        level = int(header.name.replace("h", ""))
+        # If the content is well-structured, all top level title will be at the same level.
+        # Since we don't know, we allow for a first h2 to be followed by a h1.
+        if toc_item_top_level is None or level <= toc_item_top_level["level"]:
+            toc_item_top_level = {"id": id_, "text": text, "level": level, "children": []}
+            toc.append(toc_item_top_level)
+        # We only allow one level in the TOC. It's enough.
+        elif level == toc_item_top_level["level"] + 1:
+            toc_item_top_level["children"].append({"id": id_, "text": text, "level": level})
+
+    return str(soup), toc
 
 
 def build_toc(apps, schema):
@@ -21,7 +21,7 @@ import logging
 import math
 from collections.abc import Iterable
 from dataclasses import dataclass
-from itertools import chain
+from itertools import batched
 from typing import TYPE_CHECKING, Literal, Self, assert_never
 from urllib.parse import urlparse
 
@@ -29,17 +29,17 @@ from dateutil.relativedelta import relativedelta
 from django.contrib.postgres.aggregates import ArrayAgg
 from django.contrib.postgres.indexes import GinIndex
 from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
-from django.db import models, transaction
+from django.db import connections, models, transaction
 from django.db.models.functions import Cast, Coalesce, Lower
 from django.utils.translation import gettext_lazy as _
 from slugify import slugify
 
 from legadilo.reading import constants
 from legadilo.reading.models.tag import ArticleTag
-from legadilo.utils.collections_utils import CustomJsonEncoder, max_or_none, min_or_none
+from legadilo.utils.collections_utils import CustomJsonEncoder
 from legadilo.utils.security import full_sanitize
-from legadilo.utils.text import get_nb_words_from_html
 from legadilo.utils.time_utils import utcnow
+from legadilo.utils.timings import measure_stage
 from legadilo.utils.validators import (
     language_code_validator,
     list_of_strings_validator,
@@ -472,97 +472,131 @@ class ArticleManager(models.Manager["Article"]):
         if len(articles_data) == 0:
             return []
 
-        existing_links_to_articles = {
-            article.link: article
-            for article in self.get_queryset()
-            .filter(user=user, link__in=[article_data.link for article_data in articles_data])
-            .select_related("user", "user__settings")
-        }
-        articles_to_create = []
-        articles_to_update = []
-        seen_links = set()
+        articles_to_save: dict[str, Article] = {}
         for article_data in articles_data:
-            if article_data.link in seen_links:
-                continue
-
-            seen_links.add(article_data.link)
-            if article_data.link in existing_links_to_articles:
-                article_to_update = existing_links_to_articles[article_data.link]
-                was_updated = article_to_update.update_article_from_data(
-                    article_data, force_update=force_update
-                )
-                if source_type == constants.ArticleSourceType.MANUAL:
-                    if article_to_update.main_source_type == constants.ArticleSourceType.FEED:
-                        # We force the source type to manual if we manually add it so prevent any
-                        # cleanup later one.
-                        article_to_update.main_source_type = constants.ArticleSourceType.MANUAL
-                    article_to_update.read_at = None
-                    was_updated = True
-                    article_to_update.obj_updated_at = utcnow()
-                if was_updated:
-                    articles_to_update.append(article_to_update)
-            else:
-                articles_to_create.append(
-                    self.model(
-                        user=user,
-                        external_article_id=article_data.external_article_id,
-                        title=article_data.title,
-                        slug=slugify(article_data.title),
-                        summary=article_data.summary,
-                        content=article_data.content,
-                        table_of_content=article_data.table_of_content,
-                        reading_time=get_nb_words_from_html(article_data.content)
-                        // user.settings.default_reading_time,
-                        authors=article_data.authors,
-                        contributors=article_data.contributors,
-                        external_tags=article_data.tags,
-                        link=article_data.link,
-                        preview_picture_url=article_data.preview_picture_url,
-                        preview_picture_alt=article_data.preview_picture_alt,
-                        published_at=article_data.published_at,
-                        updated_at=article_data.updated_at,
-                        main_source_type=source_type,
-                        main_source_title=article_data.source_title,
-                        language=article_data.language,
-                        annotations=article_data.annotations,
-                        read_at=article_data.read_at,
-                        is_favorite=article_data.is_favorite,
-                    )
+            # Postgres can't update the same row twice in one statement: we only keep the first
+            # article for each link.
+            if article_data.link not in articles_to_save:
+                articles_to_save[article_data.link] = self._build_article_from_data(
+                    user, article_data, source_type=source_type
                 )
 
-        self.bulk_create(articles_to_create, unique_fields=["user", "link"])
-
-        self.bulk_update(
-            articles_to_update,
-            fields=[
-                "title",
-                "slug",
-                "summary",
-                "content",
-                "table_of_content",
-                "reading_time",
-                "authors",
-                "preview_picture_url",
-                "preview_picture_alt",
-                "contributors",
-                "external_tags",
-                "updated_at",
-                "read_at",
-                "main_source_type",
-                "obj_updated_at",
-            ],
+        saved_articles = {
+            article.link: article
+            for article in self._upsert_articles(
+                user,
+                list(articles_to_save.values()),
+                source_type=source_type,
+                force_update=force_update,
+            )
+        }
+        all_articles = [saved_articles[link] for link in articles_to_save]
+        with measure_stage(constants.TAG_ASSOCIATION_STAGE):
+            ArticleTag.objects.associate_articles_with_tags(
+                all_articles,
+                tags,
+                tagging_reason=constants.TaggingReason.FROM_FEED
+                if source_type == constants.ArticleSourceType.FEED
+                else constants.TaggingReason.ADDED_MANUALLY,
+            )
+
+        return all_articles
+
+    def _build_article_from_data(
+        self, user: User, article_data: ArticleData, *, source_type: constants.ArticleSourceType
+    ) -> Article:
+        title = article_data.title[: constants.ARTICLE_TITLE_MAX_LENGTH]
+        return self.model(
+            user=user,
+            external_article_id=article_data.external_article_id,
+            title=title,
+            slug=slugify(title),
+            summary=article_data.summary,
+            content=article_data.content,
+            table_of_content=article_data.table_of_content,
+            reading_time=article_data.nb_words // user.settings.default_reading_time,
+            authors=article_data.authors,
+            contributors=article_data.contributors,
+            external_tags=article_data.tags,
+            link=article_data.link,
+            preview_picture_url=article_data.preview_picture_url,
+            preview_picture_alt=article_data.preview_picture_alt,
+            published_at=article_data.published_at,
+            updated_at=article_data.updated_at,
+            main_source_type=source_type,
+            main_source_title=article_data.source_title,
+            language=article_data.language,
+            annotations=article_data.annotations,
+            read_at=article_data.read_at,
+            is_favorite=article_data.is_favorite,
         )
 
-        all_articles = [*articles_to_create, *existing_links_to_articles.values()]
-        ArticleTag.objects.associate_articles_with_tags(
-            all_articles,
-            tags,
-            tagging_reason=constants.TaggingReason.FROM_FEED
-            if source_type == constants.ArticleSourceType.FEED
-            else constants.TaggingReason.ADDED_MANUALLY,
+    def _upsert_articles(
+        self,
+        user: User,
+        articles: list[Article],
+        *,
+        source_type: constants.ArticleSourceType,
+        force_update: bool,
+    ) -> list[Article]:
+        """Create new articles and update existing ones in as few statements as possible.
+
+        An existing article is only updated if the new version is more recent or if it brings
+        content we didn't have, unless we force the update. Articles added manually are always
+        updated and marked as unread. All the articles are returned: the upserted ones with their
+        new values and the ones that didn't need an update as they were.
+        """
+        table = self.model._meta.db_table
+        fields = [field for field in self.model._meta.fields if field.concrete]
+        insert_fields = [field for field in fields if not field.primary_key and not field.generated]
+        returned_columns = ", ".join(field.column for field in fields)
+        row_placeholder = f"({', '.join(['%s'] * len(insert_fields))})"
+        set_clauses = _build_upsert_set_clauses(source_type=source_type, force_update=force_update)
+        where_clause = (
+            ""
+            if force_update or source_type == constants.ArticleSourceType.MANUAL
+            else f"WHERE {_IS_MORE_RECENT_SQL} OR {_HAS_CONTENT_UNLIKE_SAVED_SQL}"
         )
+        connection = connections[self.db]
+        # Convert the values read from the database like a query would.
+        compiler = self.get_queryset().query.get_compiler(using=self.db)
+        converters = compiler.get_converters([field.get_col(table) for field in fields])
+
+        saved_articles: list[Article] = []
+        # Postgres limits the number of parameters of a statement.
+        for articles_batch in batched(articles, constants.UPSERT_ARTICLES_BATCH_SIZE):
+            params = [
+                field.get_db_prep_save(field.pre_save(article, add=True), connection)
+                for article in articles_batch
+                for field in insert_fields
+            ]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"WITH upserted_articles AS ("  # noqa: S608 not user input
+                    f"INSERT INTO {table} AS article "
+                    f"({', '.join(field.column for field in insert_fields)}) "
+                    f"VALUES {', '.join([row_placeholder] * len(articles_batch))} "
+                    f"ON CONFLICT (user_id, link) DO UPDATE SET "
+                    f"{', '.join(f'{column} = {value}' for column, value in set_clauses.items())} "
+                    f"{where_clause} "
+                    f"RETURNING {returned_columns}"
+                    f") "
+                    f"SELECT {returned_columns} FROM upserted_articles "
+                    f"UNION ALL "
+                    f"SELECT {returned_columns} FROM {table} "
+                    f"WHERE user_id = %s AND link = ANY(%s) "
+                    f"AND link NOT IN (SELECT link FROM upserted_articles)",
+                    [*params, user.id, [article.link for article in articles_batch]],
+                )
+                rows = cursor.fetchall()
+            if converters:
+                rows = compiler.apply_converters(rows, converters)
+            saved_articles.extend(
+                self.model.from_db(self.db, [field.attname for field in fields], row)
+                for row in rows
+            )
 
-        return all_articles
+        return saved_articles
 
     @transaction.atomic()
     def create_invalid_article(
@@ -687,6 +721,72 @@ class ArticleManager(models.Manager["Article"]):
         return articles_qs
 
 
+# Conditions of the upsert of articles. article is the saved article and EXCLUDED the one we
+# tried to insert.
+_IS_MORE_RECENT_SQL = (
+    "(article.updated_at IS NULL OR EXCLUDED.updated_at IS NULL "
+    "OR EXCLUDED.updated_at > article.updated_at)"
+)
+_HAS_CONTENT_UNLIKE_SAVED_SQL = "(EXCLUDED.content <> '' AND article.content = '')"
+
+
+def _build_upsert_set_clauses(
+    *, source_type: constants.ArticleSourceType, force_update: bool
+) -> dict[str, str]:
+    full_update = "TRUE" if force_update else _IS_MORE_RECENT_SQL
+    full_update_values = {
+        "title": _new_value_or_saved("title"),
+        "slug": _new_value_or_saved("slug"),
+        "summary": _new_value_or_saved("summary"),
+        "reading_time": _new_value_or_saved("reading_time", empty_value="0"),
+        "preview_picture_url": _new_value_or_saved("preview_picture_url"),
+        "preview_picture_alt": _new_value_or_saved("preview_picture_alt"),
+        "authors": _merge_json_lists("authors"),
+        "contributors": _merge_json_lists("contributors"),
+        "external_tags": _merge_json_lists("external_tags"),
+        # GREATEST and LEAST ignore NULL values.
+        "updated_at": "GREATEST(EXCLUDED.updated_at, article.updated_at)",
+        "published_at": "LEAST(EXCLUDED.published_at, article.published_at)",
+    }
+    set_clauses = {
+        column: f"CASE WHEN {full_update} THEN {value} ELSE article.{column} END"
+        for column, value in full_update_values.items()
+    }
+    set_clauses["content"] = (
+        f"CASE WHEN {full_update} OR {_HAS_CONTENT_UNLIKE_SAVED_SQL} "
+        f"THEN {_new_value_or_saved('content')} ELSE article.content END"
+    )
+    set_clauses["table_of_content"] = (
+        f"CASE WHEN {full_update} "
+        f"THEN {_new_value_or_saved('table_of_content', empty_value="'[]'::jsonb")} "
+        f"WHEN {_HAS_CONTENT_UNLIKE_SAVED_SQL} THEN EXCLUDED.table_of_content "
+        f"ELSE article.table_of_content END"
+    )
+    set_clauses["obj_updated_at"] = "EXCLUDED.obj_updated_at"
+    if source_type == constants.ArticleSourceType.MANUAL:
+        # We force the source type to manual if we manually add it to prevent any cleanup later on.
+        set_clauses["main_source_type"] = "EXCLUDED.main_source_type"
+        set_clauses["read_at"] = "NULL"
+
+    return set_clauses
+
+
+def _new_value_or_saved(column: str, *, empty_value: str = "''") -> str:
+    return f"COALESCE(NULLIF(EXCLUDED.{column}, {empty_value}), article.{column})"
+
+
+def _merge_json_lists(column: str) -> str:
+    # Keep the first occurrence of each item, saved items first, like
+    # list(dict.fromkeys(chain(saved, new))).
+    return (
+        "(SELECT COALESCE(jsonb_agg(item ORDER BY position), '[]'::jsonb) FROM ("  # noqa: S608 not user input
+        "SELECT item, MIN(position) AS position "
+        f"FROM jsonb_array_elements(article.{column} || EXCLUDED.{column}) "
+        "WITH ORDINALITY AS items(item, position) GROUP BY item"
+        ") AS unique_items)"
+    )
+
+
 class Article(models.Model):
     title = models.CharField(max_length=constants.ARTICLE_TITLE_MAX_LENGTH)
     slug = models.SlugField(max_length=constants.ARTICLE_TITLE_MAX_LENGTH)
@@ -824,48 +924,6 @@ class Article(models.Model):
 
         return super().save(*args, **kwargs)
 
-    def update_article_from_data(
-        self, article_data: ArticleData, *, force_update: bool = False
-    ) -> bool:
-        is_more_recent = (
-            self.updated_at is None
-            or article_data.updated_at is None
-            or article_data.updated_at > self.updated_at
-        )
-        has_content_unlike_saved = bool(article_data.content) and not bool(self.content)
-        if not is_more_recent and not has_content_unlike_saved and not force_update:
-            return False
-
-        if is_more_recent or force_update:
-            self.title = article_data.title[: constants.ARTICLE_TITLE_MAX_LENGTH] or self.title
-            self.slug = (
-                slugify(article_data.title[: constants.ARTICLE_TITLE_MAX_LENGTH]) or self.slug
-            )
-            self.summary = article_data.summary or self.summary
-            self.content = article_data.content or self.content
-            self.table_of_content = article_data.table_of_content or self.table_of_content
-            self.reading_time = (
-                get_nb_words_from_html(self.content) // self.user.settings.default_reading_time
-            ) or self.reading_time
-            self.preview_picture_url = article_data.preview_picture_url or self.preview_picture_alt
-            self.preview_picture_alt = article_data.preview_picture_alt or self.preview_picture_alt
-            # We create the deduplicated list with dict.fromkeys and not sets to preserve the
-            # initial order. We chain the iterable since they don't have the same type.
-            self.authors = list(dict.fromkeys(chain(self.authors, article_data.authors)))
-            self.contributors = list(
-                dict.fromkeys(chain(self.contributors, article_data.contributors))
-            )
-            self.external_tags = list(dict.fromkeys(chain(self.external_tags, article_data.tags)))
-            self.updated_at = max_or_none([article_data.updated_at, self.updated_at])
-            self.published_at = min_or_none([article_data.published_at, self.published_at])
-        elif has_content_unlike_saved:
-            self.content = article_data.content
-            self.table_of_content = article_data.table_of_content
-
-        self.obj_updated_at = utcnow()
-
-        return True
-
     def update_from_details(self, *, title: str, reading_time: int):
         self.title = title
         self.reading_time = reading_time
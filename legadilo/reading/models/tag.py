@@ -21,7 +21,7 @@ from typing import TYPE_CHECKING, Self, TypedDict
 
 from django.contrib.postgres.aggregates import ArrayAgg
 from django.core.paginator import Paginator
-from django.db import models, transaction
+from django.db import connections, models, transaction
 from django.db.models.functions import Coalesce
 from slugify import slugify
 
@@ -226,16 +226,6 @@ class ArticleTagQuerySet(models.QuerySet["ArticleTag"]):
             article_id__in=[article.id for article in articles], tag_id__in=[tag.id for tag in tags]
         )
 
-    def for_deleted_links(self, links: Iterable[tuple[int, int]]) -> Self:
-        article_ids = [link[0] for link in links]
-        tag_ids = [link[1] for link in links]
-
-        return self.filter(
-            article_id__in=article_ids,
-            tag_id__in=tag_ids,
-            tagging_reason=constants.TaggingReason.DELETED,
-        )
-
 
 class ArticleTagManager(models.Manager["ArticleTag"]):
     _hints: dict
@@ -254,27 +244,40 @@ class ArticleTagManager(models.Manager["ArticleTag"]):
         *,
         readd_deleted=False,
     ):
-        paginator: Paginator[Article] = Paginator(
-            all_articles, core_constants.PER_PAGE_FOR_BULK_OPERATIONS
-        )
-        for page in paginator:
-            existing_article_tag_links = list(
-                self.get_queryset()
-                .for_articles_and_tags(page.object_list, tags)
-                .values_list("article_id", "tag_id")
+        tag_ids = [tag.id for tag in tags]
+        if not tag_ids:
+            return
+
+        # We work on article ids directly in the database: this way, we never load the articles
+        # when given a queryset and the whole association is done in one statement whatever the
+        # number of articles.
+        if isinstance(all_articles, models.QuerySet):
+            article_ids_qs = all_articles.order_by().values("id")
+            article_ids: models.QuerySet | list[int] = article_ids_qs
+            article_ids_sql, article_ids_params = article_ids_qs.query.get_compiler(
+                using=self.db
+            ).as_sql()
+        else:
+            article_ids = [article.id for article in all_articles]
+            if not article_ids:
+                return
+            article_ids_sql, article_ids_params = "SELECT unnest(%s::bigint[])", (article_ids,)
+
+        if readd_deleted:
+            self.get_queryset().filter(
+                article_id__in=article_ids,
+                tag_id__in=tag_ids,
+                tagging_reason=constants.TaggingReason.DELETED,
+            ).update(tagging_reason=constants.TaggingReason.ADDED_MANUALLY)
+
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {self.model._meta.db_table} (article_id, tag_id, tagging_reason) "  # noqa: S608 not user input
+                f"SELECT article.id, tag.id, %s FROM ({article_ids_sql}) AS article(id) "
+                "CROSS JOIN unnest(%s::bigint[]) AS tag(id) "
+                "ON CONFLICT (article_id, tag_id) DO NOTHING",
+                (tagging_reason, *article_ids_params, tag_ids),
             )
-            article_tags_to_create = [
-                self.model(article=article, tag=tag, tagging_reason=tagging_reason)
-                for article in page.object_list
-                for tag in tags
-                if (article.id, tag.id) not in existing_article_tag_links
-            ]
-            self.bulk_create(article_tags_to_create)
-
-            if readd_deleted:
-                self.get_queryset().for_deleted_links(existing_article_tag_links).update(
-                    tagging_reason=constants.TaggingReason.ADDED_MANUALLY
-                )
 
     def dissociate_article_with_tags_not_in_list(self, article: Article, tags: Iterable[Tag]):
         existing_article_tag_slugs = set(article.tags.all().values_list("slug", flat=True))
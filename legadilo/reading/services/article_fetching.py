@@ -16,29 +16,27 @@
 from __future__ import annotations
 
 import logging
-import sys
 from datetime import datetime
 from typing import Annotated, Any, Literal
 from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup
-from django.template.defaultfilters import truncatewords_html
 from pydantic import BaseModel as BaseSchema
 from pydantic import model_validator
-from slugify import slugify
 
 from legadilo.reading import constants
-from legadilo.utils.http_utils import get_async_client
-from legadilo.utils.security import (
-    full_sanitize,
-    sanitize_keep_safe_tags,
+from legadilo.reading.services.article_html import process_article_html
+from legadilo.utils.http_utils import (
+    ResponseTooBigError,
+    get_async_client,
+    get_limited_content,
 )
+from legadilo.utils.security import full_sanitize
 from legadilo.utils.time_utils import safe_datetime_parse
 from legadilo.utils.validators import (
     CleanedString,
     FullSanitizeValidator,
     LanguageCodeValidatorOrDefault,
-    TableOfContentItem,
     TableOfContentTopItem,
     ValidUrlValidator,
     default_frozen_model_config,
@@ -46,7 +44,6 @@ from legadilo.utils.validators import (
     none_to_value,
     normalize_url,
     remove_falsy_items,
-    sanitize_keep_safe_tags_validator,
     truncate,
 )
 
@@ -73,12 +70,11 @@ class ArticleData(BaseSchema):
         str, FullSanitizeValidator, truncate(constants.ARTICLE_SOURCE_TITLE_MAX_LENGTH)
     ]
     title: Annotated[str, FullSanitizeValidator]
-    summary: Annotated[
-        str,
-        sanitize_keep_safe_tags_validator(constants.EXTRA_TAGS_TO_REMOVE_FROM_SUMMARY),
-    ]
-    content: Annotated[str, sanitize_keep_safe_tags_validator()]
+    # The summary and the content are sanitized by process_article_html in prepare_values.
+    summary: str
+    content: str
     table_of_content: tuple[TableOfContentTopItem, ...] = ()
+    nb_words: int = 0
     authors: Annotated[tuple[CleanedString, ...], remove_falsy_items(tuple)] = ()
     contributors: Annotated[tuple[CleanedString, ...], remove_falsy_items(tuple)] = ()
     tags: Annotated[tuple[CleanedString, ...], remove_falsy_items(tuple)] = ()
@@ -97,22 +93,15 @@ class ArticleData(BaseSchema):
     def prepare_values(
         values: dict[str, Any],
     ) -> dict[str, Any]:
-        summary = values.get("summary", "")
-        content = values.get("content", "")
         title = values.get("title", "")
         source_title = values.get("source_title", "")
-        link = values.get("link")
-
-        # Consider link optional here to please mypy. It's mandatory anyway so validation will fail
-        # later if needed.
-        if link:
-            summary = _resolve_relative_links(link, summary)
-            content = _resolve_relative_links(link, content)
-
-        content, table_of_content = _build_table_of_content(content)
-
-        if not summary and content:
-            summary = _get_fallback_summary_from_content(content)
+        article_html = process_article_html(
+            summary=values.get("summary", ""),
+            content=values.get("content", ""),
+            # Consider link optional here to please mypy. It's mandatory anyway so validation will
+            # fail later if needed.
+            link=values.get("link"),
+        )
 
         if not title:
             title = urlparse(values.get("link")).netloc
@@ -122,39 +111,15 @@ class ArticleData(BaseSchema):
 
         return {
             **values,
-            "summary": summary,
-            "content": content,
+            "summary": article_html.summary,
+            "content": article_html.content,
             "title": title,
             "source_title": source_title,
-            "table_of_content": table_of_content,
+            "table_of_content": article_html.table_of_content,
+            "nb_words": article_html.nb_words,
         }
 
 
-def _resolve_relative_links(article_link: str, content: str) -> str:
-    soup = BeautifulSoup(content, "html.parser")
-    for link in soup.find_all("a"):
-        if (href := link.get("href")) is None:
-            continue
-
-        link["href"] = _normalize_url(article_link, href)
-
-    for image in soup.find_all("img"):
-        if (src := image.get("src")) is None:
-            continue
-
-        image["src"] = _normalize_url(article_link, src)
-
-    return str(soup)
-
-
-def _normalize_url(article_link: str, elt_link: str):
-    try:
-        return normalize_url(article_link, elt_link)
-    except ValueError:
-        logger.info(f"Failed to normalize url {elt_link=} against {article_link=}")
-        return elt_link
-
-
 class ArticleTooBigError(Exception):
     pass
 
@@ -180,13 +145,13 @@ async def _get_page_content(url: str) -> tuple[str, BeautifulSoup, str | None]:
         # We can have HTTP redirect with the meta htt-equiv tag. Let's read them to up to 10 time
         # to find the final URL of the article we are looking for.
         for _ in range(10):
-            response = await client.get(url)
-            response.raise_for_status()
-            if sys.getsizeof(response.content) > constants.MAX_ARTICLE_FILE_SIZE:
-                raise ArticleTooBigError
-            soup = BeautifulSoup(
-                response.content.decode(response.encoding or "utf-8"), "html.parser"
-            )
+            try:
+                content, response = await get_limited_content(
+                    client, url, max_size=constants.MAX_ARTICLE_FILE_SIZE
+                )
+            except ResponseTooBigError as e:
+                raise ArticleTooBigError from e
+            soup = BeautifulSoup(content.decode(response.encoding or "utf-8"), "html.parser")
             if (
                 (http_equiv_refresh := soup.find("meta", attrs={"http-equiv": "refresh"}))
                 and (http_equiv_refresh_value := http_equiv_refresh.get("content"))
@@ -292,16 +257,6 @@ def _get_summary(soup: BeautifulSoup, content: str) -> str:
     return summary
 
 
-def _get_fallback_summary_from_content(content: str) -> str:
-    return truncatewords_html(
-        sanitize_keep_safe_tags(
-            content,
-            extra_tags_to_cleanup=constants.EXTRA_TAGS_TO_REMOVE_FROM_SUMMARY,
-        ),
-        constants.MAX_SUMMARY_LENGTH,
-    )
-
-
 def _get_content(soup: BeautifulSoup) -> str:
     articles = soup.find_all("article")
     article_content = None
@@ -457,25 +412,3 @@ def _get_lang(soup: BeautifulSoup, content_language: str | None) -> str:
         language = content_language
 
     return language
-
-
-def _build_table_of_content(content: str) -> tuple[str, list[TableOfContentTopItem]]:
-    soup = BeautifulSoup(content, "html.parser")
-    toc = []
-    toc_item_top_level: TableOfContentTopItem | None = None
-
-    for header in soup.find_all(["h1", "h2", "h3", "h4", "h5", "h6"]):
-        text = full_sanitize(header.text)
-        id_ = header.get("id") or slugify(text)
-        header["id"] = id_
-        level = int(header.name.replace("h", ""))
-        # If the content is well-structured, all top level title will be at the same level.
-        # Since we don't know, we allow for a first h2 to be followed by a h1.
-        if toc_item_top_level is None or level <= toc_item_top_level.level:
-            toc_item_top_level = TableOfContentTopItem(id=id_, text=text, level=level)
-            toc.append(toc_item_top_level)
-        # We only allow one level in the TOC. It's enough.
-        elif level == toc_item_top_level.level + 1:
-            toc_item_top_level.children.append(TableOfContentItem(id=id_, text=text, level=level))
-
-    return str(soup), toc
@@ -0,0 +1,135 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+from django.template.defaultfilters import truncatewords_html
+from slugify import slugify
+
+from legadilo.reading import constants
+from legadilo.utils.security import full_sanitize, sanitize_keep_safe_tags
+from legadilo.utils.text import get_nb_words
+from legadilo.utils.validators import TableOfContentItem, TableOfContentTopItem, normalize_url
+
+logger = logging.getLogger(__name__)
+
+HEADER_TAGS = frozenset({"h1", "h2", "h3", "h4", "h5", "h6"})
+
+
+@dataclass(frozen=True)
+class ArticleHtml:
+    summary: str
+    content: str
+    table_of_content: list[TableOfContentTopItem]
+    nb_words: int
+
+
+def process_article_html(*, summary: str, content: str, link: str | None) -> ArticleHtml:
+    """Clean the HTML of an article and extract what we need from it.
+
+    The content is parsed once: its links are resolved, its headers get an id to build the table
+    of content and its words are counted while we walk its tree. It's then sanitized once. The
+    summary is built from the sanitized content if we don't have one, so we only sanitize the
+    truncated content again to remove the tags we don't want in summaries.
+    """
+    content, table_of_content, nb_words = _process_content(content, link)
+
+    if summary:
+        summary = _process_summary(summary, link)
+    elif content:
+        # Removing the tags we don't want in summaries keeps their text, so we can truncate first:
+        # we get the same summary as when the whole content is cleaned and then truncated.
+        summary = sanitize_keep_safe_tags(
+            truncatewords_html(content, constants.MAX_SUMMARY_LENGTH),
+            extra_tags_to_cleanup=constants.EXTRA_TAGS_TO_REMOVE_FROM_SUMMARY,
+        )
+
+    return ArticleHtml(
+        summary=summary, content=content, table_of_content=table_of_content, nb_words=nb_words
+    )
+
+
+def _process_content(
+    content: str, link: str | None
+) -> tuple[str, list[TableOfContentTopItem], int]:
+    soup = BeautifulSoup(content, "html.parser")
+    table_of_content_builder = TableOfContentBuilder()
+    texts = []
+    for element in soup.descendants:
+        if isinstance(element, Tag):
+            if element.name in HEADER_TAGS:
+                table_of_content_builder.add(element)
+            elif link:
+                _resolve_relative_link(link, element)
+        # Comments, scripts, styles and templates are subclasses of NavigableString. The
+        # sanitization removes them, so we don't count their words.
+        elif type(element) is NavigableString:
+            texts.append(element)
+
+    return (
+        sanitize_keep_safe_tags(str(soup)),
+        table_of_content_builder.table_of_content,
+        get_nb_words("".join(texts)),
+    )
+
+
+def _process_summary(summary: str, link: str | None) -> str:
+    if link:
+        soup = BeautifulSoup(summary, "html.parser")
+        for element in soup.find_all(["a", "img"]):
+            _resolve_relative_link(link, element)
+        summary = str(soup)
+
+    return sanitize_keep_safe_tags(
+        summary, extra_tags_to_cleanup=constants.EXTRA_TAGS_TO_REMOVE_FROM_SUMMARY
+    )
+
+
+def _resolve_relative_link(article_link: str, element: Tag):
+    if element.name == "a" and (href := element.get("href")) is not None:
+        element["href"] = _normalize_url(article_link, href)
+    elif element.name == "img" and (src := element.get("src")) is not None:
+        element["src"] = _normalize_url(article_link, src)
+
+
+def _normalize_url(article_link: str, elt_link: str):
+    try:
+        return normalize_url(article_link, elt_link)
+    except ValueError:
+        logger.info(f"Failed to normalize url {elt_link=} against {article_link=}")
+        return elt_link
+
+
+class TableOfContentBuilder:
+    def __init__(self):
+        self.table_of_content: list[TableOfContentTopItem] = []
+        self._top_level_item: TableOfContentTopItem | None = None
+
+    def add(self, header: Tag):
+        text = full_sanitize(header.text)
+        id_ = header.get("id") or slugify(text)
+        header["id"] = id_
+        level = int(header.name.replace("h", ""))
+        # If the content is well-structured, all top level title will be at the same level.
+        # Since we don't know, we allow for a first h2 to be followed by a h1.
+        if self._top_level_item is None or level <= self._top_level_item.level:
+            self._top_level_item = TableOfContentTopItem(id=id_, text=text, level=level)
+            self.table_of_content.append(self._top_level_item)
+        # We only allow one level in the TOC. It's enough.
+        elif level == self._top_level_item.level + 1:
+            self._top_level_item.children.append(TableOfContentItem(id=id_, text=text, level=level))
@@ -15,9 +15,14 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from allauth.account.signals import user_signed_up
+from django.dispatch import Signal
 
 from legadilo.reading.models import ReadingList
 
+# Sent with the user when they open a reading list, before we mark them as seen. Like marking them
+# as seen, this is done at most once per hour.
+reading_list_viewed = Signal()
+
 
 def create_default_reading_list_on_user_registration(sender, user, **kwargs):
     ReadingList.objects.create_default_lists(user=user)
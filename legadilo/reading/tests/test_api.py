@@ -96,7 +96,7 @@ class TestCreateArticleView:
             return_value=ArticleDataFactory(link=self.article_link),
         )
 
-        with django_assert_num_queries(13):
+        with django_assert_num_queries(12):
             response = logged_in_sync_client.post(
                 self.url, {"link": self.article_link}, content_type="application/json"
             )
@@ -119,7 +119,7 @@ class TestCreateArticleView:
             return_value=ArticleDataFactory(link=self.article_link),
         )
 
-        with django_assert_num_queries(17):
+        with django_assert_num_queries(15):
             response = logged_in_sync_client.post(
                 self.url,
                 {"link": self.article_link, "tags": ["Some tag"]},
@@ -145,7 +145,7 @@ class TestCreateArticleView:
             return_value=ArticleDataFactory(link=self.article_link),
         )
 
-        with django_assert_num_queries(13):
+        with django_assert_num_queries(12):
             response = logged_in_sync_client.post(
                 self.url,
                 {
@@ -279,7 +279,7 @@ class TestUpdateArticleView:
         tag_to_delete = TagFactory(user=user, title="Tag to delete")
         self.article.tags.add(existing_tag, tag_to_delete)
 
-        with django_assert_num_queries(17):
+        with django_assert_num_queries(16):
             response = logged_in_sync_client.patch(
                 self.url,
                 {
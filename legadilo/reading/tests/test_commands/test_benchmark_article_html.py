@@ -0,0 +1,42 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from legadilo.reading.tests.fixtures import get_article_fixture_content
+
+
+class TestBenchmarkArticleHtmlCommand:
+    def test_benchmark(self, tmp_path):
+        (tmp_path / "article.html").write_text(
+            get_article_fixture_content("sample_blog_article.html"), encoding="utf-8"
+        )
+        stdout = StringIO()
+
+        call_command("benchmark_article_html", tmp_path, rounds=2, stdout=stdout)
+
+        output = stdout.getvalue()
+        assert "Corpus: 1 articles" in output
+        assert "Round 1: 1 articles in " in output
+        assert "Round 2: 1 articles in " in output
+        assert "Per article latency: p50=" in output
+
+    def test_empty_corpus(self, tmp_path):
+        with pytest.raises(CommandError, match="No article file found"):
+            call_command("benchmark_article_html", tmp_path)
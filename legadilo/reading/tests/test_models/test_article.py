@@ -40,7 +40,6 @@ from legadilo.reading.tests.factories import (
 )
 from legadilo.utils.testing import serialize_for_snapshot
 from legadilo.utils.time_utils import utcdt, utcnow
-from legadilo.utils.validators import TableOfContentTopItem
 
 
 @pytest.mark.parametrize(
@@ -1006,8 +1005,8 @@ class TestArticleManager:
         )
         now_dt = utcnow()
 
-        with django_assert_num_queries(7), time_machine.travel("2024-06-02 12:00:00", tick=False):
-            Article.objects.update_or_create_from_articles_list(
+        with django_assert_num_queries(4), time_machine.travel("2024-06-02 12:00:00", tick=False):
+            articles = Article.objects.update_or_create_from_articles_list(
                 user,
                 [
                     ArticleData(
@@ -1085,6 +1084,13 @@ class TestArticleManager:
             )
 
         assert Article.objects.count() == 4
+        # Articles that didn't need an update are returned too.
+        assert [article.link for article in articles] == [
+            "https://example.com/article/1",
+            existing_article_to_update.link,
+            existing_article_to_keep.link,
+            "https://example.com/article/3",
+        ]
         existing_article_to_update.refresh_from_db()
         assert existing_article_to_update.title == "Article updated"
         assert existing_article_to_update.slug == "article-updated"
@@ -1128,7 +1134,7 @@ class TestArticleManager:
     def test_same_link_multiple_times(self, user, django_assert_num_queries):
         now_dt = utcnow()
 
-        with django_assert_num_queries(4):
+        with django_assert_num_queries(3):
             Article.objects.update_or_create_from_articles_list(
                 user,
                 [
@@ -1177,6 +1183,43 @@ class TestArticleManager:
         assert other_article.slug == "article-1"
         assert other_article.reading_time == 3
 
+    @patch.object(constants, "UPSERT_ARTICLES_BATCH_SIZE", 2)
+    def test_upsert_articles_in_batches(self, user, django_assert_num_queries):
+        existing_article = ArticleFactory(user=user, authors=["Author 1"], updated_at=utcnow())
+        articles_data = [
+            ArticleData(
+                external_article_id=f"article-{index}",
+                title=f"Article {index}",
+                summary="",
+                content="",
+                authors=(f"Author {index}",),
+                link=link,
+                source_title="Some site",
+                language="en",
+            )
+            for index, link in enumerate([
+                "https://example.com/article/new-1",
+                existing_article.link,
+                "https://example.com/article/new-2",
+            ])
+        ]
+
+        with django_assert_num_queries(4):
+            articles = Article.objects.update_or_create_from_articles_list(
+                user, articles_data, [], source_type=constants.ArticleSourceType.FEED
+            )
+
+        assert Article.objects.count() == 3
+        assert [article.link for article in articles] == [
+            article_data.link for article_data in articles_data
+        ]
+        assert articles[1].id == existing_article.id
+        assert [article.authors for article in articles] == [
+            ["Author 0"],
+            ["Author 1"],
+            ["Author 2"],
+        ]
+
     def test_manually_readd_read_article(self, user, django_assert_num_queries):
         now_dt = utcnow()
         existing_article = ArticleFactory(
@@ -1205,7 +1248,7 @@ class TestArticleManager:
             language="fr",
         )
 
-        with django_assert_num_queries(4):
+        with django_assert_num_queries(3):
             Article.objects.update_or_create_from_articles_list(
                 user, [article_data], [], source_type=constants.ArticleSourceType.MANUAL
             )
@@ -1241,7 +1284,7 @@ class TestArticleManager:
             language="fr",
         )
 
-        with django_assert_num_queries(4):
+        with django_assert_num_queries(3):
             Article.objects.update_or_create_from_articles_list(
                 user, [article_data], [], source_type=constants.ArticleSourceType.FEED
             )
@@ -1249,6 +1292,174 @@ class TestArticleManager:
         existing_article.refresh_from_db()
         assert existing_article.read_at == now_dt
 
+    @pytest.mark.parametrize(
+        ("initial_data", "force_update", "expected_data", "expected_was_updated"),
+        [
+            pytest.param(
+                {
+                    "title": "Initial title",
+                    "content": "Initial content",
+                    "updated_at": utcdt(2024, 4, 21),
+                },
+                False,
+                {
+                    "title": "Initial title",
+                    "content": "Initial content",
+                    "updated_at": utcdt(2024, 4, 21),
+                },
+                False,
+                id="initial-data-more-recent-than-update-proposal",
+            ),
+            pytest.param(
+                {
+                    "title": "Initial title",
+                    "content": "Initial content",
+                    "updated_at": utcdt(2024, 4, 21),
+                },
+                True,
+                {
+                    "title": "Updated title",
+                    "content": """<h2 id="my-title">My title</h2> Updated content""",
+                    "updated_at": utcdt(2024, 4, 21),
+                },
+                True,
+                id="initial-data-more-recent-than-update-proposal-but-ask-for-force-update",
+            ),
+            pytest.param(
+                {
+                    "title": "Initial title",
+                    "content": "",
+                    "updated_at": utcdt(2024, 4, 21),
+                },
+                False,
+                {
+                    "title": "Initial title",
+                    "content": """<h2 id="my-title">My title</h2> Updated content""",
+                    "updated_at": utcdt(2024, 4, 21),
+                },
+                True,
+                id="initial-data-more-recent-than-update-proposal-but-update-has-content",
+            ),
+            pytest.param(
+                {
+                    "title": "Initial title",
+                    "summary": "Initial summary",
+                    "content": "Initial content",
+                    "table_of_content": [],
+                    "updated_at": utcdt(2024, 4, 19),
+                    "external_tags": ["Initial tag", "Some tag"],
+                    "authors": ["Author 1", "Author 2"],
+                    "contributors": ["Contributor 1", "Contributor 2"],
+                },
+                False,
+                {
+                    "title": "Updated title",
+                    "summary": "Updated summary",
+                    "content": """<h2 id="my-title">My title</h2> Updated content""",
+                    "table_of_content": [
+                        {"id": "my-title", "text": "My title", "level": 2, "children": []}
+                    ],
+                    "updated_at": utcdt(2024, 4, 20),
+                    "external_tags": ["Initial tag", "Some tag", "Updated tag"],
+                    "authors": ["Author 1", "Author 2", "Author 3"],
+                    "contributors": ["Contributor 1", "Contributor 2", "Contributor 3"],
+                    "preview_picture_url": "https://example.com/preview.png",
+                    "preview_picture_alt": "Some image alt",
+                },
+                True,
+                id="initial-data-less-recent-than-update-proposal",
+            ),
+        ],
+    )
+    @time_machine.travel("2024-06-01 12:00:00", tick=False)
+    def test_update_existing_article(
+        self,
+        user,
+        initial_data: dict,
+        force_update: bool,
+        expected_data: dict,
+        expected_was_updated: bool,
+    ):
+        article = ArticleFactory(**initial_data, user=user, link="https://example.com/article/1")
+
+        with time_machine.travel("2024-06-02 12:00:00", tick=False):
+            articles = Article.objects.update_or_create_from_articles_list(
+                user,
+                [
+                    ArticleData(
+                        external_article_id="some-article-1",
+                        title="Updated title",
+                        summary="Updated summary",
+                        content="<h2>My title</h2> Updated content",
+                        authors=("Author 2", "Author 3"),
+                        contributors=("Contributor 2", "Contributor 3"),
+                        tags=("Some tag", "Updated tag"),
+                        link="https://example.com/article/1",
+                        preview_picture_url="https://example.com/preview.png",
+                        preview_picture_alt="Some image alt",
+                        published_at=utcdt(2024, 4, 20),
+                        updated_at=utcdt(2024, 4, 20),
+                        source_title="Some site",
+                        language="fr",
+                    )
+                ],
+                [],
+                source_type=constants.ArticleSourceType.FEED,
+                force_update=force_update,
+            )
+
+        article.refresh_from_db()
+        assert articles == [article]
+        assert (article.obj_updated_at == utcdt(2024, 6, 2, 12)) == expected_was_updated
+        for attr, value in expected_data.items():
+            assert getattr(article, attr) == value
+
+    def test_update_existing_article_with_missing_data(self, user):
+        initial_data = {
+            "title": "Initial title",
+            "summary": "Initial summary",
+            "content": "Initial content",
+            "updated_at": utcdt(2024, 4, 19),
+            "reading_time": 3,
+        }
+        expected_data = {
+            "title": "Updated title",
+            "summary": "Initial summary",
+            "content": "Initial content",
+            "updated_at": utcdt(2024, 4, 20),
+            "reading_time": 3,
+        }
+        article = ArticleFactory(**initial_data, user=user, link="https://example.com/article/1")
+
+        Article.objects.update_or_create_from_articles_list(
+            user,
+            [
+                ArticleData(
+                    external_article_id="some-article-1",
+                    title="Updated title",
+                    summary="",
+                    content="",
+                    table_of_content=(),
+                    authors=("Author",),
+                    contributors=(),
+                    tags=(),
+                    link="https://example.com/article/1",
+                    preview_picture_url="",
+                    preview_picture_alt="",
+                    published_at=utcdt(2024, 4, 20),
+                    updated_at=utcdt(2024, 4, 20),
+                    source_title="Some site",
+                    language="fr",
+                )
+            ],
+            [],
+            source_type=constants.ArticleSourceType.FEED,
+        )
+
+        article.refresh_from_db()
+        for attr, value in expected_data.items():
+            assert getattr(article, attr) == value
+
     def test_count_unread_articles_of_reading_lists(self, user, django_assert_num_queries):
         reading_list1 = ReadingListFactory(user=user)
         reading_list2 = ReadingListFactory(user=user, read_status=constants.ReadStatus.ONLY_READ)
@@ -1331,7 +1542,7 @@ class TestArticleManager:
         tag = TagFactory(user=user, title="Test")
         link = "http://toto.com/"
 
-        with django_assert_num_queries(7):
+        with django_assert_num_queries(6):
             article, created = Article.objects.create_invalid_article(
                 user,
                 link,
@@ -1504,158 +1715,3 @@ class TestArticleModel:
         article = ArticleFactory(opened_at=utcnow(), read_at=utcnow())
         assert article.is_read
         assert article.was_opened
-
-    @pytest.mark.parametrize(
-        ("initial_data", "force_update", "expected_data", "expected_was_updated"),
-        [
-            pytest.param(
-                {
-                    "title": "Initial title",
-                    "content": "Initial content",
-                    "updated_at": utcdt(2024, 4, 21),
-                },
-                False,
-                {
-                    "title": "Initial title",
-                    "content": "Initial content",
-                    "updated_at": utcdt(2024, 4, 21),
-                },
-                False,
-                id="initial-data-more-recent-than-update-proposal",
-            ),
-            pytest.param(
-                {
-                    "title": "Initial title",
-                    "content": "Initial content",
-                    "updated_at": utcdt(2024, 4, 21),
-                },
-                True,
-                {
-                    "title": "Updated title",
-                    "content": """<h2 id="my-title">My title</h2> Updated content""",
-                    "updated_at": utcdt(2024, 4, 21),
-                },
-                True,
-                id="initial-data-more-recent-than-update-proposal-but-ask-for-force-update",
-            ),
-            pytest.param(
-                {
-                    "title": "Initial title",
-                    "content": "",
-                    "updated_at": utcdt(2024, 4, 21),
-                },
-                False,
-                {
-                    "title": "Initial title",
-                    "content": """<h2 id="my-title">My title</h2> Updated content""",
-                    "updated_at": utcdt(2024, 4, 21),
-                },
-                True,
-                id="initial-data-more-recent-than-update-proposal-but-update-has-content",
-            ),
-            pytest.param(
-                {
-                    "title": "Initial title",
-                    "summary": "Initial summary",
-                    "content": "Initial content",
-                    "table_of_content": [],
-                    "updated_at": utcdt(2024, 4, 19),
-                    "external_tags": ["Initial tag", "Some tag"],
-                    "authors": ["Author 1", "Author 2"],
-                    "contributors": ["Contributor 1", "Contributor 2"],
-                },
-                False,
-                {
-                    "title": "Updated title",
-                    "summary": "Updated summary",
-                    "content": """<h2 id="my-title">My title</h2> Updated content""",
-                    "table_of_content": (
-                        TableOfContentTopItem(id="my-title", text="My title", level=2, children=[]),
-                    ),
-                    "updated_at": utcdt(2024, 4, 20),
-                    "external_tags": ["Initial tag", "Some tag", "Updated tag"],
-                    "authors": ["Author 1", "Author 2", "Author 3"],
-                    "contributors": ["Contributor 1", "Contributor 2", "Contributor 3"],
-                },
-                True,
-                id="initial-data-less-recent-than-update-proposal",
-            ),
-        ],
-    )
-    def test_update_article_from_data(
-        self,
-        user,
-        initial_data: dict,
-        force_update: bool,
-        expected_data: dict,
-        expected_was_updated: bool,
-    ):
-        article = ArticleFactory.build(**initial_data, user=user)
-
-        was_updated = article.update_article_from_data(
-            ArticleData(
-                external_article_id="some-article-1",
-                title="Updated title",
-                summary="Updated summary",
-                content="<h2>My title</h2> Updated content",
-                table_of_content=(
-                    TableOfContentTopItem(id="header", text="My title", level=2, children=[]),
-                ),
-                authors=("Author 2", "Author 3"),
-                contributors=("Contributor 2", "Contributor 3"),
-                tags=("Some tag", "Updated tag"),
-                link="https://example.com/article/1",
-                preview_picture_url="https://example.com/preview.png",
-                preview_picture_alt="Some image alt",
-                published_at=utcdt(2024, 4, 20),
-                updated_at=utcdt(2024, 4, 20),
-                source_title="Some site",
-                language="fr",
-            ),
-            force_update=force_update,
-        )
-
-        assert was_updated == expected_was_updated
-        for attr, value in expected_data.items():
-            assert getattr(article, attr) == value
-
-    def test_update_article_from_data_article_data_is_missing_some_data(self, user):
-        initial_data = {
-            "title": "Initial title",
-            "summary": "Initial summary",
-            "content": "Initial content",
-            "updated_at": utcdt(2024, 4, 19),
-            "reading_time": 3,
-        }
-        expected_data = {
-            "title": "Updated title",
-            "summary": "Initial summary",
-            "content": "Initial content",
-            "updated_at": utcdt(2024, 4, 20),
-            "reading_time": 3,
-        }
-        article = ArticleFactory.build(**initial_data, user=user)
-
-        was_updated = article.update_article_from_data(
-            ArticleData(
-                external_article_id="some-article-1",
-                title="Updated title",
-                summary="",
-                content="",
-                table_of_content=(),
-                authors=("Author",),
-                contributors=(),
-                tags=(),
-                link="https://example.com/article/1",
-                preview_picture_url="",
-                preview_picture_alt="",
-                published_at=utcdt(2024, 4, 20),
-                updated_at=utcdt(2024, 4, 20),
-                source_title="Some site",
-                language="fr",
-            )
-        )
-
-        assert was_updated
-        for attr, value in expected_data.items():
-            assert getattr(article, attr) == value
@@ -17,7 +17,7 @@
 import pytest
 
 from legadilo.reading import constants
-from legadilo.reading.models import ArticleTag, ReadingListTag, Tag
+from legadilo.reading.models import Article, ArticleTag, ReadingListTag, Tag
 from legadilo.reading.models.tag import SubTagMapping
 from legadilo.reading.tests.factories import ArticleFactory, ReadingListFactory, TagFactory
 
@@ -194,17 +194,6 @@ class TestArticleTagQuerySet:
 
         assert article_tags == [self.article_tag1, self.article_tag2]
 
-    def test_for_deleted_links(self):
-        article_tags_marked_as_deleted = list(
-            ArticleTag.objects.get_queryset().for_deleted_links([
-                (self.article.id, self.tag1.id),
-                (self.article.id, self.tag2.id),
-                (self.article.id, self.tag3.id),
-            ])
-        )
-
-        assert article_tags_marked_as_deleted == [self.article_tag2]
-
 
 @pytest.mark.django_db
 class TestArticleTagManager:
@@ -239,7 +228,7 @@ class TestArticleTagManager:
         articles = [self.article1, self.article2]
         tags = [self.tag1, self.tag2]
 
-        with django_assert_num_queries(2):
+        with django_assert_num_queries(1):
             ArticleTag.objects.associate_articles_with_tags(
                 articles, tags, tagging_reason=constants.TaggingReason.FROM_FEED
             )
@@ -273,6 +262,24 @@ class TestArticleTagManager:
             },
         ]
 
+    def test_associate_articles_with_tags_from_queryset(self, user, django_assert_num_queries):
+        articles = Article.objects.get_queryset().filter(id=self.article2.id)
+
+        with django_assert_num_queries(1):
+            ArticleTag.objects.associate_articles_with_tags(
+                articles, [self.tag3], tagging_reason=constants.TaggingReason.ADDED_MANUALLY
+            )
+
+        assert list(
+            ArticleTag.objects.filter(article=self.article2).values("tag", "tagging_reason")
+        ) == [{"tag": self.tag3.id, "tagging_reason": constants.TaggingReason.ADDED_MANUALLY}]
+
+    def test_associate_articles_with_tags_no_tags(self, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            ArticleTag.objects.associate_articles_with_tags(
+                [self.article2], [], tagging_reason=constants.TaggingReason.FROM_FEED
+            )
+
     def test_associate_articles_with_tags_readd_deleted(self, user, django_assert_num_queries):
         articles = [self.article1]
         tags = [self.tag1, self.tag2]
@@ -0,0 +1,120 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import nh3
+from django.template.defaultfilters import truncatewords_html
+
+from legadilo.reading import constants
+from legadilo.reading.services.article_html import process_article_html
+from legadilo.utils.security import sanitize_keep_safe_tags
+from legadilo.utils.text import get_nb_words_from_html
+
+
+def test_process_article_html():
+    article_html = process_article_html(
+        summary='<p><a href="/summary">Summary</a><img src="/summary.png"></p>',
+        content=(
+            "<h1>Title</h1>\n"
+            '<p onclick="alert()">Some <a href="/link">text</a> &amp; words'
+            '<img src="image.png"></p>\n'
+            "<!-- A comment -->\n"
+            '<h2 id="sub">Sub title</h2>\n'
+            "<script>var notCounted = 1;</script>"
+            "<style>p { color: red; }</style>"
+            "<template>Removed by sanitization</template>"
+        ),
+        link="https://example.com/articles/1",
+    )
+
+    assert article_html.summary == (
+        '<p><a href="https://example.com/summary" rel="noopener noreferrer">Summary</a></p>'
+    )
+    assert article_html.content == (
+        '<h1 id="title">Title</h1>\n<p>Some <a href="https://example.com/link" '
+        'rel="noopener noreferrer">text</a> &amp; words<img src="https://example.com/image.png">'
+        '</p>\n\n<h2 id="sub">Sub title</h2>\n'
+    )
+    assert [item.model_dump() for item in article_html.table_of_content] == [
+        {
+            "id": "title",
+            "text": "Title",
+            "level": 1,
+            "children": [{"id": "sub", "text": "Sub title", "level": 2}],
+        }
+    ]
+    assert article_html.nb_words == 6
+
+
+def test_process_article_html_fallback_summary():
+    article_html = process_article_html(
+        summary="",
+        content="<p>" + "word " * 300 + '<img src="/image.png"></p>',
+        link=None,
+    )
+
+    assert article_html.summary == "<p>" + "word " * 254 + "word …</p>"
+    assert article_html.content == "<p>" + "word " * 300 + '<img src="/image.png"></p>'
+    assert not article_html.table_of_content
+    assert article_html.nb_words == 300
+
+
+def test_process_empty_article_html():
+    article_html = process_article_html(summary="", content="", link="https://example.com")
+
+    assert not article_html.summary
+    assert not article_html.content
+    assert not article_html.table_of_content
+    assert article_html.nb_words == 0
+
+
+def test_process_article_html_sanitize_content_once(mocker):
+    nh3_clean_spy = mocker.spy(nh3, "clean")
+    content = (
+        '<p>Some <a href="/link">text</a>, with <strong>formatting</strong>.</p>'
+        "<!-- A comment -->"
+        "<script>var notCounted = 1;</script>"
+        "<ul><li>A list of</li> <li>items</li></ul>"
+    )
+
+    article_html = process_article_html(
+        summary="Summary", content=content, link="https://example.com/articles/1"
+    )
+
+    # Once for the content and once for the summary.
+    assert nh3_clean_spy.call_count == 2
+    # This is how the reading time was computed from the saved content.
+    assert article_html.nb_words == get_nb_words_from_html(article_html.content) == 7
+
+
+def test_process_article_html_fallback_summary_truncated_after_cleanup():
+    content = (
+        "<h2>Title</h2><p>"
+        + "word " * 200
+        + '<img src="https://example.com/image.png"></p><pre>'
+        + "code " * 100
+        + "</pre>"
+    )
+
+    article_html = process_article_html(summary="", content=content, link=None)
+
+    assert article_html.summary == truncatewords_html(
+        sanitize_keep_safe_tags(
+            article_html.content, extra_tags_to_cleanup=constants.EXTRA_TAGS_TO_REMOVE_FROM_SUMMARY
+        ),
+        constants.MAX_SUMMARY_LENGTH,
+    )
+    assert "<pre>" not in article_html.summary
+    assert article_html.summary.endswith("code …")
@@ -57,7 +57,7 @@ class TestAddArticle:
     def test_add_article(self, django_assert_num_queries, logged_in_sync_client, httpx_mock):
         httpx_mock.add_response(text=self.article_content, url=self.article_url)
 
-        with django_assert_num_queries(14):
+        with django_assert_num_queries(13):
             response = logged_in_sync_client.post(self.url, self.sample_payload)
 
         assert response.status_code == HTTPStatus.CREATED
@@ -79,7 +79,7 @@ class TestAddArticle:
     ):
         httpx_mock.add_response(text=self.article_content, url=self.article_url)
 
-        with django_assert_num_queries(18):
+        with django_assert_num_queries(16):
             response = logged_in_sync_client.post(self.url, self.payload_with_tags)
 
         assert response.status_code == HTTPStatus.CREATED
@@ -180,10 +180,7 @@ class TestAddArticle:
         ]
 
     def test_content_too_big(self, logged_in_sync_client, httpx_mock, mocker):
-        mocker.patch(
-            "legadilo.reading.services.article_fetching.sys.getsizeof",
-            return_value=10 * 2048 * 1024,
-        )
+        mocker.patch("legadilo.reading.constants.MAX_ARTICLE_FILE_SIZE", 10)
         httpx_mock.add_response(text=self.article_content, url=self.article_url)
 
         response = logged_in_sync_client.post(self.url, self.sample_payload)
@@ -240,7 +237,7 @@ class TestRefetchArticleView:
             text=get_article_fixture_content("sample_blog_article.html"), url=self.article_url
         )
 
-        with django_assert_num_queries(14):
+        with django_assert_num_queries(13):
             response = logged_in_sync_client.post(self.url, self.sample_payload)
 
         assert response.status_code == HTTPStatus.FOUND
@@ -260,7 +257,7 @@ class TestRefetchArticleView:
     ):
         httpx_mock.add_response(text="", url=self.article_url)
 
-        with django_assert_num_queries(14):
+        with django_assert_num_queries(13):
             response = logged_in_sync_client.post(
                 self.url,
                 self.sample_payload,
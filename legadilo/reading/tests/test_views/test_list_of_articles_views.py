@@ -14,7 +14,7 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from http import HTTPStatus
 
 import pytest
@@ -23,6 +23,7 @@ from django.template.defaultfilters import urlencode
 from django.urls import reverse
 
 from legadilo.conftest import assert_redirected_to_login_page
+from legadilo.feeds.tests.factories import FeedFactory
 from legadilo.reading import constants
 from legadilo.reading.models import ArticleTag
 from legadilo.reading.tests.factories import ArticleFactory, ReadingListFactory, TagFactory
@@ -77,7 +78,7 @@ class TestReadingListWithArticlesView:
         assert response.status_code == HTTPStatus.NOT_FOUND
 
     def test_default_view(self, logged_in_sync_client, django_assert_num_queries):
-        with django_assert_num_queries(14):
+        with django_assert_num_queries(15):
             response = logged_in_sync_client.get(self.default_reading_list_url)
 
         assert response.status_code == HTTPStatus.OK
@@ -98,7 +99,7 @@ class TestReadingListWithArticlesView:
         assert response.context_data.get("update_articles_form") is None
 
     def test_reading_list_view(self, logged_in_sync_client, django_assert_num_queries):
-        with django_assert_num_queries(14):
+        with django_assert_num_queries(15):
             response = logged_in_sync_client.get(self.reading_list_url)
 
         assert response.status_code == HTTPStatus.OK
@@ -122,6 +123,41 @@ class TestReadingListWithArticlesView:
         assert response.context_data["from_url"] == self.reading_list_url
         assert response.context_data.get("update_articles_form") is None
 
+    def test_request_refresh_of_due_feeds(self, user, other_user, logged_in_sync_client, settings):
+        settings.FEED_REFRESH_ON_READING_LIST_VIEW = True
+        due_feed = FeedFactory(user=user, next_refresh_at=utcnow() - timedelta(hours=1))
+        later_feed = FeedFactory(user=user, next_refresh_at=utcnow() + timedelta(hours=1))
+        other_user_feed = FeedFactory(
+            user=other_user, next_refresh_at=utcnow() - timedelta(hours=1)
+        )
+
+        response = logged_in_sync_client.get(self.default_reading_list_url)
+
+        assert response.status_code == HTTPStatus.OK
+        due_feed.refresh_from_db()
+        assert due_feed.next_refresh_at is None
+        later_feed.refresh_from_db()
+        assert later_feed.next_refresh_at is not None
+        other_user_feed.refresh_from_db()
+        assert other_user_feed.next_refresh_at is not None
+        user.refresh_from_db()
+        assert user.last_seen_at is not None
+
+    def test_dont_request_refresh_of_due_feeds_when_seen_recently(
+        self, user, logged_in_sync_client, settings, django_assert_num_queries
+    ):
+        settings.FEED_REFRESH_ON_READING_LIST_VIEW = True
+        user.last_seen_at = utcnow() - timedelta(minutes=10)
+        user.save()
+        due_feed = FeedFactory(user=user, next_refresh_at=utcnow() - timedelta(hours=1))
+
+        with django_assert_num_queries(14):
+            response = logged_in_sync_client.get(self.default_reading_list_url)
+
+        assert response.status_code == HTTPStatus.OK
+        due_feed.refresh_from_db()
+        assert due_feed.next_refresh_at is not None
+
     def test_reading_list_view_with_htmx(self, logged_in_sync_client, django_assert_num_queries):
         with django_assert_num_queries(13):
             response = logged_in_sync_client.get(
@@ -242,7 +278,7 @@ class TestUpdateArticlesFromTagWithArticlesView:
         assert self.article_not_in_list.tags.count() == 2
 
     def test_with_tag_actions(self, logged_in_sync_client, django_assert_num_queries):
-        with django_assert_num_queries(30):
+        with django_assert_num_queries(27):
             response = logged_in_sync_client.post(
                 self.url,
                 {
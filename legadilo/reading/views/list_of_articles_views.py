@@ -39,7 +39,9 @@ from legadilo.reading import constants
 from legadilo.reading.models import Article, ArticleTag, ReadingList, Tag
 from legadilo.reading.models.article import ArticleQuerySet
 from legadilo.reading.services.views import get_js_cfg_from_reading_list
+from legadilo.reading.signals import reading_list_viewed
 from legadilo.reading.templatetags import decode_external_tag
+from legadilo.users.models import User
 from legadilo.users.user_types import AuthenticatedHttpRequest
 from legadilo.utils.pagination import get_requested_page
 from legadilo.utils.validators import get_page_number_from_request
@@ -60,6 +62,11 @@ def reading_list_with_articles_view(
             return HttpResponseNotFound()
         return HttpResponseRedirect(reverse("reading:default_reading_list"))
 
+    if not request.htmx and not request.user.was_seen_recently:
+        # Receivers may need to know whether the user was away: we must mark them as seen after.
+        reading_list_viewed.send(sender=ReadingList, user=request.user)
+        User.objects.mark_as_seen(request.user)
+
     return _display_list_of_articles(
         request,
         Article.objects.get_articles_of_reading_list(displayed_reading_list),
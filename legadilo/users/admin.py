@@ -62,7 +62,7 @@ class UserAdmin(auth_admin.UserAdmin):
                 ),
             },
         ),
-        (_("Important dates"), {"fields": ("last_login", "date_joined")}),
+        (_("Important dates"), {"fields": ("last_login", "last_seen_at", "date_joined")}),
     )
     list_display = ["email", "name", "is_superuser"]
     search_fields = ["name", "email_deterministic"]
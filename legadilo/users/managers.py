@@ -24,6 +24,8 @@ from django.contrib.auth.models import UserManager as DjangoUserManager
 from django.core.validators import validate_email
 from django.db import models
 
+from legadilo.utils.time_utils import utcnow
+
 if TYPE_CHECKING:
     from .models import User
 else:
@@ -74,5 +76,13 @@ class UserManager(DjangoUserManager[User]):
 
         return self._create_user(email, password, **extra_fields)
 
+    def mark_as_seen(self, user: User):
+        if user.was_seen_recently:
+            return
+
+        now = utcnow()
+        user.last_seen_at = now
+        self.get_queryset().filter(id=user.id).update(last_seen_at=now)
+
     def get(self, *args, **kwargs):
         return self.select_related("settings", "settings__timezone").get(*args, **kwargs)
@@ -13,6 +13,7 @@
 #
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from datetime import datetime, timedelta
 from functools import cached_property
 from zoneinfo import ZoneInfo
 
@@ -22,6 +23,9 @@ from django.urls import reverse
 from django.utils.translation import gettext_lazy as _
 
 from legadilo.users.managers import UserManager
+from legadilo.utils.time_utils import utcnow
+
+LAST_SEEN_PRECISION = timedelta(hours=1)
 
 
 class User(AbstractUser):
@@ -37,6 +41,15 @@ class User(AbstractUser):
     last_name = None  # type: ignore[assignment]
     email = models.EmailField(_("email address"), db_collation="case_insensitive", unique=True)
     username = None  # type: ignore[assignment]
+    last_seen_at = models.DateTimeField(
+        _("last seen at"),
+        null=True,
+        blank=True,
+        help_text=_(
+            "When the user last opened a reading list. Sessions are renewed on each request, so "
+            "the last login date may be very old for users reading everyday."
+        ),
+    )
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
@@ -57,6 +70,19 @@ class User(AbstractUser):
     def count_unread_notifications(self) -> int:
         return self.notifications.count_unread(self)
 
+    @property
+    def last_activity_at(self) -> datetime:
+        return max(
+            date
+            for date in (self.last_seen_at, self.last_login, self.date_joined)
+            if date is not None
+        )
+
+    @property
+    def was_seen_recently(self) -> bool:
+        # We don't need more precision: this avoids an update on each request.
+        return self.last_seen_at is not None and utcnow() - self.last_seen_at < LAST_SEEN_PRECISION
+
     @cached_property
     def tzinfo(self) -> ZoneInfo:
         return self.settings.timezone.zone_info
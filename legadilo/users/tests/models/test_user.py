@@ -17,12 +17,15 @@
 from io import StringIO
 
 import pytest
+import time_machine
 from django.core.exceptions import ValidationError
 from django.core.management import call_command
 from django.db import IntegrityError
 
 from legadilo.feeds.tests.factories import FeedFactory
 from legadilo.users.models import User
+from legadilo.users.tests.factories import UserFactory
+from legadilo.utils.time_utils import utcdt
 
 
 @pytest.mark.django_db
@@ -45,6 +48,21 @@ class TestUserQuerySet:
 
 @pytest.mark.django_db
 class TestUserManager:
+    @time_machine.travel("2024-05-08 10:00:00", tick=False)
+    def test_mark_as_seen(self, user, django_assert_num_queries):
+        with django_assert_num_queries(1):
+            User.objects.mark_as_seen(user)
+
+        assert user.last_seen_at == utcdt(2024, 5, 8, 10)
+        user.refresh_from_db()
+        assert user.last_seen_at == utcdt(2024, 5, 8, 10)
+        with (
+            time_machine.travel("2024-05-08 10:30:00", tick=False),
+            django_assert_num_queries(0),
+        ):
+            User.objects.mark_as_seen(user)
+        assert user.last_seen_at == utcdt(2024, 5, 8, 10)
+
     def test_create_user(self):
         user = User.objects.create_user(
             email="john@example.com",
@@ -109,3 +127,12 @@ def test_createsuperuser_command():
 
 def test_user_get_absolute_url(user: User):
     assert user.get_absolute_url() == f"/users/{user.pk}/"
+
+
+def test_user_last_activity_at():
+    user = UserFactory.build(date_joined=utcdt(2024, 1, 1), last_login=None, last_seen_at=None)
+    assert user.last_activity_at == utcdt(2024, 1, 1)
+
+    user.last_login = utcdt(2024, 3, 1)
+    user.last_seen_at = utcdt(2024, 2, 1)
+    assert user.last_activity_at == utcdt(2024, 3, 1)
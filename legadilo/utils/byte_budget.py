@@ -0,0 +1,131 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+_active_reservation: ContextVar[ByteBudgetReservation | None] = ContextVar(
+    "active_byte_budget_reservation", default=None
+)
+
+
+class ByteBudget:
+    """Admit new work only while the bytes held by the admitted work stay under max_bytes.
+
+    Each work reserves estimated_bytes when it's admitted. We can't know the size of a download
+    before it's done, so the bytes it really holds are counted while they are downloaded with
+    use_byte_budget. This never blocks: the admitted work may go over the limit and new work will
+    wait until enough bytes are released. Work is always admitted when nothing else is running, so
+    a download bigger than the budget can't block us forever.
+
+    The bytes are released at the end of the reservation, unless it's kept: its results then stay
+    in memory and the bytes must be released once they are freed.
+    """
+
+    def __init__(self, max_bytes: int, *, estimated_bytes: int):
+        self.max_bytes = max_bytes
+        self.estimated_bytes = estimated_bytes
+        self.in_flight_bytes = 0
+        self.peak_bytes = 0
+        self.nb_waits = 0
+        self._nb_reservations = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self) -> AsyncIterator[ByteBudgetReservation]:
+        async with self._condition:
+            if not self._can_admit():
+                self.nb_waits += 1
+                await self._condition.wait_for(self._can_admit)
+            self._nb_reservations += 1
+            self.add(self.estimated_bytes)
+
+        reservation = ByteBudgetReservation(self, self.estimated_bytes)
+        token = _active_reservation.set(reservation)
+        try:
+            yield reservation
+        finally:
+            _active_reservation.reset(token)
+            if not reservation.is_kept:
+                await reservation.release()
+
+    async def _release(self, reservation: ByteBudgetReservation):
+        async with self._condition:
+            self._nb_reservations -= 1
+            self.in_flight_bytes -= reservation.nb_bytes
+            self._condition.notify_all()
+
+    @property
+    def is_exhausted(self) -> bool:
+        """Whether new work would have to wait for bytes to be released."""
+        return not self._can_admit()
+
+    def _can_admit(self) -> bool:
+        return (
+            self._nb_reservations == 0
+            or self.in_flight_bytes + self.estimated_bytes <= self.max_bytes
+        )
+
+    def add(self, nb_bytes: int):
+        self.in_flight_bytes += nb_bytes
+        self.peak_bytes = max(self.peak_bytes, self.in_flight_bytes)
+
+    def __str__(self):
+        return (
+            f"ByteBudget(max_bytes={_format_mib(self.max_bytes)}, "
+            f"peak_bytes={_format_mib(self.peak_bytes)}, nb_waits={self.nb_waits})"
+        )
+
+
+class ByteBudgetReservation:
+    def __init__(self, budget: ByteBudget, nb_bytes: int):
+        self.nb_bytes = nb_bytes
+        self.nb_used_bytes = 0
+        self.is_kept = False
+        self._is_released = False
+        self._budget = budget
+
+    def keep(self):
+        """Keep the bytes reserved after the reservation ends. They must be released later."""
+        self.is_kept = True
+
+    async def release(self):
+        if self._is_released:
+            return
+
+        self._is_released = True
+        await self._budget._release(self)
+
+    def use(self, nb_bytes: int):
+        self.nb_used_bytes += nb_bytes
+        if self.nb_used_bytes > self.nb_bytes:
+            self._budget.add(self.nb_used_bytes - self.nb_bytes)
+            self.nb_bytes = self.nb_used_bytes
+
+
+def use_byte_budget(nb_bytes: int):
+    """Count bytes in the active reservation. It does nothing if no reservation is active."""
+    reservation = _active_reservation.get()
+    if reservation is not None:
+        reservation.use(nb_bytes)
+
+
+def _format_mib(nb_bytes: int) -> str:
+    return f"{nb_bytes / 1024 / 1024:.1f}MiB"
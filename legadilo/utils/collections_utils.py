@@ -16,6 +16,7 @@
 
 from __future__ import annotations
 
+import math
 from collections.abc import AsyncIterable, Iterable
 from typing import Any, TypeVar
 
@@ -64,3 +65,12 @@ async def aset(collection: AsyncIterable[T]) -> set[T]:
         output.add(item)
 
     return output
+
+
+def percentile(values: Iterable[float], percent: int) -> float:
+    """Compute the percentile of values with the nearest-rank method."""
+    sorted_values = sorted(values)
+    if not sorted_values:
+        return 0.0
+
+    return sorted_values[max(0, math.ceil(percent / 100 * len(sorted_values)) - 1)]
@@ -14,9 +14,21 @@
 # You should have received a copy of the GNU Affero General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import time
+from datetime import timedelta
+from email.utils import parsedate_to_datetime
+from typing import Any
+
 import httpx
 from django.conf import settings
 
+from legadilo.utils.byte_budget import use_byte_budget
+from legadilo.utils.time_utils import utcnow
+
+
+class ResponseTooBigError(Exception):
+    pass
+
 
 def get_async_client() -> httpx.AsyncClient:
     return httpx.AsyncClient(
@@ -29,7 +41,85 @@ def get_async_client() -> httpx.AsyncClient:
 def get_rss_async_client() -> httpx.AsyncClient:
     return httpx.AsyncClient(
         limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=5.0),
-        timeout=settings.RSS_FETCH_TIMEOUT,
+        timeout=httpx.Timeout(
+            settings.RSS_FETCH_TIMEOUT, connect=settings.RSS_FETCH_CONNECT_TIMEOUT
+        ),
         follow_redirects=True,
         headers={"User-Agent": "Legadilo RSS"},
     )
+
+
+async def get_limited_content(
+    client: httpx.AsyncClient,
+    url: str,
+    *,
+    max_size: int,
+    headers: dict[str, str] | None = None,
+    extensions: dict[str, Any] | None = None,
+) -> tuple[bytes, httpx.Response]:
+    """Download the body of url without ever holding more than max_size bytes of it.
+
+    We reject the response as soon as we know it's too big: from its Content-Length header if the
+    server sent it or while reading the body otherwise. The body is returned as bytes next to the
+    response since the response is closed and its content can't be read anymore. Downloaded bytes
+    are counted in the active byte budget if any.
+    """
+    async with client.stream(
+        "GET", url, headers=headers, extensions=extensions, follow_redirects=True
+    ) as response:
+        response.raise_for_status()
+        content_length = response.headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > max_size:
+            raise ResponseTooBigError
+
+        content = bytearray()
+        async for chunk in response.aiter_bytes():
+            content.extend(chunk)
+            use_byte_budget(len(chunk))
+            if len(content) > max_size:
+                raise ResponseTooBigError
+
+    return bytes(content), response
+
+
+class ConnectionTimer:
+    """Measure the time spent opening connections: DNS resolution, TCP and TLS handshakes.
+
+    Give its trace method as the trace extension of the request. Reused connections take no time.
+    """
+
+    _TRACED_STEPS = ("connection.connect_tcp", "connection.start_tls")
+
+    def __init__(self):
+        self.duration = 0.0
+        self._started_at: dict[str, float] = {}
+
+    async def trace(self, event_name: str, info: dict[str, Any]):
+        step, _, status = event_name.rpartition(".")
+        if step not in self._TRACED_STEPS:
+            return
+
+        if status == "started":
+            self._started_at[step] = time.perf_counter()
+        elif (started_at := self._started_at.pop(step, None)) is not None:
+            self.duration += time.perf_counter() - started_at
+
+
+def parse_retry_after(value: str | None) -> timedelta | None:
+    """Parse the Retry-After header: it's either a number of seconds or an HTTP date."""
+    if not value:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return timedelta(seconds=int(value))
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        return None
+
+    return max(retry_at - utcnow(), timedelta(0))
@@ -0,0 +1,136 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import asyncio
+
+import pytest
+
+from legadilo.utils.byte_budget import ByteBudget, use_byte_budget
+
+
+@pytest.mark.asyncio
+class TestByteBudget:
+    async def test_wait_for_bytes_to_be_released(self):
+        budget = ByteBudget(250, estimated_bytes=100)
+        running = 0
+        max_running = 0
+
+        async def run():
+            nonlocal running, max_running
+            async with budget.reserve():
+                running += 1
+                max_running = max(max_running, running)
+                await asyncio.sleep(0.01)
+                running -= 1
+
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(5):
+                tg.create_task(run())
+
+        assert max_running == 2
+        assert budget.nb_waits == 3
+        assert budget.peak_bytes == 200
+        assert budget.in_flight_bytes == 0
+
+    async def test_count_used_bytes(self):
+        budget = ByteBudget(250, estimated_bytes=100)
+        started_second = asyncio.Event()
+
+        async def run_second():
+            async with budget.reserve():
+                started_second.set()
+
+        async with budget.reserve():
+            use_byte_budget(60)
+            use_byte_budget(60)
+            assert budget.in_flight_bytes == 120
+
+            use_byte_budget(100)
+            assert budget.in_flight_bytes == 220
+
+            # The bytes we used don't leave enough room for another reservation.
+            second = asyncio.create_task(run_second())
+            await asyncio.sleep(0.01)
+            assert not started_second.is_set()
+
+        await second
+        assert started_second.is_set()
+        assert budget.nb_waits == 1
+        assert budget.peak_bytes == 220
+        assert budget.in_flight_bytes == 0
+
+    async def test_always_admit_when_nothing_runs(self):
+        budget = ByteBudget(10, estimated_bytes=100)
+
+        async with budget.reserve():
+            assert budget.in_flight_bytes == 100
+
+        assert budget.nb_waits == 0
+        assert budget.in_flight_bytes == 0
+
+    async def test_release_on_error(self):
+        budget = ByteBudget(250, estimated_bytes=100)
+
+        async def run():
+            async with budget.reserve():
+                use_byte_budget(500)
+                raise ValueError("Boom")
+
+        with pytest.raises(ValueError, match="Boom"):
+            await run()
+
+        assert budget.in_flight_bytes == 0
+        assert budget.peak_bytes == 500
+
+    async def test_keep_reservation(self):
+        budget = ByteBudget(150, estimated_bytes=100)
+        started_second = asyncio.Event()
+
+        async def run_second():
+            async with budget.reserve():
+                started_second.set()
+
+        async with budget.reserve() as reservation:
+            use_byte_budget(120)
+            reservation.keep()
+
+        # The bytes are still reserved.
+        assert budget.in_flight_bytes == 120
+        assert budget.is_exhausted
+        second = asyncio.create_task(run_second())
+        await asyncio.sleep(0.01)
+        assert not started_second.is_set()
+
+        await reservation.release()
+        await reservation.release()
+        await second
+
+        assert started_second.is_set()
+        assert not budget.is_exhausted
+        assert budget.peak_bytes == 120
+        assert budget.in_flight_bytes == 0
+
+    async def test_str(self):
+        budget = ByteBudget(100 * 1024 * 1024, estimated_bytes=1024 * 1024)
+
+        async with budget.reserve():
+            use_byte_budget(3 * 1024 * 1024)
+
+        assert str(budget) == "ByteBudget(max_bytes=100.0MiB, peak_bytes=3.0MiB, nb_waits=0)"
+
+
+def test_use_byte_budget_without_reservation():
+    use_byte_budget(100)
@@ -17,7 +17,7 @@ import asyncio
 
 import pytest
 
-from legadilo.utils.collections_utils import alist, aset, max_or_none, min_or_none
+from legadilo.utils.collections_utils import alist, aset, max_or_none, min_or_none, percentile
 from legadilo.utils.time_utils import utcdt
 
 
@@ -83,3 +83,17 @@ async def test_aset():
     output = await aset(async_generator())
 
     assert output == {1, 2}
+
+
+@pytest.mark.parametrize(
+    ("values", "percent", "expected"),
+    [
+        pytest.param([], 50, 0.0, id="empty"),
+        pytest.param([3.0], 95, 3.0, id="one-value"),
+        pytest.param([4.0, 1.0, 3.0, 2.0], 50, 2.0, id="median"),
+        pytest.param([4.0, 1.0, 3.0, 2.0], 95, 4.0, id="p95"),
+        pytest.param([4.0, 1.0, 3.0, 2.0], 0, 1.0, id="p0"),
+    ],
+)
+def test_percentile(values, percent, expected):
+    assert percentile(values, percent) == expected
@@ -0,0 +1,118 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from datetime import timedelta
+
+import httpx
+import pytest
+import time_machine
+from pytest_httpx import IteratorStream
+
+from legadilo.utils.http_utils import (
+    ConnectionTimer,
+    ResponseTooBigError,
+    get_limited_content,
+    get_rss_async_client,
+    parse_retry_after,
+)
+
+
+def test_rss_client_connect_timeout(settings):
+    settings.RSS_FETCH_TIMEOUT = 300
+    settings.RSS_FETCH_CONNECT_TIMEOUT = 10
+
+    client = get_rss_async_client()
+
+    assert client.timeout == httpx.Timeout(300, connect=10)
+
+
+@pytest.mark.asyncio
+class TestGetLimitedContent:
+    url = "https://example.com/feed.xml"
+
+    async def test_get_content(self, httpx_mock):
+        httpx_mock.add_response(url=self.url, content=b"Some content")
+
+        async with httpx.AsyncClient() as client:
+            content, response = await get_limited_content(client, self.url, max_size=100)
+
+        assert content == b"Some content"
+        assert response.url == self.url
+
+    async def test_content_length_too_big(self, httpx_mock):
+        httpx_mock.add_response(url=self.url, content=b"Some content")
+
+        with pytest.raises(ResponseTooBigError):
+            async with httpx.AsyncClient() as client:
+                await get_limited_content(client, self.url, max_size=5)
+
+    async def test_streamed_content_too_big(self, httpx_mock):
+        consumed_chunks = []
+
+        def generate_chunks():
+            for _ in range(10):
+                consumed_chunks.append(b"a" * 10)
+                yield b"a" * 10
+
+        httpx_mock.add_response(url=self.url, stream=IteratorStream(generate_chunks()))
+
+        with pytest.raises(ResponseTooBigError):
+            async with httpx.AsyncClient() as client:
+                await get_limited_content(client, self.url, max_size=25)
+
+        # We stop reading as soon as we are above the limit.
+        assert len(consumed_chunks) == 3
+
+    async def test_http_error(self, httpx_mock):
+        httpx_mock.add_response(url=self.url, status_code=404)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            async with httpx.AsyncClient() as client:
+                await get_limited_content(client, self.url, max_size=100)
+
+
+@time_machine.travel("2024-05-08 10:00:00", tick=False)
+@pytest.mark.parametrize(
+    ("value", "expected_delay"),
+    [
+        pytest.param(None, None, id="missing"),
+        pytest.param("", None, id="empty"),
+        pytest.param("120", timedelta(minutes=2), id="seconds"),
+        pytest.param("Wed, 08 May 2024 11:00:00 GMT", timedelta(hours=1), id="http-date"),
+        pytest.param("Wed, 08 May 2024 09:00:00 GMT", timedelta(0), id="http-date-in-the-past"),
+        pytest.param("tomorrow", None, id="invalid"),
+    ],
+)
+def test_parse_retry_after(value, expected_delay):
+    assert parse_retry_after(value) == expected_delay
+
+
+@pytest.mark.asyncio
+async def test_connection_timer(mocker):
+    mocker.patch("legadilo.utils.http_utils.time.perf_counter", side_effect=[1.0, 1.5, 2.0, 2.25])
+    connection_timer = ConnectionTimer()
+
+    for event_name in (
+        "connection.connect_tcp.started",
+        "connection.connect_tcp.complete",
+        "connection.start_tls.started",
+        "connection.start_tls.complete",
+        "http11.send_request_headers.started",
+        "http11.send_request_headers.complete",
+    ):
+        await connection_timer.trace(event_name, {})
+
+    assert connection_timer.duration == 0.75
@@ -0,0 +1,66 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from legadilo.utils.timings import (
+    StageTimings,
+    StageTimingsStats,
+    measure_stage,
+    record_stage_durations,
+)
+
+
+class TestStageTimings:
+    def test_nested_stages_are_exclusive(self, mocker):
+        mocker.patch("legadilo.utils.timings.time.perf_counter", side_effect=[0.0, 1.0, 3.0, 4.5])
+        stage_timings = StageTimings()
+
+        with stage_timings.measure("outer"), stage_timings.measure("inner"):
+            pass
+
+        assert stage_timings.durations == {"inner": 2.0, "outer": 2.5}
+        assert stage_timings.total_duration == 4.5
+
+    def test_measure_active_timings(self):
+        stage_timings = StageTimings({"download": 1.0})
+
+        with stage_timings.activate():
+            with measure_stage("parse"):
+                pass
+            record_stage_durations({"download": 0.5})
+        record_stage_durations({"download": 2.0})
+
+        assert stage_timings.durations["download"] == 1.5
+        assert set(stage_timings.durations.keys()) == {"download", "parse"}
+
+    def test_measure_without_active_timings(self):
+        with measure_stage("parse"):
+            record_stage_durations({"download": 1.0})
+
+
+def test_stage_timings_stats():
+    stats = StageTimingsStats(nb_slowest_items=2)
+
+    stats.add("fast", StageTimings({"download": 0.1, "parse": 0.2}))
+    stats.add("slow", StageTimings({"download": 2.0, "parse": 0.5}))
+    stats.add("medium", StageTimings({"download": 0.5, "parse": 1.0}))
+
+    assert stats.nb_items == 3
+    assert stats.total_durations.durations == {"download": 2.6, "parse": 1.7}
+    assert stats.slowest_items == [("slow", 2.5, "download"), ("medium", 1.5, "parse")]
+    assert str(stats) == (
+        "StageTimingsStats(nb_items=3, download=2.600s, parse=1.700s, "
+        "slowest=[slow (2.500s, mostly download), medium (1.500s, mostly parse)])"
+    )
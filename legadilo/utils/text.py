@@ -21,9 +21,12 @@ from legadilo.utils.security import full_sanitize
 
 
 def get_nb_words_from_html(text: str) -> int:
-    raw_content = full_sanitize(text)
+    return get_nb_words(full_sanitize(text))
+
+
+def get_nb_words(text: str) -> int:
     nb_words = 0
-    for word in raw_content.split():
+    for word in text.split():
         if word.strip(string.punctuation):
             nb_words += 1
 
@@ -0,0 +1,134 @@
+# Legadilo
+# Copyright (C) 2023-2024 by Legadilo contributors.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Affero General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU Affero General Public License for more details.
+#
+# You should have received a copy of the GNU Affero General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import heapq
+import time
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_active_stage_timings: ContextVar[StageTimings | None] = ContextVar(
+    "active_stage_timings", default=None
+)
+
+
+class StageTimings:
+    """Accumulate the time spent in each stage of a process, in seconds.
+
+    Durations are exclusive: the time spent in a stage measured inside another one is only counted
+    for the inner stage. Activate the timings to measure stages deep in the call stack with
+    measure_stage without passing them around.
+    """
+
+    def __init__(self, durations: Mapping[str, float] | None = None):
+        self.durations: dict[str, float] = dict(durations or {})
+        self._nested_durations: list[float] = []
+
+    @property
+    def total_duration(self) -> float:
+        return sum(self.durations.values())
+
+    def add(self, durations: Mapping[str, float]):
+        for stage, duration in durations.items():
+            self.durations[stage] = self.durations.get(stage, 0.0) + duration
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        started_at = time.perf_counter()
+        self._nested_durations.append(0.0)
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started_at
+            nested_duration = self._nested_durations.pop()
+            self.add({stage: duration - nested_duration})
+            if self._nested_durations:
+                self._nested_durations[-1] += duration
+
+    @contextmanager
+    def activate(self) -> Iterator[StageTimings]:
+        token = _active_stage_timings.set(self)
+        try:
+            yield self
+        finally:
+            _active_stage_timings.reset(token)
+
+    def as_dict(self) -> dict[str, float]:
+        return {stage: round(duration, 4) for stage, duration in self.durations.items()}
+
+
+@contextmanager
+def measure_stage(stage: str) -> Iterator[None]:
+    """Measure the stage in the active timings. It does nothing if no timings are active."""
+    stage_timings = _active_stage_timings.get()
+    if stage_timings is None:
+        yield
+        return
+
+    with stage_timings.measure(stage):
+        yield
+
+
+def record_stage_durations(durations: Mapping[str, float]):
+    """Add durations measured elsewhere (in another process for instance) to the active timings."""
+    if (stage_timings := _active_stage_timings.get()) is not None:
+        stage_timings.add(durations)
+
+
+class StageTimingsStats:
+    """Aggregate the timings of many items to find which stages and which items cost the most."""
+
+    def __init__(self, *, nb_slowest_items: int = 3):
+        self.nb_items = 0
+        self.total_durations = StageTimings()
+        self._nb_slowest_items = nb_slowest_items
+        self._slowest_items: list[tuple[float, str, str]] = []
+
+    @property
+    def slowest_items(self) -> list[tuple[str, float, str]]:
+        """The slowest items with their total duration and the stage that cost them the most."""
+        return [
+            (name, duration, slowest_stage)
+            for duration, name, slowest_stage in sorted(self._slowest_items, reverse=True)
+        ]
+
+    def add(self, name: str, stage_timings: StageTimings):
+        self.nb_items += 1
+        self.total_durations.add(stage_timings.durations)
+        if not stage_timings.durations:
+            return
+
+        slowest_stage = max(stage_timings.durations, key=stage_timings.durations.__getitem__)
+        item = (stage_timings.total_duration, name, slowest_stage)
+        if len(self._slowest_items) < self._nb_slowest_items:
+            heapq.heappush(self._slowest_items, item)
+        else:
+            heapq.heappushpop(self._slowest_items, item)
+
+    def __str__(self):
+        stages = [
+            f"{stage}={duration:.3f}s" for stage, duration in self.total_durations.durations.items()
+        ]
+        slowest_items = ", ".join(
+            f"{name} ({duration:.3f}s, mostly {slowest_stage})"
+            for name, duration, slowest_stage in self.slowest_items
+        )
+        return (
+            f"StageTimingsStats({', '.join([f'nb_items={self.nb_items}', *stages])}, "
+            f"slowest=[{slowest_items}])"
+        )